@@ -3,16 +3,28 @@ from gluonts.model.n_beats import NBEATSEstimator
 from gluonts.model.simple_feedforward import SimpleFeedForwardEstimator
 from gluonts.model.transformer import TransformerEstimator
 from gluonts.model.wavenet import WaveNetEstimator
-from gluonts.dataset.common import ListDataset
+from gluonts.dataset.common import ListDataset, ProcessDataEntry
 from gluonts.dataset.field_names import FieldName
 from gluonts.evaluation.backtest import make_evaluation_predictions
 from datetime import datetime
+import argparse
 import csv
+import functools
 import os
-import subprocess
 import numpy as np
 import pandas as pd
+import experiments.experiment_runner as experiment_runner
+from experiments.deep_learning_helper import get_forecast_quantiles, get_rolling_origin_train_lengths
+from experiments.local_model_experiments import format_execution_time
 import utils.data_loader as loader
+import utils.error_calculator as error_calculator
+import utils.memory_cache as memory_cache
+import utils.ragged_series as ragged_series
+import utils.result_format as result_format
+from utils.atomic_write import open_atomically
+from utils.profiler import StageProfiler
+from utils.seasonality import SEASONALITY_MAP
+from utils.window_sampler import WindowSampler
 
 BASE_DIR = "TSForecasting"
 
@@ -22,19 +34,20 @@ VALUE_COL_NAME = "series_value"
 # The name of the column containing timestamps after loading data from the .tsf file into a dataframe
 TIME_COL_NAME = "start_timestamp"
 
-# Seasonality values corresponding with the frequencies: minutely, 10_minutes, half_hourly, hourly, daily, weekly, monthly, quarterly and yearly
-# Consider multiple seasonalities for frequencies less than daily
-SEASONALITY_MAP = {
-   "minutely": [1440, 10080, 525960],
-   "10_minutes": [144, 1008, 52596],
-   "half_hourly": [48, 336, 17532],
-   "hourly": [24, 168, 8766],
-   "daily": 7,
-   "weekly": 365.25/7,
-   "monthly": 12,
-   "quarterly": 4,
-   "yearly": 1
-}
+# The start timestamp used for the series of datasets without timestamps
+DUMMY_START_TIME = "1900-01-01 00:00:00"
+
+# The number of forecasts provided in one iteration while performing the rolling origin evaluation
+ROLLING_ORIGIN_FORECAST_HORIZON = 1
+
+# The number of rolling origin windows given to the model in one prediction call
+ROLLING_ORIGIN_CHUNK_SIZE = 100000
+
+# The number of sample paths drawn per series by the models that forecast through sampling
+NUM_SAMPLES = 100
+
+# Maximum estimated memory size of the prepared datasets kept in memory to be reused by the experiments of the same dataset
+PREPARED_DATASET_CACHE_SIZE = 4 * 1024 ** 3
 
 # Frequencies used by GluonTS framework
 FREQUENCY_MAP = {
@@ -49,6 +62,25 @@ FREQUENCY_MAP = {
    "yearly": "1Y"
 }
 
+# Returns the name used for the result files of an experiment
+#
+# Parameters
+# dataset_name - the name of the dataset
+# lag - the number of past lags that should be used when predicting the next future value of time series
+# input_file_name - name of the .tsf file corresponding with the dataset
+# method - name of the forecasting method that you want to evaluate
+def get_experiment_name(dataset_name, lag, input_file_name, method, *args):
+    return dataset_name + "_" + method + "_lag_" + str(lag)
+
+
+# Returns the input file and forecast horizon of an experiment, which identify its prepared dataset
+# The sweep runs the experiments sharing them in the same worker process, so they reuse the prepared dataset from PREPARED_DATASET_CACHE
+def get_experiment_dataset_key(dataset_name, lag, input_file_name, method, external_forecast_horizon = None, *args):
+    return input_file_name, external_forecast_horizon
+
+
+# Returns the description of an experiment used to record it in the job manifest: the key fields, the input file and the output files
+#
 # Parameters
 # dataset_name - the name of the dataset
 # lag - the number of past lags that should be used when predicting the next future value of time series
@@ -56,17 +88,37 @@ FREQUENCY_MAP = {
 # method - name of the forecasting method that you want to evaluate
 # external_forecast_horizon - the required forecast horizon, if it is not available in the .tsf file
 # integer_conversion - whether the forecasts should be rounded or not
-def get_deep_nn_forecasts(dataset_name, lag, input_file_name, method, external_forecast_horizon = None, integer_conversion = False):
-    print("Started loading " + dataset_name)
+# binary_results - whether the forecasts are written in the binary result format
+def get_experiment_info(dataset_name, lag, input_file_name, method, external_forecast_horizon = None, integer_conversion = False, binary_results = False):
+    return _get_experiment_info("fixed_horizon", dataset_name, lag, input_file_name, method, external_forecast_horizon, binary_results)
+
+
+# Same as get_experiment_info for the rolling origin experiments run by get_deep_nn_rolling_origin_forecasts
+def get_rolling_origin_experiment_info(dataset_name, lag, input_file_name, method, external_forecast_horizon = None, integer_conversion = False, step = ROLLING_ORIGIN_FORECAST_HORIZON, binary_results = False):
+    return _get_experiment_info("rolling_origin", dataset_name, lag, input_file_name, method, step, binary_results)
 
-    df, frequency, forecast_horizon, contain_missing_values, contain_equal_length = loader.convert_tsf_to_dataframe(BASE_DIR + "/tsf_data/" + input_file_name, 'NaN', VALUE_COL_NAME)
 
-    train_series_list = []
-    test_series_list = []
-    train_series_full_list = []
-    test_series_full_list = []
-    final_forecasts = []
+def _get_experiment_info(evaluation, dataset_name, lag, input_file_name, method, horizon, binary_results):
+    file_name = get_experiment_name(dataset_name, lag, input_file_name, method)
+    error_file_prefix = BASE_DIR + "/results/" + evaluation + "_errors/" + file_name
 
+    return {
+        "dataset": dataset_name,
+        "method": method,
+        "lag": lag,
+        "horizon": horizon,
+        "input_file": BASE_DIR + "/tsf_data/" + input_file_name,
+        "outputs": [BASE_DIR + "/results/" + evaluation + "_forecasts/" + file_name + (result_format.RESULT_FILE_EXTENSION if binary_results else ".txt"),
+                    BASE_DIR + "/results/" + evaluation + "_execution_times/" + file_name + ".txt",
+                    error_file_prefix + ".txt"] + [error_file_prefix + "_" + measure + ".txt" for measure in ["smape", "msmape", "mase", "mae", "rmse"]]
+    }
+
+
+# Returns the GluonTS frequency and the seasonality used to calculate MASE for a frequency given in a .tsf file
+#
+# Parameters
+# frequency - frequency given in the .tsf file, or None if it is not available
+def get_frequency_and_seasonality(frequency):
     if frequency is not None:
         freq = FREQUENCY_MAP[frequency]
         seasonality = SEASONALITY_MAP[frequency]
@@ -77,6 +129,27 @@ def get_deep_nn_forecasts(dataset_name, lag, input_file_name, method, external_f
     if isinstance(seasonality, list):
         seasonality = min(seasonality) # Use to calculate MASE
 
+    return freq, seasonality
+
+
+# Loads a dataset and creates its training and test sets
+# Returns the training series, test series, GluonTS training and test datasets, GluonTS frequency, seasonality and forecast horizon
+# The training series are a RaggedSeries container of views of the memory-mapped dataset cache and the test series are a matrix with one row per series
+# All train/test boundaries are computed from the series lengths at once, so there is no Python loop over the dataframe rows
+#
+# Parameters
+# input_file_path - path of the .tsf file corresponding with the dataset
+# external_forecast_horizon - the required forecast horizon, if it is not available in the .tsf file
+# profiler - StageProfiler recording the load, split and dataset stages
+def prepare_dataset(input_file_path, external_forecast_horizon = None, profiler = None):
+    if profiler is None:
+        profiler = StageProfiler("prepare_dataset")
+
+    with profiler.stage("load"):
+        series, frequency, forecast_horizon, contain_missing_values, contain_equal_length = ragged_series.convert_tsf_to_ragged_series(input_file_path)
+
+    freq, seasonality = get_frequency_and_seasonality(frequency)
+
     # If the forecast horizon is not given within the .tsf file, then it should be provided as a function input
     if forecast_horizon is None:
         if external_forecast_horizon is None:
@@ -84,41 +157,99 @@ def get_deep_nn_forecasts(dataset_name, lag, input_file_name, method, external_f
         else:
             forecast_horizon = external_forecast_horizon
 
-    start_exec_time = datetime.now()
-
-    for index, row in df.iterrows():
-        if TIME_COL_NAME in df.columns:
-            train_start_time = row[TIME_COL_NAME]
-        else:
-            train_start_time = datetime.strptime('1900-01-01 00-00-00', '%Y-%m-%d %H-%M-%S') # Adding a dummy timestamp, if the timestamps are not available in the dataset or consider_time is False
+    # Creating training and test series. Test series will be only used during evaluation
+    with profiler.stage("split"):
+        train_series, test_series = series.train_test_split(forecast_horizon)
 
-        series_data = row[VALUE_COL_NAME]
+        # Test series of the series shorter than the horizon are padded with NaN, so they are not used in the errors
+        test_series_matrix = np.full((len(series), forecast_horizon), np.nan)
+        test_series_matrix[:, :int(np.max(test_series.lengths, initial=0))] = test_series.to_matrix(np.nan)
 
-        # Creating training and test series. Test series will be only used during evaluation
-        train_series_data = series_data[:len(series_data) - forecast_horizon]
-        test_series_data = series_data[(len(series_data) - forecast_horizon) : len(series_data)]
+    with profiler.stage("dataset"):
+        start_times = get_start_times(series)
 
-        train_series_list.append(train_series_data)
-        test_series_list.append(test_series_data)
+        # GluonTS rejects empty targets, so the series that are not longer than the horizon are left out of the training dataset
+        # They stay in the test dataset and in the returned training series, so there is still a forecast for every series
+        num_short_series = int(np.sum(train_series.lengths == 0))
+        if num_short_series > 0:
+            print("Left " + str(num_short_series) + " series not longer than the forecast horizon out of the training dataset")
 
         # We use full length training series to train the model as we do not tune hyperparameters
-        train_series_full_list.append({
-            FieldName.TARGET: train_series_data,
-            FieldName.START: pd.Timestamp(train_start_time, freq=freq)
-        })
+        train_ds = ListDataset([{FieldName.TARGET: target, FieldName.START: start_time} for target, start_time in zip(train_series, start_times) if len(target) > 0], freq=freq)
+        test_ds = ListDataset([{FieldName.TARGET: target, FieldName.START: start_time} for target, start_time in zip(series, start_times)], freq=freq)
+
+    return train_series, test_series_matrix, train_ds, test_ds, freq, seasonality, forecast_horizon
 
-        test_series_full_list.append({
-            FieldName.TARGET: series_data,
-            FieldName.START: pd.Timestamp(train_start_time, freq=freq)
-        })
 
-    train_ds = ListDataset(train_series_full_list, freq=freq)
-    test_ds = ListDataset(test_series_full_list, freq=freq)
+# Returns the start timestamps of the series in a RaggedSeries container as a list
+# The timestamps are converted together. GluonTS attaches the frequency to them when the datasets are read
+#
+# Parameters
+# series - RaggedSeries container of the dataset
+def get_start_times(series):
+    if TIME_COL_NAME in series.attributes:
+        return pd.DatetimeIndex(series.attributes[TIME_COL_NAME]).to_list()
+    else:
+        return [pd.Timestamp(DUMMY_START_TIME)] * len(series) # Adding a dummy timestamp, if the timestamps are not available in the dataset
 
+
+# Estimates the memory size of a prepared dataset. The series in the GluonTS datasets are views of the same values buffer, so it is counted once
+def _get_prepared_dataset_size(prepared_dataset):
+    train_series_list, test_series_list, train_ds, test_ds = prepared_dataset[:4]
+    return memory_cache.estimate_size([train_series_list, test_series_list, getattr(train_ds, "list_data", []), getattr(test_ds, "list_data", [])])
+
+
+# Cache of the prepared datasets shared by all experiments in the process, so the methods evaluated on the same dataset reuse its training and test sets
+PREPARED_DATASET_CACHE = memory_cache.MemoryBoundedLRUCache(PREPARED_DATASET_CACHE_SIZE, _get_prepared_dataset_size)
+
+
+# Same as prepare_dataset, but returns the prepared dataset from PREPARED_DATASET_CACHE when the same file has already been prepared with the same horizon and frequency
+#
+# Parameters
+# input_file_name - name of the .tsf file corresponding with the dataset
+# external_forecast_horizon - the required forecast horizon, if it is not available in the .tsf file
+# profiler - StageProfiler recording the stages of prepare_dataset, or the cache lookup as the load stage when the prepared dataset is cached
+def get_prepared_dataset(input_file_name, external_forecast_horizon = None, profiler = None):
+    input_file_path = BASE_DIR + "/tsf_data/" + input_file_name
+
+    # Only the meta-data is read to create the cache key
+    with loader.open_tsf_file(input_file_path) as file:
+        frequency, forecast_horizon = loader.read_tsf_header(file)[2:4]
+
+    if forecast_horizon is None:
+        forecast_horizon = external_forecast_horizon
+
+    freq, _ = get_frequency_and_seasonality(frequency)
+    cache_key = (os.path.abspath(input_file_path), os.stat(input_file_path).st_mtime_ns, forecast_horizon, freq)
+
+    if profiler is None:
+        profiler = StageProfiler("prepare_dataset")
+
+    if cache_key in PREPARED_DATASET_CACHE:
+        # The cached dataset is not loaded or split again, so the cache lookup is recorded as the load stage
+        with profiler.stage("load", cached=True):
+            prepared_dataset = PREPARED_DATASET_CACHE.get_or_create(cache_key, None)
+    else:
+        prepared_dataset = PREPARED_DATASET_CACHE.get_or_create(cache_key, lambda: prepare_dataset(input_file_path, external_forecast_horizon, profiler))
+    print("Prepared dataset cache: " + str(PREPARED_DATASET_CACHE.stats()))
+
+    return prepared_dataset
+
+
+# Returns the GluonTS estimator of a forecasting method
+#
+# Parameters
+# method - name of the forecasting method
+# freq - GluonTS frequency of the dataset
+# lag - the number of past lags that should be used when predicting the next future value of time series
+# forecast_horizon - the number of future values predicted by the model
+# sampling - whether the feed-forward network forecasts through sample paths. If False, its quantiles are calculated from the predicted distributions without sampling
+def get_estimator(method, freq, lag, forecast_horizon, sampling = True):
     if (method == "feed_forward"):
         estimator = SimpleFeedForwardEstimator(freq=freq,
                                                context_length=lag,
-                                               prediction_length=forecast_horizon)
+                                               prediction_length=forecast_horizon,
+                                               sampling=sampling)
     elif(method == "deepar"):
         estimator = DeepAREstimator(freq=freq,
                                     context_length=lag,
@@ -134,31 +265,130 @@ def get_deep_nn_forecasts(dataset_name, lag, input_file_name, method, external_f
         estimator = TransformerEstimator(freq=freq,
                                      context_length=lag,
                                      prediction_length=forecast_horizon)
+    else:
+        raise Exception("Unknown forecasting method: " + method)
+
+    return estimator
+
+
+# GluonTS training data sampled from the training series on the fly by a WindowSampler
+# Every pass over the data yields a new set of random windows, each one long enough to contain the history and the forecast horizon used by the model
+# Only the windows of the current pass are created, so the training series are not held in memory as GluonTS data entries
+class SampledTrainingDataset:
+    # Parameters
+    # sampler - WindowSampler of the training series
+    # start_times - list containing the start timestamp of each training series
+    # freq - GluonTS frequency of the dataset
+    # num_windows - the number of windows yielded in a pass
+    def __init__(self, sampler, start_times, freq, num_windows):
+        self.sampler = sampler
+        self.start_times = start_times
+        self.freq = freq
+        self.num_windows = num_windows
+        self.process = ProcessDataEntry(freq)
+
+    def __iter__(self):
+        windows = self.sampler.sample_windows(self.num_windows)
+
+        for target, series_index, position in zip(windows, windows.attributes["series_index"], windows.attributes["position"]):
+            # A window starts position time steps after the start of its series
+            start_time = (pd.Period(self.start_times[series_index], freq=self.freq) + int(position)).to_timestamp()
+            yield self.process({FieldName.TARGET: target, FieldName.START: start_time})
+
+    def __len__(self):
+        return self.num_windows
+
+
+# Returns the number of values of a training window sampled for an estimator: the history used by the model and the forecast horizon
+#
+# Parameters
+# estimator - GluonTS estimator
+# lag - the number of past lags given to the estimator
+# forecast_horizon - the forecast horizon of the estimator
+def get_training_window_length(estimator, lag, forecast_horizon):
+    history_length = getattr(estimator, "history_length", None) or getattr(estimator, "context_length", None) or lag
+    return history_length + forecast_horizon
+
+
+# Parameters
+# dataset_name - the name of the dataset
+# lag - the number of past lags that should be used when predicting the next future value of time series
+# input_file_name - name of the .tsf file corresponding with the dataset
+# method - name of the forecasting method that you want to evaluate
+# external_forecast_horizon - the required forecast horizon, if it is not available in the .tsf file
+# integer_conversion - whether the forecasts should be rounded or not
+# sampled_training - whether the model is trained on windows sampled from the training series on the fly instead of the full training series, e.g. for datasets that do not fit in memory
+# series_weights - array containing a sampling weight per series, used with sampled_training. If None, all windows are equally likely
+# quantiles - list of quantile levels to be written into the fixed_horizon_quantiles folder in addition to the point forecasts, e.g. [0.1, 0.5, 0.9]. If None, only the medians are calculated
+# prediction_batch_size - the number of series predicted together. If None, the batch size of the model is used
+# sampling - whether the models that can forecast without sampling (the feed-forward network) should draw sample paths. If False, the quantiles are calculated from the predicted distributions
+# binary_results - whether the forecasts are written in the binary result format of utils/result_format.py instead of text. result_format.export_result_text converts them into text
+# cprofile - whether each stage is profiled with cProfile. The profiles are written into the fixed_horizon_profiles folder
+# trace_memory - whether the peak memory allocated by Python objects in each stage is traced with tracemalloc
+def get_deep_nn_forecasts(dataset_name, lag, input_file_name, method, external_forecast_horizon = None, integer_conversion = False, sampled_training = False, series_weights = None, quantiles = None, prediction_batch_size = None, sampling = True, binary_results = False, cprofile = False, trace_memory = False):
+    print("Started loading " + dataset_name)
+
+    file_name = get_experiment_name(dataset_name, lag, input_file_name, method)
+
+    # The wall time, CPU time and peak memory usage of each stage are written into the fixed_horizon_profiles folder as JSON lines
+    profiles_dir = BASE_DIR + "/results/fixed_horizon_profiles/"
+    profiler = StageProfiler(file_name, profiles_dir + file_name + ".jsonl", profiles_dir if cprofile else None, trace_memory)
+
+    train_series_list, test_series_list, train_ds, test_ds, freq, seasonality, forecast_horizon = get_prepared_dataset(input_file_name, external_forecast_horizon, profiler)
+
+    # The medians are the point forecasts, so they are always calculated
+    quantile_levels = sorted(set(quantiles if quantiles is not None else []) | {0.5})
+
+    # The execution time does not include loading and splitting the dataset, so it does not depend on whether the prepared dataset was cached
+    start_exec_time = datetime.now()
+
+    with profiler.stage("train"):
+        estimator = get_estimator(method, freq, lag, forecast_horizon, sampling)
+
+        if sampled_training:
+            sampler = WindowSampler(train_series_list, get_training_window_length(estimator, lag, forecast_horizon), series_weights, allow_short_series=True)
+            training_data = SampledTrainingDataset(sampler, get_start_times(train_series_list), freq, len(train_series_list))
+        else:
+            training_data = train_ds
 
-    predictor = estimator.train(training_data=train_ds)
+        predictor = estimator.train(training_data=training_data)
 
-    forecast_it, ts_it = make_evaluation_predictions(dataset=test_ds, predictor=predictor, num_samples=100)
+    with profiler.stage("predict"):
+        if prediction_batch_size is not None:
+            predictor.batch_size = prediction_batch_size
 
-    # Time series predictions
-    forecasts = list(forecast_it)
+        forecast_it, ts_it = make_evaluation_predictions(dataset=test_ds, predictor=predictor, num_samples=NUM_SAMPLES)
 
-    # Get median (0.5 quantile) of the 100 sample forecasts as final point forecasts
-    for f in forecasts:
-        final_forecasts.append(f.median)
+        # Time series predictions are consumed as they are produced
+        quantile_forecasts = get_forecast_quantiles(forecast_it, len(train_series_list), quantile_levels, forecast_horizon)
+
+    # Get median (0.5 quantile) of the forecasts as final point forecasts
+    final_forecasts = quantile_forecasts[:, quantile_levels.index(0.5)]
 
     if integer_conversion:
         final_forecasts = np.round(final_forecasts)
 
-    if not os.path.exists(BASE_DIR + "/results/fixed_horizon_forecasts/"):
-        os.makedirs(BASE_DIR + "/results/fixed_horizon_forecasts/")
+    with profiler.stage("write"):
+        if not os.path.exists(BASE_DIR + "/results/fixed_horizon_forecasts/"):
+            os.makedirs(BASE_DIR + "/results/fixed_horizon_forecasts/")
+
+        # write the forecasting results to a file
+        if binary_results:
+            result_format.write_result_matrix(BASE_DIR + "/results/fixed_horizon_forecasts/" + file_name + result_format.RESULT_FILE_EXTENSION,
+                                              final_forecasts,
+                                              {"dataset": dataset_name, "method": method, "lag": lag, "horizon": forecast_horizon})
+        else:
+            with open_atomically(BASE_DIR + "/results/fixed_horizon_forecasts/" + file_name + ".txt", "w") as output:
+                writer = csv.writer(output, lineterminator='\n')
+                writer.writerows(final_forecasts)
 
-    # write the forecasting results to a file
-    file_name = dataset_name + "_" + method + "_lag_" + str(lag)
-    forecast_file_path = BASE_DIR + "/results/fixed_horizon_forecasts/" + file_name + ".txt"
+        # write the quantile forecasts to a file containing the quantile levels and an array of shape (number of series, number of quantiles, horizon)
+        if quantiles is not None:
+            if not os.path.exists(BASE_DIR + "/results/fixed_horizon_quantiles/"):
+                os.makedirs(BASE_DIR + "/results/fixed_horizon_quantiles/")
 
-    with open(forecast_file_path, "w") as output:
-        writer = csv.writer(output, lineterminator='\n')
-        writer.writerows(final_forecasts)
+            with open_atomically(BASE_DIR + "/results/fixed_horizon_quantiles/" + file_name + ".npz", "wb") as output:
+                np.savez(output, quantile_levels=np.array(quantile_levels), quantile_forecasts=quantile_forecasts)
 
     finish_exec_time = datetime.now()
 
@@ -169,253 +399,405 @@ def get_deep_nn_forecasts(dataset_name, lag, input_file_name, method, external_f
     if not os.path.exists(BASE_DIR + "/results/fixed_horizon_execution_times/"):
         os.makedirs(BASE_DIR + "/results/fixed_horizon_execution_times/")
 
-    with open(BASE_DIR + "/results/fixed_horizon_execution_times/" + file_name + ".txt", "w") as output_time:
-        output_time.write(str(exec_time))
+    with open_atomically(BASE_DIR + "/results/fixed_horizon_execution_times/" + file_name + ".txt", "w") as output_time:
+        output_time.write(format_execution_time(exec_time) + "\n")
 
-    # Write training dataset and the actual results into separate files, which are then used for error calculations
+    # Calculate the errors directly on the training set, test set and forecasts
     # We do not use the built-in evaluation method in GluonTS as some of the error measures we use are not implemented in that
-    temp_dataset_path =  BASE_DIR + "/results/fixed_horizon_forecasts/" + dataset_name + "_dataset.txt"
-    temp_results_path = BASE_DIR + "/results/fixed_horizon_forecasts/" + dataset_name + "_results.txt"
+    with profiler.stage("evaluate"):
+        if not os.path.exists(BASE_DIR + "/results/fixed_horizon_errors/"):
+            os.makedirs(BASE_DIR + "/results/fixed_horizon_errors/")
+
+        # The forecasts are converted through their text representation written to the forecast file, so the errors are the same as the errors calculated from that file
+        forecasts_matrix = np.asarray(final_forecasts).astype(str).astype(np.float64)
+
+        error_calculator.calculate_errors(forecasts_matrix, test_series_list, train_series_list, seasonality, BASE_DIR + "/results/fixed_horizon_errors/" + file_name)
+
+    profiler.write()
+
+
+# Performs the rolling origin evaluation of a global model
+# Unlike do_rolling_origin_forecating in experiments/rolling_origin.R, which refits a local model at every origin, the model is trained once on the training sections of all series
+# Then, for each origin, the model predicts the next step values from the series values up to the origin, and the origin moves forward by step until the end of the series
+# The windows of all origins and series are predicted together in chunks of ROLLING_ORIGIN_CHUNK_SIZE windows, so the number of prediction calls does not grow with the number of origins
+# The forecasts, errors and execution times are written into the rolling_origin_forecasts, rolling_origin_errors and rolling_origin_execution_times folders in the same layout as experiments/rolling_origin.R
+#
+# Parameters
+# dataset_name - the name of the dataset
+# lag - the number of past lags that should be used when predicting the next future value of time series
+# input_file_name - name of the .tsf file corresponding with the dataset
+# method - name of the forecasting method that you want to evaluate
+# external_forecast_horizon - not used. It is accepted so that the experiments of get_deep_nn_forecasts can be run with this function
+# integer_conversion - whether the forecasts should be rounded or not
+# step - the number of forecasts provided at each origin
+# binary_results - whether the forecasts are written in the binary result format of utils/result_format.py instead of text, with the series names in the header
+# cprofile - whether each stage is profiled with cProfile. The profiles are written into the rolling_origin_profiles folder
+# trace_memory - whether the peak memory allocated by Python objects in each stage is traced with tracemalloc
+def get_deep_nn_rolling_origin_forecasts(dataset_name, lag, input_file_name, method, external_forecast_horizon = None, integer_conversion = False, step = ROLLING_ORIGIN_FORECAST_HORIZON, binary_results = False, cprofile = False, trace_memory = False):
+    print("Started loading " + dataset_name)
 
-    with open(temp_dataset_path, "w") as output_dataset:
-        writer = csv.writer(output_dataset, lineterminator='\n')
-        writer.writerows(train_series_list)
+    file_name = get_experiment_name(dataset_name, lag, input_file_name, method)
 
-    with open(temp_results_path, "w") as output_results:
-        writer = csv.writer(output_results, lineterminator='\n')
-        writer.writerows(test_series_list)
+    # The wall time, CPU time and peak memory usage of each stage are written into the rolling_origin_profiles folder as JSON lines
+    profiles_dir = BASE_DIR + "/results/rolling_origin_profiles/"
+    profiler = StageProfiler(file_name, profiles_dir + file_name + ".jsonl", profiles_dir if cprofile else None, trace_memory)
 
-    if not os.path.exists(BASE_DIR + "/results/fixed_horizon_errors/"):
-        os.makedirs(BASE_DIR + "/results/fixed_horizon_errors/")
+    with profiler.stage("load"):
+        series, frequency, forecast_horizon, contain_missing_values, contain_equal_length = ragged_series.convert_tsf_to_ragged_series(BASE_DIR + "/tsf_data/" + input_file_name)
 
-    subprocess.call(["Rscript", "--vanilla", BASE_DIR + "/utils/error_calc_helper.R", BASE_DIR, forecast_file_path, temp_results_path, temp_dataset_path, str(seasonality), file_name ])
+    freq, seasonality = get_frequency_and_seasonality(frequency)
 
-    # Remove intermediate files
-    os.system("rm " + temp_dataset_path)
-    os.system("rm " + temp_results_path)
+    with profiler.stage("split"):
+        lengths = series.lengths
+        train_lengths = get_rolling_origin_train_lengths(lengths)
+        test_lengths = lengths - train_lengths
 
+        train_series = series.window(None, train_lengths)
+        test_series = series.window(train_lengths, None)
 
-# Experiments
+        # Each window contains the values of a series up to an origin. The windows of all series and origins are created together
+        num_origins = -(-test_lengths // step)
+        window_series_indices = np.repeat(np.arange(len(series)), num_origins)
+        window_origin_indices = np.arange(len(window_series_indices)) - np.repeat(np.cumsum(num_origins) - num_origins, num_origins)
+        window_starts = series.starts[window_series_indices]
+        windows = ragged_series.RaggedSeries(series.values, window_starts, window_starts + train_lengths[window_series_indices] + window_origin_indices * step)
 
-# Feed-Forward Neural Network
-get_deep_nn_forecasts("cif_2016_6", 15, "cif_6_dataset.tsf", "feed_forward", 6)
-get_deep_nn_forecasts("cif_2016_12", 15, "cif_12_dataset.tsf", "feed_forward", 12)
-get_deep_nn_forecasts("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "feed_forward")
-get_deep_nn_forecasts("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m1_yearly", 2, "m1_yearly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m1_monthly", 15, "m1_monthly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m3_yearly", 2, "m3_yearly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m3_monthly", 15, "m3_monthly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m3_other", 2, "m3_other_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m4_monthly", 15, "m4_monthly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m4_weekly", 65, "m4_weekly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m4_daily", 9, "m4_daily_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("m4_hourly", 210, "m4_hourly_dataset.tsf", "feed_forward")
-get_deep_nn_forecasts("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "feed_forward", 12, True)
-get_deep_nn_forecasts("hospital", 15, "hospital_dataset.tsf", "feed_forward", 12, True)
-get_deep_nn_forecasts("fred_md", 15, "fred_md_dataset.tsf", "feed_forward", 12)
-get_deep_nn_forecasts("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "feed_forward", 8)
-get_deep_nn_forecasts("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "feed_forward", 8)
-get_deep_nn_forecasts("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "feed_forward", 8, True)
-get_deep_nn_forecasts("solar_weekly", 6, "solar_weekly_dataset.tsf", "feed_forward", 5)
-get_deep_nn_forecasts("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "feed_forward", 8, True)
-get_deep_nn_forecasts("dominick", 10, "dominick_dataset.tsf", "feed_forward", 8)
-get_deep_nn_forecasts("us_births", 9, "us_births_dataset.tsf", "feed_forward", 30, True)
-get_deep_nn_forecasts("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "feed_forward", 30)
-get_deep_nn_forecasts("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "feed_forward", 30, True)
-get_deep_nn_forecasts("covid_deaths", 9, "covid_deaths_dataset.tsf", "feed_forward", 30, True)
-get_deep_nn_forecasts("weather", 9, "weather_dataset.tsf", "feed_forward", 30)
-get_deep_nn_forecasts("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "feed_forward", 168)
-get_deep_nn_forecasts("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "feed_forward", 168, True)
-get_deep_nn_forecasts("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "feed_forward", 1008)
-get_deep_nn_forecasts("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "feed_forward", 168)
-get_deep_nn_forecasts("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "feed_forward", 24, True)
-get_deep_nn_forecasts("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "feed_forward", 30)
-get_deep_nn_forecasts("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "feed_forward", 30, True)
-get_deep_nn_forecasts("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "feed_forward", 336)
-get_deep_nn_forecasts("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "feed_forward", 168)
-get_deep_nn_forecasts("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "feed_forward", 30)
-
-
-# Transformer
-get_deep_nn_forecasts("cif_2016_6", 15, "cif_6_dataset.tsf", "transformer", 6)
-get_deep_nn_forecasts("cif_2016_12", 15, "cif_12_dataset.tsf", "transformer", 12)
-get_deep_nn_forecasts("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "transformer")
-get_deep_nn_forecasts("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m1_yearly", 2, "m1_yearly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m1_monthly", 15, "m1_monthly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m3_yearly", 2, "m3_yearly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m3_monthly", 15, "m3_monthly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m3_other", 2, "m3_other_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m4_monthly", 15, "m4_monthly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m4_weekly", 65, "m4_weekly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m4_daily", 9, "m4_daily_dataset.tsf", "transformer")
-get_deep_nn_forecasts("m4_hourly", 210, "m4_hourly_dataset.tsf", "transformer")
-get_deep_nn_forecasts("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "transformer", 12, True)
-get_deep_nn_forecasts("hospital", 15, "hospital_dataset.tsf", "transformer", 12, True)
-get_deep_nn_forecasts("fred_md", 15, "fred_md_dataset.tsf", "transformer", 12)
-get_deep_nn_forecasts("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "transformer", 8)
-get_deep_nn_forecasts("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "transformer", 8)
-get_deep_nn_forecasts("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "transformer", 8, True)
-get_deep_nn_forecasts("solar_weekly", 6, "solar_weekly_dataset.tsf", "transformer", 5)
-get_deep_nn_forecasts("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "transformer", 8, True)
-get_deep_nn_forecasts("dominick", 10, "dominick_dataset.tsf", "transformer", 8)
-get_deep_nn_forecasts("us_births", 9, "us_births_dataset.tsf", "transformer", 30, True)
-get_deep_nn_forecasts("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "transformer", 30)
-get_deep_nn_forecasts("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "transformer", 30, True)
-get_deep_nn_forecasts("covid_deaths", 9, "covid_deaths_dataset.tsf", "transformer", 30, True)
-get_deep_nn_forecasts("weather", 9, "weather_dataset.tsf", "transformer", 30)
-get_deep_nn_forecasts("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "transformer", 168)
-get_deep_nn_forecasts("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "transformer", 168, True)
-get_deep_nn_forecasts("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "transformer", 1008)
-get_deep_nn_forecasts("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "transformer", 168)
-get_deep_nn_forecasts("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "transformer", 24, True)
-get_deep_nn_forecasts("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "transformer", 30)
-get_deep_nn_forecasts("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "transformer", 30, True)
-get_deep_nn_forecasts("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "transformer", 336)
-get_deep_nn_forecasts("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "transformer", 168)
-get_deep_nn_forecasts("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "transformer", 30)
-
-
-# DeepAR
-get_deep_nn_forecasts("cif_2016_6", 15, "cif_6_dataset.tsf", "deepar", 6)
-get_deep_nn_forecasts("cif_2016_12", 15, "cif_12_dataset.tsf", "deepar", 12)
-get_deep_nn_forecasts("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "deepar")
-get_deep_nn_forecasts("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m1_yearly", 2, "m1_yearly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m1_monthly", 15, "m1_monthly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m3_yearly", 2, "m3_yearly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m3_monthly", 15, "m3_monthly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m3_other", 2, "m3_other_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m4_monthly", 15, "m4_monthly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m4_weekly", 65, "m4_weekly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m4_daily", 9, "m4_daily_dataset.tsf", "deepar")
-get_deep_nn_forecasts("m4_hourly", 210, "m4_hourly_dataset.tsf", "deepar")
-get_deep_nn_forecasts("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "deepar", 12, True)
-get_deep_nn_forecasts("hospital", 15, "hospital_dataset.tsf", "deepar", 12, True)
-get_deep_nn_forecasts("fred_md", 15, "fred_md_dataset.tsf", "deepar", 12)
-get_deep_nn_forecasts("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "deepar", 8)
-get_deep_nn_forecasts("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "deepar", 8)
-get_deep_nn_forecasts("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "deepar", 8, True)
-get_deep_nn_forecasts("solar_weekly", 6, "solar_weekly_dataset.tsf", "deepar", 5)
-get_deep_nn_forecasts("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "deepar", 8, True)
-get_deep_nn_forecasts("dominick", 10, "dominick_dataset.tsf", "deepar", 8)
-get_deep_nn_forecasts("us_births", 9, "us_births_dataset.tsf", "deepar", 30, True)
-get_deep_nn_forecasts("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "deepar", 30)
-get_deep_nn_forecasts("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "deepar", 30, True)
-get_deep_nn_forecasts("covid_deaths", 9, "covid_deaths_dataset.tsf", "deepar", 30, True)
-get_deep_nn_forecasts("weather", 9, "weather_dataset.tsf", "deepar", 30)
-get_deep_nn_forecasts("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "deepar", 168)
-get_deep_nn_forecasts("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "deepar", 168, True)
-get_deep_nn_forecasts("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "deepar", 1008)
-get_deep_nn_forecasts("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "deepar", 168)
-get_deep_nn_forecasts("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "deepar", 24, True)
-get_deep_nn_forecasts("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "deepar", 30)
-get_deep_nn_forecasts("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "deepar", 30, True)
-get_deep_nn_forecasts("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "deepar", 336)
-get_deep_nn_forecasts("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "deepar", 168)
-get_deep_nn_forecasts("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "deepar", 30)
-
-
-# N-BEATS
-get_deep_nn_forecasts("cif_2016_6", 15, "cif_6_dataset.tsf", "nbeats", 6)
-get_deep_nn_forecasts("cif_2016_12", 15, "cif_12_dataset.tsf", "nbeats", 12)
-get_deep_nn_forecasts("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "nbeats")
-get_deep_nn_forecasts("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m1_yearly", 2, "m1_yearly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m1_monthly", 15, "m1_monthly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m3_yearly", 2, "m3_yearly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m3_monthly", 15, "m3_monthly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m3_other", 2, "m3_other_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m4_monthly", 15, "m4_monthly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m4_weekly", 65, "m4_weekly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m4_daily", 9, "m4_daily_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("m4_hourly", 210, "m4_hourly_dataset.tsf", "nbeats")
-get_deep_nn_forecasts("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "nbeats", 12, True)
-get_deep_nn_forecasts("hospital", 15, "hospital_dataset.tsf", "nbeats", 12, True)
-get_deep_nn_forecasts("fred_md", 15, "fred_md_dataset.tsf", "nbeats", 12)
-get_deep_nn_forecasts("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "nbeats", 8)
-get_deep_nn_forecasts("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "nbeats", 8)
-get_deep_nn_forecasts("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "nbeats", 8, True)
-get_deep_nn_forecasts("solar_weekly", 6, "solar_weekly_dataset.tsf", "nbeats", 5)
-get_deep_nn_forecasts("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "nbeats", 8, True)
-get_deep_nn_forecasts("dominick", 10, "dominick_dataset.tsf", "nbeats", 8)
-get_deep_nn_forecasts("us_births", 9, "us_births_dataset.tsf", "nbeats", 30, True)
-get_deep_nn_forecasts("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "nbeats", 30)
-get_deep_nn_forecasts("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "nbeats", 30, True)
-get_deep_nn_forecasts("covid_deaths", 9, "covid_deaths_dataset.tsf", "nbeats", 30, True)
-get_deep_nn_forecasts("weather", 9, "weather_dataset.tsf", "nbeats", 30)
-get_deep_nn_forecasts("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "nbeats", 168)
-get_deep_nn_forecasts("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "nbeats", 168, True)
-get_deep_nn_forecasts("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "nbeats", 1008)
-get_deep_nn_forecasts("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "nbeats", 168)
-get_deep_nn_forecasts("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "nbeats", 24, True)
-get_deep_nn_forecasts("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "nbeats", 30)
-get_deep_nn_forecasts("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "nbeats", 30, True)
-get_deep_nn_forecasts("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "nbeats", 336)
-get_deep_nn_forecasts("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "nbeats", 168)
-get_deep_nn_forecasts("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "nbeats", 30)
-
-
-# WaveNet
-get_deep_nn_forecasts("cif_2016_6", 15, "cif_6_dataset.tsf", "wavenet", 6)
-get_deep_nn_forecasts("cif_2016_12", 15, "cif_12_dataset.tsf", "wavenet", 12)
-get_deep_nn_forecasts("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "wavenet")
-get_deep_nn_forecasts("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m1_yearly", 2, "m1_yearly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m1_monthly", 15, "m1_monthly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m3_yearly", 2, "m3_yearly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m3_monthly", 15, "m3_monthly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m3_other", 2, "m3_other_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m4_monthly", 15, "m4_monthly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m4_weekly", 65, "m4_weekly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m4_daily", 9, "m4_daily_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("m4_hourly", 210, "m4_hourly_dataset.tsf", "wavenet")
-get_deep_nn_forecasts("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "wavenet", 12, True)
-get_deep_nn_forecasts("hospital", 15, "hospital_dataset.tsf", "wavenet", 12, True)
-get_deep_nn_forecasts("fred_md", 15, "fred_md_dataset.tsf", "wavenet", 12)
-get_deep_nn_forecasts("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "wavenet", 8)
-get_deep_nn_forecasts("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "wavenet", 8)
-get_deep_nn_forecasts("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "wavenet", 8, True)
-get_deep_nn_forecasts("solar_weekly", 6, "solar_weekly_dataset.tsf", "wavenet", 5)
-get_deep_nn_forecasts("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "wavenet", 8, True)
-get_deep_nn_forecasts("dominick", 10, "dominick_dataset.tsf", "wavenet", 8)
-get_deep_nn_forecasts("us_births", 9, "us_births_dataset.tsf", "wavenet", 30, True)
-get_deep_nn_forecasts("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "wavenet", 30)
-get_deep_nn_forecasts("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "wavenet", 30, True)
-get_deep_nn_forecasts("covid_deaths", 9, "covid_deaths_dataset.tsf", "wavenet", 30, True)
-get_deep_nn_forecasts("weather", 9, "weather_dataset.tsf", "wavenet", 30)
-get_deep_nn_forecasts("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "wavenet", 168)
-get_deep_nn_forecasts("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "wavenet", 168, True)
-get_deep_nn_forecasts("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "wavenet", 168)
-get_deep_nn_forecasts("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "wavenet", 24, True)
-get_deep_nn_forecasts("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "wavenet", 30)
-get_deep_nn_forecasts("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "wavenet", 30, True)
-get_deep_nn_forecasts("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "wavenet", 336)
-get_deep_nn_forecasts("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "wavenet", 168)
-get_deep_nn_forecasts("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "wavenet", 30)
\ No newline at end of file
+    with profiler.stage("dataset"):
+        start_times = get_start_times(series)
+        train_ds = ListDataset([{FieldName.TARGET: target, FieldName.START: start_time} for target, start_time in zip(train_series, start_times)], freq=freq)
+
+    start_exec_time = datetime.now()
+
+    with profiler.stage("train"):
+        estimator = get_estimator(method, freq, lag, step)
+        predictor = estimator.train(training_data=train_ds)
+
+    print("started Rolling Origin")
+
+    with profiler.stage("predict", num_windows=len(windows)):
+        # Get median (0.5 quantile) of the 100 sample forecasts as final point forecasts
+        window_forecasts = np.empty((len(windows), step), dtype=np.float32)
+
+        for chunk_start in range(0, len(windows), ROLLING_ORIGIN_CHUNK_SIZE):
+            chunk = np.arange(chunk_start, min(chunk_start + ROLLING_ORIGIN_CHUNK_SIZE, len(windows)))
+            chunk_ds = ListDataset([{FieldName.TARGET: target, FieldName.START: start_times[s]} for target, s in zip(windows.take(chunk), window_series_indices[chunk])], freq=freq)
+
+            window_forecasts[chunk] = get_forecast_quantiles(predictor.predict(chunk_ds, num_samples=NUM_SAMPLES), len(chunk), [0.5], step)[:, 0]
+
+        # The forecasts of the last origin of a series may go beyond its end, so they are cut at the end of the series
+        forecast_columns = window_origin_indices[:, None] * step + np.arange(step)
+        inside = forecast_columns < test_lengths[window_series_indices][:, None]
+
+        forecasts_matrix = np.full((len(series), int(test_lengths.max()) if len(series) > 0 else 0), np.nan, dtype=np.float32)
+        forecasts_matrix[np.broadcast_to(window_series_indices[:, None], inside.shape)[inside], forecast_columns[inside]] = window_forecasts[inside]
+
+    if integer_conversion:
+        forecasts_matrix = np.round(forecasts_matrix)
+
+    print("Finished rolling origin")
+
+    with profiler.stage("write"):
+        if not os.path.exists(BASE_DIR + "/results/rolling_origin_forecasts/"):
+            os.makedirs(BASE_DIR + "/results/rolling_origin_forecasts/")
+
+        # write the forecasting results to a file, one line per series starting with the series name
+        forecast_texts = forecasts_matrix.astype(str)
+
+        if "series_name" in series.attributes:
+            series_names = series.attributes["series_name"]
+        else:
+            series_names = np.arange(1, len(series) + 1)
+
+        if binary_results:
+            result_format.write_result_matrix(BASE_DIR + "/results/rolling_origin_forecasts/" + file_name + result_format.RESULT_FILE_EXTENSION,
+                                              forecasts_matrix,
+                                              {"dataset": dataset_name, "method": method, "lag": lag, "horizon": step, "row_names": [str(name) for name in series_names]},
+                                              lengths=test_lengths)
+        else:
+            with open_atomically(BASE_DIR + "/results/rolling_origin_forecasts/" + file_name + ".txt", "w") as output:
+                writer = csv.writer(output, lineterminator='\n')
+                for s in range(len(series)):
+                    writer.writerow([series_names[s]] + forecast_texts[s, :test_lengths[s]].tolist())
+
+    finish_exec_time = datetime.now()
+
+    # Execution time
+    exec_time = finish_exec_time - start_exec_time
+    print(exec_time)
+
+    if not os.path.exists(BASE_DIR + "/results/rolling_origin_execution_times/"):
+        os.makedirs(BASE_DIR + "/results/rolling_origin_execution_times/")
+
+    with open_atomically(BASE_DIR + "/results/rolling_origin_execution_times/" + file_name + ".txt", "w") as output_time:
+        output_time.write(format_execution_time(exec_time) + "\n")
+
+    # Error calculations. The test series shorter than the longest test series are padded with NaN as in experiments/rolling_origin.R
+    with profiler.stage("evaluate"):
+        if not os.path.exists(BASE_DIR + "/results/rolling_origin_errors/"):
+            os.makedirs(BASE_DIR + "/results/rolling_origin_errors/")
+
+        error_calculator.calculate_errors(forecast_texts.astype(np.float64), test_series.to_matrix(np.nan), train_series, seasonality, BASE_DIR + "/results/rolling_origin_errors/" + file_name)
+
+    profiler.write()
+
+# Experiments
+# Each experiment is given by the arguments of get_deep_nn_forecasts
+DEEP_LEARNING_EXPERIMENTS = [
+    # Feed-Forward Neural Network
+    ("cif_2016_6", 15, "cif_6_dataset.tsf", "feed_forward", 6),
+    ("cif_2016_12", 15, "cif_12_dataset.tsf", "feed_forward", 12),
+    ("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "feed_forward"),
+    ("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "feed_forward"),
+    ("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "feed_forward"),
+    ("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "feed_forward"),
+    ("m1_yearly", 2, "m1_yearly_dataset.tsf", "feed_forward"),
+    ("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "feed_forward"),
+    ("m1_monthly", 15, "m1_monthly_dataset.tsf", "feed_forward"),
+    ("m3_yearly", 2, "m3_yearly_dataset.tsf", "feed_forward"),
+    ("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "feed_forward"),
+    ("m3_monthly", 15, "m3_monthly_dataset.tsf", "feed_forward"),
+    ("m3_other", 2, "m3_other_dataset.tsf", "feed_forward"),
+    ("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "feed_forward"),
+    ("m4_monthly", 15, "m4_monthly_dataset.tsf", "feed_forward"),
+    ("m4_weekly", 65, "m4_weekly_dataset.tsf", "feed_forward"),
+    ("m4_daily", 9, "m4_daily_dataset.tsf", "feed_forward"),
+    ("m4_hourly", 210, "m4_hourly_dataset.tsf", "feed_forward"),
+    ("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "feed_forward", 12, True),
+    ("hospital", 15, "hospital_dataset.tsf", "feed_forward", 12, True),
+    ("fred_md", 15, "fred_md_dataset.tsf", "feed_forward", 12),
+    ("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "feed_forward", 8),
+    ("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "feed_forward", 8),
+    ("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "feed_forward", 8, True),
+    ("solar_weekly", 6, "solar_weekly_dataset.tsf", "feed_forward", 5),
+    ("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "feed_forward", 8, True),
+    ("dominick", 10, "dominick_dataset.tsf", "feed_forward", 8),
+    ("us_births", 9, "us_births_dataset.tsf", "feed_forward", 30, True),
+    ("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "feed_forward", 30),
+    ("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "feed_forward", 30, True),
+    ("covid_deaths", 9, "covid_deaths_dataset.tsf", "feed_forward", 30, True),
+    ("weather", 9, "weather_dataset.tsf", "feed_forward", 30),
+    ("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "feed_forward", 168),
+    ("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "feed_forward", 168, True),
+    ("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "feed_forward", 1008),
+    ("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "feed_forward", 168),
+    ("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "feed_forward", 24, True),
+    ("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "feed_forward", 30),
+    ("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "feed_forward", 30, True),
+    ("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "feed_forward", 336),
+    ("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "feed_forward", 168),
+    ("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "feed_forward", 30),
+
+
+    # Transformer
+    ("cif_2016_6", 15, "cif_6_dataset.tsf", "transformer", 6),
+    ("cif_2016_12", 15, "cif_12_dataset.tsf", "transformer", 12),
+    ("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "transformer"),
+    ("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "transformer"),
+    ("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "transformer"),
+    ("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "transformer"),
+    ("m1_yearly", 2, "m1_yearly_dataset.tsf", "transformer"),
+    ("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "transformer"),
+    ("m1_monthly", 15, "m1_monthly_dataset.tsf", "transformer"),
+    ("m3_yearly", 2, "m3_yearly_dataset.tsf", "transformer"),
+    ("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "transformer"),
+    ("m3_monthly", 15, "m3_monthly_dataset.tsf", "transformer"),
+    ("m3_other", 2, "m3_other_dataset.tsf", "transformer"),
+    ("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "transformer"),
+    ("m4_monthly", 15, "m4_monthly_dataset.tsf", "transformer"),
+    ("m4_weekly", 65, "m4_weekly_dataset.tsf", "transformer"),
+    ("m4_daily", 9, "m4_daily_dataset.tsf", "transformer"),
+    ("m4_hourly", 210, "m4_hourly_dataset.tsf", "transformer"),
+    ("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "transformer", 12, True),
+    ("hospital", 15, "hospital_dataset.tsf", "transformer", 12, True),
+    ("fred_md", 15, "fred_md_dataset.tsf", "transformer", 12),
+    ("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "transformer", 8),
+    ("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "transformer", 8),
+    ("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "transformer", 8, True),
+    ("solar_weekly", 6, "solar_weekly_dataset.tsf", "transformer", 5),
+    ("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "transformer", 8, True),
+    ("dominick", 10, "dominick_dataset.tsf", "transformer", 8),
+    ("us_births", 9, "us_births_dataset.tsf", "transformer", 30, True),
+    ("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "transformer", 30),
+    ("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "transformer", 30, True),
+    ("covid_deaths", 9, "covid_deaths_dataset.tsf", "transformer", 30, True),
+    ("weather", 9, "weather_dataset.tsf", "transformer", 30),
+    ("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "transformer", 168),
+    ("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "transformer", 168, True),
+    ("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "transformer", 1008),
+    ("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "transformer", 168),
+    ("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "transformer", 24, True),
+    ("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "transformer", 30),
+    ("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "transformer", 30, True),
+    ("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "transformer", 336),
+    ("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "transformer", 168),
+    ("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "transformer", 30),
+
+
+    # DeepAR
+    ("cif_2016_6", 15, "cif_6_dataset.tsf", "deepar", 6),
+    ("cif_2016_12", 15, "cif_12_dataset.tsf", "deepar", 12),
+    ("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "deepar"),
+    ("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "deepar"),
+    ("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "deepar"),
+    ("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "deepar"),
+    ("m1_yearly", 2, "m1_yearly_dataset.tsf", "deepar"),
+    ("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "deepar"),
+    ("m1_monthly", 15, "m1_monthly_dataset.tsf", "deepar"),
+    ("m3_yearly", 2, "m3_yearly_dataset.tsf", "deepar"),
+    ("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "deepar"),
+    ("m3_monthly", 15, "m3_monthly_dataset.tsf", "deepar"),
+    ("m3_other", 2, "m3_other_dataset.tsf", "deepar"),
+    ("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "deepar"),
+    ("m4_monthly", 15, "m4_monthly_dataset.tsf", "deepar"),
+    ("m4_weekly", 65, "m4_weekly_dataset.tsf", "deepar"),
+    ("m4_daily", 9, "m4_daily_dataset.tsf", "deepar"),
+    ("m4_hourly", 210, "m4_hourly_dataset.tsf", "deepar"),
+    ("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "deepar", 12, True),
+    ("hospital", 15, "hospital_dataset.tsf", "deepar", 12, True),
+    ("fred_md", 15, "fred_md_dataset.tsf", "deepar", 12),
+    ("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "deepar", 8),
+    ("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "deepar", 8),
+    ("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "deepar", 8, True),
+    ("solar_weekly", 6, "solar_weekly_dataset.tsf", "deepar", 5),
+    ("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "deepar", 8, True),
+    ("dominick", 10, "dominick_dataset.tsf", "deepar", 8),
+    ("us_births", 9, "us_births_dataset.tsf", "deepar", 30, True),
+    ("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "deepar", 30),
+    ("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "deepar", 30, True),
+    ("covid_deaths", 9, "covid_deaths_dataset.tsf", "deepar", 30, True),
+    ("weather", 9, "weather_dataset.tsf", "deepar", 30),
+    ("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "deepar", 168),
+    ("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "deepar", 168, True),
+    ("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "deepar", 1008),
+    ("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "deepar", 168),
+    ("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "deepar", 24, True),
+    ("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "deepar", 30),
+    ("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "deepar", 30, True),
+    ("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "deepar", 336),
+    ("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "deepar", 168),
+    ("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "deepar", 30),
+
+
+    # N-BEATS
+    ("cif_2016_6", 15, "cif_6_dataset.tsf", "nbeats", 6),
+    ("cif_2016_12", 15, "cif_12_dataset.tsf", "nbeats", 12),
+    ("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "nbeats"),
+    ("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "nbeats"),
+    ("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "nbeats"),
+    ("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "nbeats"),
+    ("m1_yearly", 2, "m1_yearly_dataset.tsf", "nbeats"),
+    ("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "nbeats"),
+    ("m1_monthly", 15, "m1_monthly_dataset.tsf", "nbeats"),
+    ("m3_yearly", 2, "m3_yearly_dataset.tsf", "nbeats"),
+    ("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "nbeats"),
+    ("m3_monthly", 15, "m3_monthly_dataset.tsf", "nbeats"),
+    ("m3_other", 2, "m3_other_dataset.tsf", "nbeats"),
+    ("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "nbeats"),
+    ("m4_monthly", 15, "m4_monthly_dataset.tsf", "nbeats"),
+    ("m4_weekly", 65, "m4_weekly_dataset.tsf", "nbeats"),
+    ("m4_daily", 9, "m4_daily_dataset.tsf", "nbeats"),
+    ("m4_hourly", 210, "m4_hourly_dataset.tsf", "nbeats"),
+    ("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "nbeats", 12, True),
+    ("hospital", 15, "hospital_dataset.tsf", "nbeats", 12, True),
+    ("fred_md", 15, "fred_md_dataset.tsf", "nbeats", 12),
+    ("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "nbeats", 8),
+    ("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "nbeats", 8),
+    ("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "nbeats", 8, True),
+    ("solar_weekly", 6, "solar_weekly_dataset.tsf", "nbeats", 5),
+    ("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "nbeats", 8, True),
+    ("dominick", 10, "dominick_dataset.tsf", "nbeats", 8),
+    ("us_births", 9, "us_births_dataset.tsf", "nbeats", 30, True),
+    ("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "nbeats", 30),
+    ("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "nbeats", 30, True),
+    ("covid_deaths", 9, "covid_deaths_dataset.tsf", "nbeats", 30, True),
+    ("weather", 9, "weather_dataset.tsf", "nbeats", 30),
+    ("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "nbeats", 168),
+    ("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "nbeats", 168, True),
+    ("solar_10_minutes", 50, "solar_10_minutes_dataset.tsf", "nbeats", 1008),
+    ("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "nbeats", 168),
+    ("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "nbeats", 24, True),
+    ("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "nbeats", 30),
+    ("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "nbeats", 30, True),
+    ("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "nbeats", 336),
+    ("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "nbeats", 168),
+    ("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "nbeats", 30),
+
+
+    # WaveNet
+    ("cif_2016_6", 15, "cif_6_dataset.tsf", "wavenet", 6),
+    ("cif_2016_12", 15, "cif_12_dataset.tsf", "wavenet", 12),
+    ("nn5_daily", 9, "nn5_daily_dataset_without_missing_values.tsf", "wavenet"),
+    ("tourism_yearly", 2, "tourism_yearly_dataset.tsf", "wavenet"),
+    ("tourism_quarterly", 5, "tourism_quarterly_dataset.tsf", "wavenet"),
+    ("tourism_monthly", 15, "tourism_monthly_dataset.tsf", "wavenet"),
+    ("m1_yearly", 2, "m1_yearly_dataset.tsf", "wavenet"),
+    ("m1_quarterly", 5, "m1_quarterly_dataset.tsf", "wavenet"),
+    ("m1_monthly", 15, "m1_monthly_dataset.tsf", "wavenet"),
+    ("m3_yearly", 2, "m3_yearly_dataset.tsf", "wavenet"),
+    ("m3_quarterly", 5, "m3_quarterly_dataset.tsf", "wavenet"),
+    ("m3_monthly", 15, "m3_monthly_dataset.tsf", "wavenet"),
+    ("m3_other", 2, "m3_other_dataset.tsf", "wavenet"),
+    ("m4_quarterly", 5, "m4_quarterly_dataset.tsf", "wavenet"),
+    ("m4_monthly", 15, "m4_monthly_dataset.tsf", "wavenet"),
+    ("m4_weekly", 65, "m4_weekly_dataset.tsf", "wavenet"),
+    ("m4_daily", 9, "m4_daily_dataset.tsf", "wavenet"),
+    ("m4_hourly", 210, "m4_hourly_dataset.tsf", "wavenet"),
+    ("car_parts", 15, "car_parts_dataset_without_missing_values.tsf", "wavenet", 12, True),
+    ("hospital", 15, "hospital_dataset.tsf", "wavenet", 12, True),
+    ("fred_md", 15, "fred_md_dataset.tsf", "wavenet", 12),
+    ("nn5_weekly", 65, "nn5_weekly_dataset.tsf", "wavenet", 8),
+    ("traffic_weekly", 65, "traffic_weekly_dataset.tsf", "wavenet", 8),
+    ("electricity_weekly", 65, "electricity_weekly_dataset.tsf", "wavenet", 8, True),
+    ("solar_weekly", 6, "solar_weekly_dataset.tsf", "wavenet", 5),
+    ("kaggle_web_traffic_weekly", 10, "kaggle_web_traffic_weekly_dataset.tsf", "wavenet", 8, True),
+    ("dominick", 10, "dominick_dataset.tsf", "wavenet", 8),
+    ("us_births", 9, "us_births_dataset.tsf", "wavenet", 30, True),
+    ("saugeen_river_flow", 9, "saugeenday_dataset.tsf", "wavenet", 30),
+    ("sunspot", 9, "sunspot_dataset_without_missing_values.tsf", "wavenet", 30, True),
+    ("covid_deaths", 9, "covid_deaths_dataset.tsf", "wavenet", 30, True),
+    ("weather", 9, "weather_dataset.tsf", "wavenet", 30),
+    ("traffic_hourly", 30, "traffic_hourly_dataset.tsf", "wavenet", 168),
+    ("electricity_hourly", 30, "electricity_hourly_dataset.tsf", "wavenet", 168, True),
+    ("kdd_cup", 210, "kdd_cup_2018_dataset_without_missing_values.tsf", "wavenet", 168),
+    ("melbourne_pedestrian_counts", 210, "pedestrian_counts_dataset.tsf", "wavenet", 24, True),
+    ("bitcoin", 9, "bitcoin_dataset_without_missing_values.tsf", "wavenet", 30),
+    ("vehicle_trips", 9, "vehicle_trips_dataset_without_missing_values.tsf", "wavenet", 30, True),
+    ("aus_elecdemand", 420, "australian_electricity_demand_dataset.tsf", "wavenet", 336),
+    ("rideshare", 210, "rideshare_dataset_without_missing_values.tsf", "wavenet", 168),
+    ("temperature_rain", 9, "temperature_rain_dataset_without_missing_values.tsf", "wavenet", 30),
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the deep learning experiments")
+    parser.add_argument("--workers", type=int, default=1, help="number of experiments run in parallel")
+    parser.add_argument("--threads-per-job", type=int, default=None, help="maximum number of CPU threads used by an experiment")
+    parser.add_argument("--rolling-origin", action="store_true", help="run the rolling origin evaluation of the experiments instead of the fixed horizon evaluation")
+    parser.add_argument("--binary-results", action="store_true", help="write the forecasts in the binary result format of utils/result_format.py instead of text")
+    parser.add_argument("--cprofile", action="store_true", help="profile each stage of the experiments with cProfile")
+    parser.add_argument("--trace-memory", action="store_true", help="trace the peak memory allocated by Python objects in each stage of the experiments with tracemalloc")
+    parser.add_argument("--force", action="append", default=None, metavar="PATTERN", help="rerun the completed experiments matching the pattern, e.g. 'm4_*' or '*_deepar_lag_*' (can be repeated)")
+    args = parser.parse_args()
+
+    if args.rolling_origin:
+        evaluation, experiment_function, get_job_info = "rolling_origin", get_deep_nn_rolling_origin_forecasts, get_rolling_origin_experiment_info
+    else:
+        evaluation, experiment_function, get_job_info = "fixed_horizon", get_deep_nn_forecasts, get_experiment_info
+
+    if args.binary_results:
+        experiment_function = functools.partial(experiment_function, binary_results=True)
+        get_job_info = functools.partial(get_job_info, binary_results=True)
+
+    if args.cprofile or args.trace_memory:
+        experiment_function = functools.partial(experiment_function, cprofile=args.cprofile, trace_memory=args.trace_memory)
+
+    experiment_runner.run_experiments(experiment_function,
+                                      DEEP_LEARNING_EXPERIMENTS,
+                                      get_experiment_name,
+                                      workers=args.workers,
+                                      threads_per_job=args.threads_per_job,
+                                      execution_times_dir=BASE_DIR + "/results/" + evaluation + "_execution_times/",
+                                      manifest_path=BASE_DIR + "/results/" + evaluation + "_manifest.json",
+                                      get_job_info=get_job_info,
+                                      force=args.force,
+                                      get_job_group=get_experiment_dataset_key)
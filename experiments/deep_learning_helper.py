@@ -0,0 +1,36 @@
+import numpy as np
+
+# Helper functions of the deep learning experiments in experiments/deep_learning_experiments.py that do not depend on GluonTS
+
+# The train-test split used for rolling origin evaluation. By default, it uses 80% of data for training (denoted by 0.8) and 20% of data for testing
+TRAIN_SPLIT = 0.8
+
+# Calculates the quantiles of a stream of GluonTS forecasts into one array of shape (number of series, number of quantiles, horizon)
+# Each forecast is discarded after its quantiles are calculated, so only the forecasts of the batch being predicted are held in memory
+# Sample forecasts give the quantiles of their samples and distribution forecasts give the quantiles of their distributions without sampling
+#
+# Parameters
+# forecasts - iterator of GluonTS forecasts, e.g. returned by make_evaluation_predictions or predictor.predict
+# num_series - the number of forecasts
+# quantiles - list of quantile levels, e.g. [0.1, 0.5, 0.9]
+# forecast_horizon - the number of future values in a forecast
+def get_forecast_quantiles(forecasts, num_series, quantiles, forecast_horizon):
+    quantile_forecasts = np.empty((num_series, len(quantiles), forecast_horizon), dtype=np.float32)
+
+    for i, f in enumerate(forecasts):
+        for j in range(len(quantiles)):
+            # The median is taken from the median property, which gives the same values as earlier versions for sample forecasts
+            quantile_forecasts[i, j] = f.median if quantiles[j] == 0.5 else f.quantile(quantiles[j])
+
+    return quantile_forecasts
+
+
+# Returns the number of training values of each series used in rolling origin evaluation, same as in experiments/rolling_origin.R
+#
+# Parameters
+# lengths - array of series lengths
+# split - the fraction of each series used for training
+def get_rolling_origin_train_lengths(lengths, split = TRAIN_SPLIT):
+    train_lengths = np.round(lengths * split).astype(np.int64) # Same as round in R, which rounds halves to even
+    train_lengths[lengths == 2] = 1
+    return train_lengths
@@ -0,0 +1,244 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import multiprocessing
+import os
+import re
+import traceback
+
+import experiments.job_manifest as job_manifest
+
+# Environment variables read by the numerical libraries used by the models to decide their number of CPU threads
+THREAD_LIMIT_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "MXNET_CPU_WORKER_NTHREADS",
+]
+
+
+# Seconds in each unit of the execution times written like R difftime values, e.g. "1.5 mins"
+EXECUTION_TIME_UNITS = {"secs": 1, "mins": 60, "hours": 3600, "days": 86400}
+
+
+# Converts an execution time into seconds
+# The execution time is written like an R difftime value by format_execution_time in experiments/local_model_experiments.py, e.g. "1.5 mins", or by str(timedelta) in earlier runs, e.g. "0:01:02.345678" or "1 day, 2:03:04"
+# Returns None if the text is not a valid execution time
+#
+# Parameters
+# text - execution time as text
+def parse_execution_time(text):
+    match = re.fullmatch(r"(\d+(?:\.\d*)?(?:e[+-]?\d+)?) (secs|mins|hours|days)", text.strip())
+
+    if match is not None:
+        return float(match.group(1)) * EXECUTION_TIME_UNITS[match.group(2)]
+
+    match = re.fullmatch(r"(?:(\d+) days?, )?(\d+):(\d+):(\d+(?:\.\d+)?)", text.strip())
+
+    if match is None:
+        return None
+
+    days, hours, minutes, seconds = match.groups()
+    return int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+# Reads the execution times of previous runs
+# Returns a dictionary of job names (execution time file names without the extension) and execution times in seconds
+#
+# Parameters
+# execution_times_dir - folder containing the execution time files, e.g. results/fixed_horizon_execution_times
+def load_execution_times(execution_times_dir):
+    execution_times = {}
+
+    if not os.path.isdir(execution_times_dir):
+        return execution_times
+
+    for file_name in os.listdir(execution_times_dir):
+        if file_name.endswith(".txt"):
+            with open(os.path.join(execution_times_dir, file_name), "r") as file:
+                execution_time = parse_execution_time(file.read())
+
+            if execution_time is not None:
+                execution_times[file_name[: -len(".txt")]] = execution_time
+
+    return execution_times
+
+
+# Orders jobs by their expected execution time, longest first, so that long jobs do not start at the end of a sweep
+# Jobs without a previous execution time are placed first, as they may be long
+#
+# Parameters
+# jobs - list of jobs
+# get_job_name - function returning the name of a job
+# execution_times - dictionary of job names and execution times in seconds from previous runs
+def order_jobs_longest_first(jobs, get_job_name, execution_times):
+    def expected_time(job):
+        return execution_times.get(get_job_name(job), float("inf"))
+
+    # sorted is stable, so jobs with the same expected time keep their original order
+    return sorted(jobs, key=expected_time, reverse=True)
+
+
+# Groups the jobs sharing a key, e.g. their input file, so that each group runs one after another in the same worker process, which can then reuse what the jobs of the group share
+# The groups are ordered by their expected total execution time, longest first, and the jobs of a group are ordered longest first
+# Returns a list of job lists. Without get_job_group, every job is a group of its own
+#
+# Parameters
+# jobs - list of jobs
+# get_job_name - function returning the name of a job
+# execution_times - dictionary of job names and execution times in seconds from previous runs
+# get_job_group - function returning the group key of a job, or None
+def group_jobs_longest_first(jobs, get_job_name, execution_times, get_job_group=None):
+    ordered_jobs = order_jobs_longest_first(jobs, get_job_name, execution_times)
+
+    if get_job_group is None:
+        return [[job] for job in ordered_jobs]
+
+    groups = {}
+    for job in ordered_jobs:
+        groups.setdefault(get_job_group(job), []).append(job)
+
+    def expected_time(group):
+        return sum(execution_times.get(get_job_name(job), float("inf")) for job in group)
+
+    return sorted(groups.values(), key=expected_time, reverse=True)
+
+
+# Runs a job and returns its status instead of raising, so that one failing job does not stop the sweep
+def _run_job(experiment_function, job):
+    start_time = datetime.now()
+
+    try:
+        experiment_function(*job)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+
+    return (datetime.now() - start_time).total_seconds(), error
+
+
+# Runs the jobs of a group one after another in the same process
+def _run_jobs(experiment_function, jobs):
+    return [_run_job(experiment_function, job) for job in jobs]
+
+
+# Runs a grid of experiments, e.g. the dataset x method grid of deep_learning_experiments.py, concurrently in a pool of worker processes
+# The jobs are started longest first according to the execution times of previous runs, so the sweep takes about as long as its slowest job when there are enough workers
+# With get_job_group, the groups of jobs are started longest first instead, so the sweep takes about as long as its slowest group
+# With a manifest, completed jobs are recorded as they finish and the jobs that are already completed and up to date are skipped, so an interrupted sweep can be resumed
+# Returns a list of (job, execution time in seconds, error) tuples in the original job order, where error is the traceback of a failed job or None. Skipped jobs have None as the execution time
+#
+# Parameters
+# experiment_function - module level function running one experiment
+# jobs - list of argument tuples of experiment_function
+# get_job_name - function returning the name of a job, given its arguments. It should be the name used for the execution time files
+# workers - number of worker processes. None uses all available cores. 1 runs the jobs one after another in the current process
+# threads_per_job - maximum number of CPU threads used by a job. None keeps the library defaults. With workers = 1, the limit only applies to libraries that are not imported yet
+# execution_times_dir - folder containing the execution time files of previous runs
+# manifest_path - path of the job manifest file. None runs all jobs without recording them
+# get_job_info - function returning a dictionary describing a job, given its arguments, with the keys dataset, method, lag, horizon, input_file and outputs (list of output file paths). Required with a manifest
+# force - list of shell-style patterns of job names, e.g. ["m4_*", "*_deepar_lag_*"]. Matching jobs are run even when they are completed
+# get_job_group - function returning the group key of a job, given its arguments, e.g. its input file. The jobs of a group run one after another in the same worker process, so they can reuse the data cached by the process. None runs every job on its own
+def run_experiments(
+    experiment_function,
+    jobs,
+    get_job_name,
+    workers=None,
+    threads_per_job=None,
+    execution_times_dir=None,
+    manifest_path=None,
+    get_job_info=None,
+    force=None,
+    get_job_group=None,
+):
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    execution_times = {}
+    if execution_times_dir is not None:
+        execution_times = load_execution_times(execution_times_dir)
+
+    job_indices = order_jobs_longest_first(
+        range(len(jobs)), lambda index: get_job_name(*jobs[index]), execution_times
+    )
+    results = [None] * len(jobs)
+
+    manifest = None
+    if manifest_path is not None:
+        manifest = job_manifest.JobManifest(manifest_path)
+
+        pending_indices = []
+        for index in job_indices:
+            job_name = get_job_name(*jobs[index])
+
+            if not job_manifest.matches_any(job_name, force) and manifest.is_completed(get_job_info(*jobs[index])):
+                results[index] = (None, None)
+                print("Skipped " + job_name + " as it is already completed")
+            else:
+                pending_indices.append(index)
+
+        job_indices = pending_indices
+
+    job_groups = group_jobs_longest_first(
+        job_indices,
+        lambda index: get_job_name(*jobs[index]),
+        execution_times,
+        None if get_job_group is None else lambda index: get_job_group(*jobs[index]),
+    )
+
+    # The input files are hashed when the jobs are submitted, so a job whose input file changes while it runs is not recorded as up to date
+    input_states = {}
+
+    def submit_job(index):
+        if manifest is not None:
+            input_states[index] = manifest.get_input_state(get_job_info(*jobs[index])["input_file"])
+
+    def finish_job(index, result):
+        results[index] = result
+        _print_status(get_job_name(*jobs[index]), *result)
+
+        if manifest is not None and result[1] is None:
+            manifest.record_completed(get_job_info(*jobs[index]), result[0], input_states[index])
+
+    # The libraries read the thread limits when they are imported, so the limits are set in the environment before the worker processes start
+    previous_environment = {variable: os.environ.get(variable) for variable in THREAD_LIMIT_VARIABLES}
+    if threads_per_job is not None:
+        for variable in THREAD_LIMIT_VARIABLES:
+            os.environ[variable] = str(threads_per_job)
+
+    try:
+        if workers == 1:
+            for group in job_groups:
+                for index in group:
+                    submit_job(index)
+                    finish_job(index, _run_job(experiment_function, jobs[index]))
+        else:
+            # Spawned workers start with a fresh interpreter, so they import the libraries with the thread limits
+            # Each group is submitted as one task, so its jobs run in the same worker, and they are recorded when the whole group finishes
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = {}
+                for group in job_groups:
+                    for index in group:
+                        submit_job(index)
+                    futures[executor.submit(_run_jobs, experiment_function, [jobs[index] for index in group])] = group
+
+                for future in as_completed(futures):
+                    for index, result in zip(futures[future], future.result()):
+                        finish_job(index, result)
+    finally:
+        for variable, value in previous_environment.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+    return [(jobs[index],) + results[index] for index in range(len(jobs))]
+
+
+def _print_status(job_name, execution_time, error):
+    if error is None:
+        print("Finished " + job_name + " in " + "%.1f" % execution_time + "s")
+    else:
+        print("Failed " + job_name + " after " + "%.1f" % execution_time + "s\n" + error)
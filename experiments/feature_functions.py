@@ -0,0 +1,719 @@
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import utils.error_calculator as error_calculator
+import utils.ragged_series as ragged_series
+from utils.atomic_write import open_atomically
+from utils.seasonality import SEASONALITY_MAP
+
+# Python version of calculate_features in experiments/feature_functions.R
+# The series are loaded into one flat buffer and the cheap features are calculated for all series at once with NumPy, instead of looping over the series
+# The features that fit a model per series are calculated in a pool of worker processes
+# The features are written in the same CSV layout as the R version, into the tsfeatures and catch22_features folders
+# Missing values are removed from the series before calculating the features
+#
+# Only a subset of the tsfeatures of the R version is calculated: max_kl_shift, holt_parameters, unitroot_pp and stl_features are not available
+# The tsfeatures are therefore written into <dataset_name>_features_subset.csv instead of the <dataset_name>_features.csv file written by the R version
+# hurst maximises the approximate likelihood of fracdiff with a grid search, so it can differ from the R version after the fourth decimal place
+
+BASE_DIR = "TSForecasting"
+
+# Number of series sent to a worker process at once
+FEATURE_CHUNK_SIZE = 1000
+
+# Width of the windows used by the shift, lumpiness and stability features of non-seasonal series, same as in tsfeatures
+DEFAULT_WINDOW_WIDTH = 10
+
+# Number of terms of the autoregressive approximation used by fracdiff to calculate the likelihood of long series
+FRACDIFF_NUM_TERMS = 100
+
+# Range of the fractional differencing parameter searched by hurst, same as the default drange of fracdiff, excluding its ends where the likelihood is not defined
+FRACDIFF_D_BOUNDS = (1e-5, 0.5 - 1e-5)
+
+# The fractional differencing parameter is found with a grid search of FRACDIFF_GRID_SIZE values, refined FRACDIFF_SEARCH_ROUNDS times around the best value
+FRACDIFF_GRID_SIZE = 21
+FRACDIFF_SEARCH_ROUNDS = 5
+
+
+# Calculates tsfeatures or catch22 features of a dataset and writes them into the tsfeatures or catch22_features folder
+# The tsfeatures are mean, var, max_level_shift, max_var_shift, acf_features, arch_stat, crossing_points, entropy, flat_spots, hurst, lumpiness, nonlinearity, pacf_features, stability and unitroot_kpss, calculated as in the tsfeatures R package
+# They are written into <dataset_name>_features_subset.csv, as the R version also calculates max_kl_shift, holt_parameters, unitroot_pp and stl_features
+# The catch22 features are calculated with the pycatch22 package and written into <dataset_name>_features.csv, same as the R version
+#
+# Parameters
+# dataset_name - the name of the dataset
+# input_file_name - name of the .tsf file corresponding with the dataset
+# feature_type - tsfeatures or catch22
+# workers - number of processes used to calculate the features of different series in parallel. None uses all available cores
+def calculate_features(dataset_name, input_file_name, feature_type="tsfeatures", workers=1):
+    print("Started feature calculation: " + dataset_name)
+
+    if feature_type not in ["tsfeatures", "catch22"]:
+        raise Exception("Invalid feature type: " + feature_type)
+
+    series, frequency, _, _, _ = ragged_series.convert_tsf_to_ragged_series(BASE_DIR + "/tsf_data/" + input_file_name)
+
+    # Series with several seasonalities use the longest one as their frequency, same as msts
+    seasonality = SEASONALITY_MAP[frequency] if frequency is not None else 1
+    frequency = int(math.floor(max(np.atleast_1d(seasonality))))
+
+    values, offsets = error_calculator.flatten_series(series)
+    values, offsets = error_calculator._remove_missing_values(values, offsets, ~np.isnan(values))
+
+    if feature_type == "tsfeatures":
+        feature_names, features = calculate_tsfeatures(values, offsets, frequency, workers)
+        output_file_path = BASE_DIR + "/results/tsfeatures/" + dataset_name + "_features_subset.csv"
+    else:
+        feature_names, features = _calculate_in_parallel(values, offsets, frequency, "catch22", workers)
+        output_file_path = BASE_DIR + "/results/catch22_features/" + dataset_name + "_features.csv"
+
+    write_features(feature_names, features, output_file_path)
+
+
+# Calculates the tsfeatures of a set of series given as one flat buffer
+# Returns the feature names and a matrix with one row per series
+# As in experiments/feature_functions.R, the seasonal features are left out if they cannot be calculated for some series
+#
+# Parameters
+# values - flat buffer containing the values of all series without missing values
+# offsets - array of length (number of series + 1) containing the series boundaries
+# frequency - frequency of the series, e.g. 12 for monthly
+# workers - number of processes used to calculate the features fitting a model per series
+def calculate_tsfeatures(values, offsets, frequency, workers=1):
+    width = frequency if frequency > 1 else DEFAULT_WINDOW_WIDTH
+
+    features = {}
+    features["mean"], features["var"] = calculate_mean_var(values, offsets)
+
+    # A feature group returning NA is recalculated with frequency 1 and then with width 1, as in feature_functions.R
+    features["max_level_shift"], features["time_level_shift"] = _with_retries(lambda v, o, w: calculate_max_shift(v, o, w, False), values, offsets, [width, DEFAULT_WINDOW_WIDTH, 1])
+    features["max_var_shift"], features["time_var_shift"] = _with_retries(lambda v, o, w: calculate_max_shift(v, o, w, True), values, offsets, [width, DEFAULT_WINDOW_WIDTH, 1])
+    features.update(calculate_acf_features(values, offsets, frequency))
+
+    parallel_names, parallel_features = _calculate_in_parallel(values, offsets, frequency, "tsfeatures", workers)
+    parallel_features = dict(zip(parallel_names, parallel_features.T))
+
+    features["ARCH.LM"] = parallel_features["ARCH.LM"]
+    features["crossing_points"] = calculate_crossing_points(values, offsets)
+    features["entropy"] = parallel_features["entropy"]
+    features["flat_spots"] = calculate_flat_spots(values, offsets)
+    features["hurst"] = parallel_features["hurst"]
+    features["lumpiness"], = _with_retries(lambda v, o, w: (calculate_tiled_statistic(v, o, w, True),), values, offsets, [width, DEFAULT_WINDOW_WIDTH])
+    features["nonlinearity"] = parallel_features["nonlinearity"]
+
+    for name in ["x_pacf5", "diff1x_pacf5", "diff2x_pacf5", "seas_pacf"]:
+        if name in parallel_features:
+            features[name] = parallel_features[name]
+
+    features["stability"], = _with_retries(lambda v, o, w: (calculate_tiled_statistic(v, o, w, False),), values, offsets, [width, DEFAULT_WINDOW_WIDTH])
+    features["unitroot_kpss"] = calculate_kpss_statistic(values, offsets)
+
+    # Recalculating a group with frequency 1 removes its seasonal feature, so only the features common to all series are kept
+    if frequency > 1:
+        if np.isnan(np.column_stack([features[name] for name in ["x_acf1", "x_acf10", "diff1_acf1", "diff1_acf10", "diff2_acf1", "diff2_acf10", "seas_acf1"]])).any():
+            del features["seas_acf1"]
+        if np.isnan(np.column_stack([features[name] for name in ["x_pacf5", "diff1x_pacf5", "diff2x_pacf5", "seas_pacf"]])).any():
+            del features["seas_pacf"]
+
+    return list(features.keys()), np.column_stack(list(features.values()))
+
+
+# Writes features in the same layout as write.table in experiments/feature_functions.R: a header line with the feature names and one line per series
+#
+# Parameters
+# feature_names - list of feature names
+# features - matrix with one row per series
+# file_path - path of the CSV file
+def write_features(feature_names, features, file_path):
+    with open_atomically(file_path, "w") as output:
+        output.write(",".join(feature_names) + "\n")
+
+        for row in features:
+            output.write(",".join("NA" if np.isnan(value) else error_calculator.format_r_number(value) for value in row) + "\n")
+
+
+# Returns the series index of each value of a flat buffer and the position of each value within its series
+def _get_series_positions(offsets):
+    lengths = np.diff(offsets)
+    series_ids = np.repeat(np.arange(len(lengths)), lengths)
+    return series_ids, np.arange(offsets[-1]) - offsets[:-1][series_ids]
+
+
+# Sums the values of each group, where groups are given by their indices
+def _group_sums(values, group_ids, num_groups):
+    return np.bincount(group_ids, weights=values, minlength=num_groups)
+
+
+# Returns the differences of consecutive values within each series as a flat buffer and its series boundaries
+def _difference(values, offsets):
+    _, positions = _get_series_positions(offsets)
+    differences = (values[1:] - values[:-1])[positions[1:] > 0]
+    lengths = np.maximum(np.diff(offsets) - 1, 0)
+    return differences, np.concatenate(([0], np.cumsum(lengths)))
+
+
+# Calculates a per-series feature for all series and recalculates the series giving NaN with the next width, as feature_functions.R recalculates the features returning NA with different parameters
+# Returns the tuple of feature arrays returned by function
+#
+# Parameters
+# function - function of the flat buffer, the series boundaries and a width returning a tuple of feature arrays
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# widths - widths to try in order
+def _with_retries(function, values, offsets, widths):
+    features = function(values, offsets, widths[0])
+
+    for width in widths[1:]:
+        retry = np.flatnonzero(np.isnan(np.column_stack(features)).any(axis=1))
+        if len(retry) == 0:
+            break
+
+        starts, ends = offsets[retry], offsets[retry + 1]
+        retry_values = values[error_calculator._range_indices(starts, ends)]
+        retry_features = function(retry_values, np.concatenate(([0], np.cumsum(ends - starts))), width)
+
+        for feature, retry_feature in zip(features, retry_features):
+            feature[retry] = retry_feature
+
+    return features
+
+
+# Calculates the mean and the variance of each series, same as the mean and var features of tsfeatures
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+def calculate_mean_var(values, offsets):
+    series_ids, _ = _get_series_positions(offsets)
+    num_series = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = _group_sums(values, series_ids, num_series) / lengths
+        variances = _group_sums((values - means[series_ids]) ** 2, series_ids, num_series) / (lengths - 1)
+
+    return means, np.where(lengths > 1, variances, np.nan)
+
+
+# Calculates the autocorrelations of each series at the given lags, same as acf in R
+# Returns a matrix with one row per series and one column per lag, containing NaN for the lags not shorter than a series
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# lags - list of positive lags
+def calculate_autocorrelations(values, offsets, lags):
+    series_ids, positions = _get_series_positions(offsets)
+    num_series = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centred = values - (_group_sums(values, series_ids, num_series) / lengths)[series_ids]
+        variances = _group_sums(centred ** 2, series_ids, num_series)
+
+        autocorrelations = np.full((num_series, len(lags)), np.nan)
+        remaining = lengths[series_ids] - positions
+
+        for i, lag in enumerate(lags):
+            if lag >= len(values):
+                continue
+
+            # Pairs of values lag apart within the same series. The pairs crossing into the next series get a zero weight
+            products = centred[:-lag] * centred[lag:] * (remaining[:-lag] > lag)
+            autocorrelations[:, i] = np.where(lag < lengths, _group_sums(products, series_ids[:-lag], num_series) / variances, np.nan)
+
+    return autocorrelations
+
+
+# Calculates acf_features of tsfeatures: the first autocorrelation and the sum of squares of the first ten autocorrelations of the series and their first and second differences, and the autocorrelation at the seasonal lag
+# Returns a dictionary of feature names and arrays
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# frequency - frequency of the series
+def calculate_acf_features(values, offsets, frequency):
+    lags = list(range(1, 11))
+    features = {}
+
+    acf = calculate_autocorrelations(values, offsets, lags + ([frequency] if frequency > 1 else []))
+    features["x_acf1"] = acf[:, 0]
+    features["x_acf10"] = np.sum(acf[:, :10] ** 2, axis=1)
+    seasonal_acf = acf[:, 10] if frequency > 1 else None
+
+    for differences in [1, 2]:
+        values, offsets = _difference(values, offsets)
+        acf = calculate_autocorrelations(values, offsets, lags)
+
+        # acf in R returns the lags shorter than the series, so the sum is over the available lags
+        features["diff" + str(differences) + "_acf1"] = acf[:, 0]
+        available = np.array(lags) < np.diff(offsets)[:, None]
+        features["diff" + str(differences) + "_acf10"] = np.where(np.diff(offsets) > 1, np.sum(np.where(available, acf ** 2, 0), axis=1), np.nan)
+
+    if frequency > 1:
+        features["seas_acf1"] = seasonal_acf
+
+    return features
+
+
+# Calculates max_level_shift or max_var_shift of tsfeatures: the largest difference between the means or variances of consecutive windows of the series and the time of the shift
+# Returns the largest shift and its time, as the index of the last value of the first window
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# width - width of the windows
+# use_variance - whether the variances of the windows are compared instead of their means
+def calculate_max_shift(values, offsets, width, use_variance):
+    series_ids, positions = _get_series_positions(offsets)
+    num_series = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Centring the series keeps the rolling sums small
+        centred = values - (_group_sums(values, series_ids, num_series) / lengths)[series_ids]
+
+        # The rolling statistic of the window starting at each value. Windows crossing the end of a series are masked below
+        sums = np.concatenate(([0], np.cumsum(centred)))
+        rolling = (sums[width:] - sums[:-width]) / width
+
+        if use_variance:
+            squared_sums = np.concatenate(([0], np.cumsum(centred ** 2)))
+            rolling = (squared_sums[width:] - squared_sums[:-width] - width * rolling ** 2) / (width - 1) if width > 1 else np.full(len(rolling), np.nan)
+
+        # Shifts between the windows starting at each value and width values later, both within the series
+        num_shifts = np.maximum(lengths - 2 * width + 1, 0)
+        has_shift = positions[:len(rolling) - width] < num_shifts[series_ids[:len(rolling) - width]] if len(rolling) > width else np.zeros(0, dtype=bool)
+        shifts = np.abs(rolling[width:] - rolling[:-width])[has_shift] if len(rolling) > width else np.zeros(0)
+        shift_series = series_ids[:len(has_shift)][has_shift]
+        shift_positions = positions[:len(has_shift)][has_shift]
+
+    max_shifts = np.full(num_series, -np.inf)
+    np.maximum.at(max_shifts, shift_series, shifts)
+
+    # which.max gives the first position of the largest shift. Shifts differing only by rounding errors of the rolling sums are treated as ties
+    times = np.full(num_series, np.iinfo(np.int64).max)
+    is_max = shifts >= max_shifts[shift_series] - 1e-10 * np.abs(max_shifts[shift_series])
+    np.minimum.at(times, shift_series[is_max], shift_positions[is_max] + width)
+
+    # Series shorter than the window have no rolling statistics and series shorter than two windows have no shifts
+    max_shifts = np.where(lengths < width, np.nan, np.where(num_shifts == 0, 0, max_shifts))
+    times = np.where((num_shifts == 0) | (times == np.iinfo(np.int64).max), np.nan, times)
+
+    return max_shifts, times
+
+
+# Calculates crossing_points of tsfeatures: the number of times each series crosses its median
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+def calculate_crossing_points(values, offsets):
+    series_ids, positions = _get_series_positions(offsets)
+    lengths = np.diff(offsets)
+
+    # Medians of all series from one sort of the values within each series
+    # The values are sorted by their series and their rank among all values, which is faster than sorting them by their series and value
+    order = np.argsort(values)
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(len(values))
+    sorted_values = values[order[np.sort(series_ids * len(values) + ranks) % max(len(values), 1)]]
+    medians = (sorted_values[offsets[:-1] + (lengths - 1) // 2] + sorted_values[offsets[:-1] + lengths // 2]) / 2
+
+    below = values <= medians[series_ids]
+    crossings = (below[1:] != below[:-1]) & (positions[1:] > 0)
+
+    return np.bincount(series_ids[1:][crossings], minlength=len(lengths)).astype(np.float64)
+
+
+# Calculates flat_spots of tsfeatures: the longest run of values in the same tenth of the range of each series
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+def calculate_flat_spots(values, offsets):
+    series_ids, positions = _get_series_positions(offsets)
+    num_series = len(offsets) - 1
+
+    minimums = np.minimum.reduceat(values, offsets[:-1])
+    ranges = np.maximum.reduceat(values, offsets[:-1]) - minimums
+
+    # Same intervals as cut with 10 breaks, which are closed on the right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intervals = np.clip(np.ceil((values - minimums[series_ids]) / (ranges / 10)[series_ids]) - 1, 0, 9)
+    intervals[(ranges == 0)[series_ids]] = 0
+
+    run_starts = (positions == 0)
+    run_starts[1:] |= intervals[1:] != intervals[:-1]
+
+    run_lengths = np.diff(np.append(np.flatnonzero(run_starts), len(values)))
+    run_offsets = np.concatenate(([0], np.cumsum(np.bincount(series_ids[run_starts], minlength=num_series))))
+
+    return np.maximum.reduceat(run_lengths, run_offsets[:-1]).astype(np.float64)
+
+
+# Calculates lumpiness or stability of tsfeatures: the variance of the variances or the means of non-overlapping windows of each scaled series
+# Series shorter than two windows give 0
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# width - width of the windows
+# use_variance - whether the variances of the windows are used (lumpiness) instead of their means (stability)
+def calculate_tiled_statistic(values, offsets, width, use_variance):
+    series_ids, positions = _get_series_positions(offsets)
+    num_series = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means, variances = calculate_mean_var(values, offsets)
+        scaled = (values - means[series_ids]) / np.sqrt(variances)[series_ids]
+
+        # Only the windows containing width values are used
+        num_tiles = lengths // width
+        tile_offsets = np.concatenate(([0], np.cumsum(num_tiles)))
+        in_tile = positions < (num_tiles * width)[series_ids]
+        tile_ids = tile_offsets[:-1][series_ids[in_tile]] + positions[in_tile] // width
+
+        tile_values = scaled[in_tile]
+        tile_statistics = _group_sums(tile_values, tile_ids, tile_offsets[-1]) / width
+
+        if use_variance:
+            tile_statistics = _group_sums((tile_values - tile_statistics[tile_ids]) ** 2, tile_ids, tile_offsets[-1]) / (width - 1)
+
+        _, statistics = calculate_mean_var(tile_statistics, tile_offsets)
+
+    return np.where(lengths < 2 * width, 0, statistics)
+
+
+# Calculates unitroot_kpss of tsfeatures: the KPSS statistic of each series for level stationarity, with the short Bartlett window of ur.kpss
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+def calculate_kpss_statistic(values, offsets):
+    series_ids, positions = _get_series_positions(offsets)
+    num_series = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        residuals = values - (_group_sums(values, series_ids, num_series) / lengths)[series_ids]
+
+        # Partial sums of the residuals within each series
+        cumulative_sums = np.cumsum(residuals)
+        partial_sums = cumulative_sums - (cumulative_sums - residuals)[offsets[:-1]][series_ids]
+
+        numerators = _group_sums(partial_sums ** 2, series_ids, num_series) / lengths.astype(np.float64) ** 2
+        denominators = _group_sums(residuals ** 2, series_ids, num_series) / lengths
+
+        max_lags = np.trunc(4 * (lengths / 100) ** 0.25).astype(np.int64)
+        remaining = lengths[series_ids] - positions
+
+        for lag in range(1, int(max_lags.max()) + 1 if num_series > 0 else 1):
+            covariances = _group_sums(residuals[:-lag] * residuals[lag:] * (remaining[:-lag] > lag), series_ids[:-lag], num_series)
+            denominators = denominators + np.where(lag <= max_lags, 2 / lengths * (1 - lag / (max_lags + 1)) * covariances, 0)
+
+        return numerators / denominators
+
+
+# Calculates the features that are calculated series by series, in a pool of worker processes
+# Returns the feature names and a matrix with one row per series
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# frequency - frequency of the series
+# feature_type - tsfeatures for arch_stat, entropy, hurst, nonlinearity and pacf_features, or catch22
+# workers - number of worker processes. None uses all available cores
+def _calculate_in_parallel(values, offsets, frequency, feature_type, workers=1):
+    chunk_starts = list(range(0, len(offsets) - 1, FEATURE_CHUNK_SIZE)) + [len(offsets) - 1]
+    tasks = [
+        (values[offsets[start]:offsets[end]], offsets[start:end + 1] - offsets[start], frequency, feature_type)
+        for start, end in zip(chunk_starts[:-1], chunk_starts[1:])
+    ]
+
+    if workers is not None and workers <= 1:
+        results = list(map(_calculate_series_features, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers if workers is not None else os.cpu_count() or 1) as executor:
+            results = list(executor.map(_calculate_series_features, tasks))
+
+    return results[0][0], np.vstack([features for _, features in results])
+
+
+# Calculates the features of a chunk of series in a worker process
+# Returns the feature names and a matrix with one row per series
+#
+# Parameters
+# args - a tuple of the flat buffer and the boundaries of the series in the chunk, the frequency and the feature type
+def _calculate_series_features(args):
+    values, offsets, frequency, feature_type = args
+
+    if feature_type == "catch22":
+        try:
+            import pycatch22
+        except ImportError:
+            raise Exception("The pycatch22 package is required to calculate catch22 features.")
+
+        all_features = [pycatch22.catch22_all(values[offsets[i]:offsets[i + 1]].tolist()) for i in range(len(offsets) - 1)]
+        return all_features[0]["names"], np.array([features["values"] for features in all_features], dtype=np.float64)
+
+    feature_names = ["ARCH.LM", "entropy", "hurst", "nonlinearity", "x_pacf5", "diff1x_pacf5", "diff2x_pacf5"] + (["seas_pacf"] if frequency > 1 else [])
+    features = np.empty((len(offsets) - 1, len(feature_names)))
+
+    for i in range(len(offsets) - 1):
+        series = values[offsets[i]:offsets[i + 1]]
+
+        arch_lm = calculate_arch_stat(series)
+        if np.isnan(arch_lm):
+            arch_lm = calculate_arch_stat(series, 1)
+
+        features[i] = [arch_lm, calculate_entropy(series), calculate_hurst(series), calculate_nonlinearity(series)] + calculate_pacf_features(series, frequency)
+
+    return feature_names, features
+
+
+# Calculates arch_stat of tsfeatures: the R squared of regressing the squared demeaned series on its lagged values
+#
+# Parameters
+# series - a numpy array of series values
+# lags - number of lags
+def calculate_arch_stat(series, lags=12):
+    if len(series) <= lags + 1:
+        return np.nan
+
+    squared = (series - np.mean(series)) ** 2
+    embedded = np.column_stack([squared[lags - j:len(squared) - j] for j in range(lags + 1)])
+
+    return _r_squared(embedded[:, 0], embedded[:, 1:])
+
+
+# Calculates entropy of tsfeatures: the spectral entropy of the series, from the spectral density of an autoregressive model fitted with the Burg method as in spec.ar
+# The order of the model is selected by AIC. The entropy is close to 1 for white noise and small for series with a strong trend or seasonality
+#
+# Parameters
+# series - a numpy array of series values
+def calculate_entropy(series):
+    n = len(series)
+    max_order = min(n - 1, int(np.floor(10 * np.log10(n)))) if n > 0 else 0
+    if max_order < 1:
+        return np.nan
+
+    coefficients, variances = _burg(series - np.mean(series), max_order)
+    if not variances[0] > 0 or not np.all(np.isfinite(variances)):
+        return np.nan # The spectral density of a constant series is not defined
+
+    # The prediction variances are not scaled, as the spectral density is normalised below
+    with np.errstate(divide="ignore"):
+        order = int(np.argmin(n * np.log(variances) + 2 * np.arange(max_order + 1)))
+    ar = coefficients[order]
+
+    # spec.ar scales the prediction variance by n / (n - order - 1), which is not finite when the order is n - 1
+    if order == n - 1:
+        return np.nan
+
+    frequencies = np.linspace(0, 0.5, int(np.ceil(n / 2 + 1)))
+    angles = 2 * np.pi * frequencies[:, None] * np.arange(1, order + 1)
+    spectrum = 1 / ((1 - np.cos(angles) @ ar) ** 2 + (np.sin(angles) @ ar) ** 2)
+
+    # The spectral density is mirrored to the negative frequencies and mixed with a uniform prior, same as entropy in tsfeatures
+    density = np.concatenate((spectrum[:0:-1], spectrum))
+    density = 0.999 * density / np.sum(density) + 0.001 / len(density)
+
+    return min(1, -np.sum(density * np.log(density)) / np.log(n))
+
+
+# Calculates hurst of tsfeatures: d + 0.5, where d is the fractional differencing parameter of an ARFIMA(0, d, 0) model, same as fracdiff(x, 0, 0)
+# d maximises the approximate likelihood of Haslett and Raftery used by fracdiff over [0, 0.5], so the hurst exponent is close to 0.5 for white noise and close to 1 for random walks
+#
+# Parameters
+# series - a numpy array of series values
+def calculate_hurst(series):
+    if len(series) < 3 or np.all(series == series[0]):
+        return np.nan
+
+    grid = np.linspace(FRACDIFF_D_BOUNDS[0], FRACDIFF_D_BOUNDS[1], FRACDIFF_GRID_SIZE)
+    step = grid[1] - grid[0]
+
+    for _ in range(FRACDIFF_SEARCH_ROUNDS):
+        best_d = grid[np.argmin(_fractional_deviance(series, grid))]
+
+        # The next grid covers the neighbours of the best parameter
+        grid = np.linspace(max(FRACDIFF_D_BOUNDS[0], best_d - step), min(FRACDIFF_D_BOUNDS[1], best_d + step), FRACDIFF_GRID_SIZE)
+        step = grid[1] - grid[0]
+
+    return best_d + 0.5
+
+
+# Calculates nonlinearity of tsfeatures: the Teräsvirta neural network test statistic of the scaled series with one lag, multiplied by 10 and divided by the series length
+#
+# Parameters
+# series - a numpy array of series values
+def calculate_nonlinearity(series):
+    if len(series) < 3:
+        return np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scaled = (series - np.mean(series)) / np.std(series, ddof=1)
+        if not np.all(np.isfinite(scaled)):
+            return np.nan # Constant series cannot be scaled
+
+        target, lagged = scaled[1:], scaled[:-1]
+
+        linear_residuals = _residuals(target, lagged[:, None])
+        residuals = _residuals(linear_residuals, np.column_stack((lagged, lagged ** 2, lagged ** 3)))
+
+        # terasvirta.test uses the number of elements of the embedded matrix with the target and the lag
+        statistic = 2 * len(target) * np.log(np.sum(linear_residuals ** 2) / np.sum(residuals ** 2))
+
+    return 10 * statistic / len(series)
+
+
+# Calculates pacf_features of tsfeatures: the sum of squares of the first five partial autocorrelations of the series and their first and second differences, and the partial autocorrelation at the seasonal lag
+# Returns a list of x_pacf5, diff1x_pacf5, diff2x_pacf5 and seas_pacf if the frequency is greater than 1
+#
+# Parameters
+# series - a numpy array of series values
+# frequency - frequency of the series
+def calculate_pacf_features(series, frequency):
+    pacf = _partial_autocorrelations(series, max(5, frequency))
+
+    features = [np.sum(pacf[:5] ** 2) if len(series) > 5 else np.nan]
+
+    for differences in [1, 2]:
+        differenced = np.diff(series, differences)
+        features.append(np.sum(_partial_autocorrelations(differenced, 5) ** 2) if len(series) > 5 + differences else np.nan)
+
+    if frequency > 1:
+        features.append(pacf[frequency - 1] if len(pacf) >= frequency else np.nan)
+
+    return features
+
+
+# Returns the partial autocorrelations of a series at lags 1, ..., max_lag from the Durbin-Levinson recursion, same as pacf in R
+# Only the lags shorter than the series are returned
+def _partial_autocorrelations(series, max_lag):
+    max_lag = min(max_lag, len(series) - 1)
+    if max_lag < 1:
+        return np.zeros(0)
+
+    # Autocovariances from the periodogram
+    centred = series - np.mean(series)
+    spectrum = np.fft.rfft(centred, 2 * len(series))
+    autocovariances = np.fft.irfft(spectrum * np.conj(spectrum))[:max_lag + 1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        autocorrelations = autocovariances / autocovariances[0]
+
+        partial_autocorrelations = np.empty(max_lag)
+        coefficients = np.zeros(0)
+
+        for lag in range(1, max_lag + 1):
+            coefficient = (autocorrelations[lag] - coefficients @ autocorrelations[lag - 1:0:-1]) / (1 - coefficients @ autocorrelations[1:lag])
+            coefficients = np.append(coefficients - coefficient * coefficients[::-1], coefficient)
+            partial_autocorrelations[lag - 1] = coefficient
+
+    return partial_autocorrelations
+
+
+# Fits autoregressive models of orders 0, ..., max_order to a centred series with the Burg method, same as ar.burg with var.method = 1
+# Returns the list of coefficients of each order and the array of innovation variances of each order
+def _burg(series, max_order):
+    n = len(series)
+
+    # Forward and backward prediction errors, kept in reverse time order as in ar.burg
+    forward = series[::-1].copy()
+    backward = forward.copy()
+
+    coefficients = [np.zeros(0)]
+    variances = np.empty(max_order + 1)
+    variances[0] = np.sum(series ** 2) / n
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for order in range(1, max_order + 1):
+            previous_forward = forward[order - 1:n - 1].copy()
+            reflection = 2 * np.sum(backward[order:] * previous_forward) / np.sum(backward[order:] ** 2 + previous_forward ** 2)
+
+            coefficients.append(np.append(coefficients[-1] - reflection * coefficients[-1][::-1], reflection))
+            forward[order:] = previous_forward - reflection * backward[order:]
+            backward[order:] = backward[order:] - reflection * previous_forward
+            variances[order] = variances[order - 1] * (1 - reflection ** 2)
+
+    return coefficients, variances
+
+
+# Returns minus twice the approximate log likelihood of an ARFIMA(0, d, 0) model of a series for each d of a grid, up to a constant, as calculated by fracdiff
+# The first FRACDIFF_NUM_TERMS values are predicted exactly with the Durbin-Levinson recursion and the remaining values with the truncated autoregressive representation of the model, whose remaining terms are approximated with the mean of the earlier values
+# The mean of the series is estimated by generalised least squares for each d
+#
+# Parameters
+# series - a numpy array of series values
+# grid - array of values of d in (0, 0.5)
+def _fractional_deviance(series, grid):
+    n = len(series)
+    num_terms = min(FRACDIFF_NUM_TERMS, n)
+    d = grid[:, None]
+
+    # Predictions of each value from the previous values are predictions[k] + weights[k] * mean, with the prediction variances variances[k]
+    predictions = np.zeros((len(grid), n))
+    weights = np.ones((len(grid), n))
+    variances = np.empty((len(grid), n))
+    variances[:, 0] = np.exp(np.array([math.lgamma(1 - 2 * value) - 2 * math.lgamma(1 - value) for value in grid]))
+
+    coefficients = np.zeros((len(grid), 0))
+    for k in range(1, num_terms):
+        reflection = d / (k - d)
+        coefficients = np.concatenate((coefficients - reflection * coefficients[:, ::-1], reflection), axis=1)
+        variances[:, k] = variances[:, k - 1] * (1 - reflection[:, 0] ** 2)
+        predictions[:, k] = coefficients @ series[k - 1::-1]
+        weights[:, k] = 1 - np.sum(coefficients, axis=1)
+
+    if num_terms < n:
+        # Coefficients of the autoregressive representation and the weight of its truncated terms
+        ar = d * np.cumprod(np.concatenate((np.ones((len(grid), 1)), (np.arange(1, num_terms) - d) / np.arange(2, num_terms + 1)), axis=1), axis=1)
+        truncated = num_terms * ar[:, -1:] * (1 - (num_terms / np.arange(num_terms + 1, n + 1)) ** d) / d
+
+        # Sums of the values before the last num_terms values of each position
+        earlier_sums = np.concatenate(([0], np.cumsum(series)))[:n - num_terms]
+        earlier_counts = np.arange(n - num_terms)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            earlier_means = np.where(earlier_sums != 0, earlier_sums / earlier_counts, 0)
+        truncated = np.where(earlier_sums != 0, truncated, 0)
+
+        lagged = sliding_window_view(series[:-1], num_terms)[:, ::-1]
+        predictions[:, num_terms:] = ar @ lagged.T + truncated * earlier_means
+        weights[:, num_terms:] = 1 - np.sum(ar, axis=1)[:, None] - truncated
+        variances[:, num_terms:] = variances[:, num_terms - 1:num_terms]
+
+    mean = np.sum(weights * (series - predictions) / variances, axis=1) / np.sum(weights ** 2 / variances, axis=1)
+    errors = series - predictions - weights * mean[:, None]
+
+    return n * np.log(np.sum(errors ** 2 / variances, axis=1) / n) + np.sum(np.log(variances), axis=1)
+
+
+# Residuals of the least squares regression of a target on a set of regressors with an intercept
+def _residuals(target, regressors):
+    design = np.column_stack((np.ones(len(target)), regressors))
+    coefficients = np.linalg.lstsq(design, target, rcond=None)[0]
+    return target - design @ coefficients
+
+
+# R squared of the least squares regression of a target on a set of regressors with an intercept, same as summary.lm
+def _r_squared(target, regressors):
+    residuals = _residuals(target, regressors)
+    fitted = target - residuals
+
+    model_sum_of_squares = np.sum((fitted - np.mean(fitted)) ** 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return model_sum_of_squares / (model_sum_of_squares + np.sum(residuals ** 2))
+
+
+# Example of usage
+# calculate_features("sample", "sample.tsf")
+# calculate_features("sample", "sample.tsf", "catch22", workers=4)
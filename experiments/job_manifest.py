@@ -0,0 +1,139 @@
+from datetime import datetime
+import fnmatch
+import hashlib
+import json
+import os
+
+from utils.atomic_write import open_atomically
+
+
+# Returns the key of a job in the manifest
+#
+# Parameters
+# job_info - dictionary describing a job with the keys dataset, method, lag and horizon
+def get_job_key(job_info):
+    return "|".join(str(job_info[field]) for field in ["dataset", "method", "lag", "horizon"])
+
+
+# Calculates the SHA-1 hash of the content of a file
+#
+# Parameters
+# file_path - path of the file
+def hash_file(file_path):
+    file_hash = hashlib.sha1()
+
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+# Reads a job manifest. Returns an empty manifest if the file does not exist
+#
+# Parameters
+# manifest_path - path of the manifest file
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {}
+
+    with open(manifest_path, "r") as file:
+        return json.load(file)
+
+
+# Writes a job manifest atomically, so an interrupted sweep never leaves a partially written manifest
+#
+# Parameters
+# manifest - dictionary of job keys and job records
+# manifest_path - path of the manifest file
+def save_manifest(manifest, manifest_path):
+    with open_atomically(manifest_path, "w") as output:
+        json.dump(manifest, output, indent=1, sort_keys=True)
+
+
+# Tracks the completed jobs of a sweep, so that a rerun only executes the jobs that are missing or stale
+# A job is stale when one of its output files is missing or its input file has changed since it was completed
+class JobManifest:
+    # Parameters
+    # manifest_path - path of the manifest file
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.records = load_manifest(manifest_path)
+        self._input_hashes = {}
+
+    # Returns the hash of an input file. The hash recorded for the file is reused while its size and modification time do not change
+    def get_input_hash(self, input_file):
+        stat = os.stat(input_file)
+        signature = (os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns)
+
+        if signature not in self._input_hashes:
+            for record in self.records.values():
+                if (record["input_file"], record["input_size"], record["input_mtime_ns"]) == signature:
+                    self._input_hashes[signature] = record["input_hash"]
+                    break
+            else:
+                self._input_hashes[signature] = hash_file(input_file)
+
+        return self._input_hashes[signature]
+
+    # Returns the path, size, modification time and hash of an input file, recorded with a job to detect later changes of the file
+    # It should be called before the job reads the file, so a change of the file while the job runs makes the job stale
+    #
+    # Parameters
+    # input_file - path of the input file
+    def get_input_state(self, input_file):
+        input_file = os.path.abspath(input_file)
+        stat = os.stat(input_file)
+
+        return {
+            "input_file": input_file,
+            "input_size": stat.st_size,
+            "input_mtime_ns": stat.st_mtime_ns,
+            "input_hash": self.get_input_hash(input_file),
+        }
+
+    # Checks whether a job is completed and its outputs are up to date
+    #
+    # Parameters
+    # job_info - dictionary describing a job with the keys dataset, method, lag, horizon, input_file and outputs
+    def is_completed(self, job_info):
+        record = self.records.get(get_job_key(job_info))
+
+        if record is None:
+            return False
+
+        if not all(os.path.exists(output) for output in job_info["outputs"]):
+            return False
+
+        try:
+            return record["input_hash"] == self.get_input_hash(job_info["input_file"])
+        except OSError:
+            return False
+
+    # Records a completed job and writes the manifest
+    #
+    # Parameters
+    # job_info - dictionary describing a job with the keys dataset, method, lag, horizon, input_file and outputs
+    # execution_time - execution time of the job in seconds
+    # input_state - state of the input file returned by get_input_state when the job was submitted
+    def record_completed(self, job_info, execution_time, input_state):
+        record = dict(job_info)
+        record.update(input_state)
+        record.update(
+            {
+                "execution_time": execution_time,
+                "completed_at": datetime.now().isoformat(),
+            }
+        )
+
+        self.records[get_job_key(job_info)] = record
+        save_manifest(self.records, self.manifest_path)
+
+
+# Checks whether a job name matches one of the given patterns, e.g. "m4_*" or "*_deepar_lag_*"
+#
+# Parameters
+# job_name - name of the job
+# patterns - list of shell-style patterns, or None
+def matches_any(job_name, patterns):
+    return patterns is not None and any(fnmatch.fnmatchcase(job_name, pattern) for pattern in patterns)
@@ -0,0 +1,135 @@
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+import utils.data_loader as loader
+
+BASE_DIR = "TSForecasting"
+
+
+# The per-value parsing loop used by convert_tsf_to_dataframe before the values were parsed in bulk
+# Kept here only as the reference implementation for the benchmark
+#
+# Parameters
+# series - comma separated series values as a string
+# replace_missing_vals_with - a term to indicate the missing values in series
+def parse_series_values_per_value(series, replace_missing_vals_with="NaN"):
+    numeric_series = []
+
+    for val in series.split(","):
+        if val == "?":
+            numeric_series.append(replace_missing_vals_with)
+        else:
+            numeric_series.append(float(val))
+
+    if numeric_series.count(replace_missing_vals_with) == len(numeric_series):
+        raise Exception("All series values are missing.")
+
+    return pd.Series(numeric_series).array
+
+
+# Writes a synthetic .tsf file with the same layout as tsf_data/sample.tsf
+#
+# Parameters
+# file_path - path of the .tsf file to be created
+# num_series - number of series in the file
+# series_length - number of values in each series
+# missing_ratio - fraction of the values that are written as missing (?)
+# seed - random seed used to generate the values
+def write_synthetic_tsf(file_path, num_series, series_length, missing_ratio=0.0, seed=1):
+    rng = random.Random(seed)
+
+    with open(file_path, "w", encoding="cp1252") as output:
+        output.write("@relation synthetic\n")
+        output.write("@attribute series_name string\n")
+        output.write("@attribute start_timestamp date\n")
+        output.write("@frequency daily\n")
+        output.write("@horizon 7\n")
+        output.write("@missing " + str(missing_ratio > 0).lower() + "\n")
+        output.write("@equallength true\n")
+        output.write("@data\n")
+
+        for i in range(num_series):
+            values = [
+                "?" if rng.random() < missing_ratio else "%.3f" % (rng.random() * 1000)
+                for _ in range(series_length)
+            ]
+            values[0] = "%.3f" % (rng.random() * 1000)  # Each series needs at least one value
+            output.write("T" + str(i + 1) + ":2015-01-01 00-00-00:" + ",".join(values) + "\n")
+
+
+# Times the bulk value parsing against the per-value loop for the data section of a .tsf file and checks both give the same series
+#
+# Parameters
+# file_path - path of the .tsf file
+def benchmark_value_parsing(file_path):
+    payloads = []
+
+    with open(file_path, "r", encoding="cp1252") as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("@") and not line.startswith("#"):
+                payloads.append(line[line.rindex(":") + 1:])
+
+    start_time = time.perf_counter()
+    reference = [parse_series_values_per_value(payload) for payload in payloads]
+    per_value_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    parsed = [loader.to_series_array(*loader.parse_series_values(payload)) for payload in payloads]
+    bulk_time = time.perf_counter() - start_time
+
+    for expected, actual in zip(reference, parsed):
+        if not pd.Series(expected).equals(pd.Series(actual)):
+            raise Exception("Bulk parsing does not match the per-value parsing.")
+
+    return per_value_time, bulk_time
+
+
+# Times a full convert_tsf_to_dataframe call
+#
+# Parameters
+# file_path - path of the .tsf file
+# workers - number of processes used to parse the data section
+def benchmark_full_load(file_path, workers=1):
+    start_time = time.perf_counter()
+    loader.convert_tsf_to_dataframe(file_path, workers=workers)
+    return time.perf_counter() - start_time
+
+
+# Benchmarks on synthetic datasets with short and long series
+# The value parsing is also checked against tsf_data/sample.tsf when it is available
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shapes = [("short_series", 50000, 30, 0.0), ("long_series", 2000, 1000, 0.0), ("missing_values", 2000, 1000, 0.05)]
+
+        for shape_name, num_series, series_length, missing_ratio in shapes:
+            file_path = os.path.join(temp_dir, shape_name + ".tsf")
+            write_synthetic_tsf(file_path, num_series, series_length, missing_ratio)
+
+            per_value_time, bulk_time = benchmark_value_parsing(file_path)
+            full_load_time = benchmark_full_load(file_path)
+
+            print(shape_name + ": per-value parsing " + "%.3f" % per_value_time + "s, bulk parsing " + "%.3f" % bulk_time + "s (" + "%.1f" % (per_value_time / bulk_time) + "x), full load " + "%.3f" % full_load_time + "s")
+
+        # Scaling of the parallel parsing with the number of worker processes
+        file_path = os.path.join(temp_dir, "parallel.tsf")
+        write_synthetic_tsf(file_path, 20000, 1000)
+        file_size = os.path.getsize(file_path) / (1024 * 1024)
+        serial_time = None
+
+        for workers in [1, 2, 4, 8]:
+            if workers > (os.cpu_count() or 1):
+                break
+
+            load_time = benchmark_full_load(file_path, workers)
+            if serial_time is None:
+                serial_time = load_time
+
+            print("parallel: " + str(workers) + " workers " + "%.3f" % load_time + "s, " + "%.1f" % (file_size / load_time) + " MB/s (" + "%.1f" % (serial_time / load_time) + "x)")
+
+    sample_path = BASE_DIR + "/tsf_data/sample.tsf"
+    if os.path.exists(sample_path):
+        per_value_time, bulk_time = benchmark_value_parsing(sample_path)
+        print("sample: per-value parsing " + "%.3f" % per_value_time + "s, bulk parsing " + "%.3f" % bulk_time + "s")
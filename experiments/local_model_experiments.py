@@ -0,0 +1,287 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import argparse
+import math
+import os
+import warnings
+
+import numpy as np
+
+import models.local_models as local_models
+import utils.error_calculator as error_calculator
+import utils.ragged_series as ragged_series
+from utils.atomic_write import open_atomically
+from utils.seasonality import SEASONALITY_MAP
+
+# Python version of do_fixed_horizon_local_forecasting in experiments/fixed_horizon_functions.R
+# The series are split into chunks that are forecast in a pool of worker processes, and the forecasts are written to the forecasts file in series order as the chunks finish
+# SES, Theta and snaive are forecast with the NumPy implementations in models/local_models.py, which fit all series of a chunk at once
+# The other models, and optionally SES and Theta, are forecast series by series with the R functions in models/local_univariate_models.R through the rpy2 package
+# The forecasts, execution times and errors are written into the same files as the R version
+
+BASE_DIR = "TSForecasting"
+
+# Methods with NumPy implementations fitting all series of a chunk at once
+VECTORIZED_METHODS = {
+    "ses": local_models.get_ses_forecasts,
+    "theta": local_models.get_theta_forecasts,
+    "snaive": local_models.get_snaive_forecasts
+}
+
+# Methods of models/local_univariate_models.R
+R_METHODS = ["ets", "ses", "theta", "arima", "tbats", "dhr_arima", "snaive"]
+
+# Maximum time in seconds to forecast a series with an R method. Series exceeding it get snaive forecasts, same as series whose models fail
+SERIES_TIMEOUT = 600
+
+# Number of series sent to a worker process at once by the vectorized methods and by the R methods
+VECTORIZED_CHUNK_SIZE = 10000
+SERIES_CHUNK_SIZE = 50
+
+# Calls a forecasting function of models/local_univariate_models.R with a time limit
+# R stops the call with an error when the limit is exceeded, so the tryCatch of the function returns snaive forecasts
+_R_FORECAST_WITH_TIME_LIMIT = """
+function(forecasting_function, time_series, forecast_horizon, timeout) {
+  setTimeLimit(elapsed = timeout, transient = TRUE)
+  on.exit(setTimeLimit(elapsed = Inf))
+  forecasts <- forecasting_function(time_series, forecast_horizon)
+  if (is.list(forecasts))
+    forecasts <- forecasts[[1]]
+  as.numeric(forecasts)
+}
+"""
+
+# The R session of the process, created when an R method is first used
+_R_SESSION = {}
+
+
+# This function performs the fixed horizon evaluation with local models
+#
+# Parameters
+# dataset_name - the name of the dataset
+# method - name of the local forecasting model: ets, ses, theta, arima, tbats, dhr_arima or snaive
+# input_file_name - name of the .tsf file corresponding with the dataset
+# external_forecast_horizon - the required forecast horizon, if it is not available in the .tsf file
+# integer_conversion - whether the forecasts should be rounded or not
+# workers - number of processes forecasting different series in parallel. None uses all available cores
+# timeout - maximum time in seconds to forecast a series with an R method
+# use_r - whether ses, theta and snaive are forecast with the R functions instead of the NumPy implementations
+def do_fixed_horizon_local_forecasting(dataset_name, method, input_file_name, external_forecast_horizon=None, integer_conversion=False, workers=1, timeout=SERIES_TIMEOUT, use_r=False):
+    print("Started loading " + dataset_name)
+
+    file_name = dataset_name + "_" + method
+
+    # Loading data from the .tsf file
+    series, frequency, forecast_horizon, _, _ = ragged_series.convert_tsf_to_ragged_series(BASE_DIR + "/tsf_data/" + input_file_name)
+    seasonality = SEASONALITY_MAP[frequency] if frequency is not None else 1
+
+    # A horizon attribute gives the forecast horizon of each series
+    if "horizon" in series.attributes:
+        forecast_horizons = series.attributes["horizon"].astype(np.int64)
+    elif forecast_horizon is not None:
+        forecast_horizons = np.full(len(series), forecast_horizon, dtype=np.int64)
+    elif external_forecast_horizon is not None:
+        # If the forecast horizon is not given within the .tsf file, then it should be provided as a function input
+        forecast_horizons = np.full(len(series), external_forecast_horizon, dtype=np.int64)
+    else:
+        raise Exception("Please provide the required forecast horizon")
+
+    num_columns = int(np.max(forecast_horizons))
+
+    # Series shorter than their horizon are forecast one step ahead
+    forecast_horizons = np.where(series.lengths < forecast_horizons, 1, forecast_horizons)
+
+    train_series = series.window(None, -forecast_horizons)
+    actual_matrix = np.full((len(series), num_columns), np.nan)
+    actual_matrix[:, :int(np.max(forecast_horizons))] = series.window(-forecast_horizons, None).to_matrix(np.nan)
+
+    forecast_matrix = np.full((len(series), num_columns), np.nan)
+
+    # The forecasts file contains the name of each series, same as the R version
+    if "series_name" not in series.attributes:
+        raise Exception("The dataset should contain a series_name attribute to name the series in the forecasts file: " + input_file_name)
+    series_names = series.attributes["series_name"]
+
+    start_time = datetime.now()
+
+    print("started Forecasting")
+
+    if not os.path.exists(BASE_DIR + "/results/fixed_horizon_forecasts/"):
+        os.makedirs(BASE_DIR + "/results/fixed_horizon_forecasts/")
+
+    # The forecasts of each chunk are written as soon as the chunks before it are written
+    with open_atomically(BASE_DIR + "/results/fixed_horizon_forecasts/" + file_name + ".txt", "w") as output:
+        for start, forecasts in iterate_local_forecasts(train_series, forecast_horizons, method, seasonality, workers, timeout, use_r):
+            for i in range(len(forecasts)):
+                current_method_forecasts = forecasts[i, :forecast_horizons[start + i]]
+                current_method_forecasts[np.isnan(current_method_forecasts)] = 0
+
+                if integer_conversion:
+                    current_method_forecasts = np.round(current_method_forecasts)
+
+                texts = [error_calculator.format_r_number(value) for value in current_method_forecasts]
+                output.write(",".join([str(series_names[start + i])] + texts) + "\n")
+
+                # The errors are calculated from the written forecasts, same as the R version reading the forecasts file
+                forecast_matrix[start + i, :len(texts)] = [float(text) for text in texts]
+
+    end_time = datetime.now()
+
+    print("Finished Forecasting")
+
+    # Execution time
+    exec_time = end_time - start_time
+    print(exec_time)
+
+    if not os.path.exists(BASE_DIR + "/results/fixed_horizon_execution_times/"):
+        os.makedirs(BASE_DIR + "/results/fixed_horizon_execution_times/")
+
+    with open_atomically(BASE_DIR + "/results/fixed_horizon_execution_times/" + file_name + ".txt", "w") as output_time:
+        output_time.write(format_execution_time(exec_time) + "\n")
+
+    # Error calculations
+    if not os.path.exists(BASE_DIR + "/results/fixed_horizon_errors/"):
+        os.makedirs(BASE_DIR + "/results/fixed_horizon_errors/")
+
+    error_calculator.calculate_errors(forecast_matrix, actual_matrix, train_series, seasonality, BASE_DIR + "/results/fixed_horizon_errors/" + file_name)
+
+
+# Formats an execution time in the same way as paste(exec_time, attr(exec_time, "units")) in R, e.g. 1.234 secs
+# The units are chosen as difftime does: secs below a minute, mins below an hour, hours below a day and days otherwise
+#
+# Parameters
+# exec_time - a timedelta
+def format_execution_time(exec_time):
+    seconds = exec_time.total_seconds()
+
+    if abs(seconds) < 60:
+        value, units = seconds, "secs"
+    elif abs(seconds) < 3600:
+        value, units = seconds / 60, "mins"
+    elif abs(seconds) < 86400:
+        value, units = seconds / 3600, "hours"
+    else:
+        value, units = seconds / 86400, "days"
+
+    return error_calculator.format_r_number(value) + " " + units
+
+
+# Forecasts a set of series with a local model in a pool of worker processes
+# Returns a generator of the position of the first series of each chunk and a matrix containing the forecasts of the chunk, in series order
+# The matrix has as many columns as the longest horizon of the chunk, and the forecasts of a series after its horizon are NaN
+#
+# Parameters
+# series - a list containing the training series or a RaggedSeries container
+# forecast_horizons - array containing the forecast horizon of each series
+# method - name of the local forecasting model
+# seasonality - seasonality of the dataset, e.g. 12 for monthly, or a list of seasonalities
+# workers - number of worker processes. None uses all available cores
+# timeout - maximum time in seconds to forecast a series with an R method
+# use_r - whether ses, theta and snaive are forecast with the R functions instead of the NumPy implementations
+# chunk_size - number of series sent to a worker process at once. If None, VECTORIZED_CHUNK_SIZE or SERIES_CHUNK_SIZE is used
+def iterate_local_forecasts(series, forecast_horizons, method, seasonality, workers=1, timeout=SERIES_TIMEOUT, use_r=False, chunk_size=None):
+    vectorized = method in VECTORIZED_METHODS and not use_r
+
+    if not vectorized and method not in R_METHODS:
+        raise Exception("Invalid method: " + method)
+
+    if chunk_size is None:
+        chunk_size = VECTORIZED_CHUNK_SIZE if vectorized else SERIES_CHUNK_SIZE
+
+    values, offsets = error_calculator.flatten_series(series)
+    forecast_horizons = np.asarray(forecast_horizons, dtype=np.int64)
+
+    chunk_starts = list(range(0, len(offsets) - 1, chunk_size)) + [len(offsets) - 1]
+    tasks = [
+        (values[offsets[start]:offsets[end]], offsets[start:end + 1] - offsets[start], forecast_horizons[start:end], method, seasonality, timeout, vectorized)
+        for start, end in zip(chunk_starts[:-1], chunk_starts[1:])
+    ]
+
+    if workers is not None and workers <= 1:
+        yield from zip(chunk_starts, map(_forecast_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers if workers is not None else os.cpu_count() or 1) as executor:
+            # map returns the results in the order of the chunks, so a chunk is returned after the chunks before it
+            yield from zip(chunk_starts, executor.map(_forecast_chunk, tasks))
+
+
+# Forecasts a chunk of series in a worker process
+# Returns a matrix containing the forecasts of the series
+#
+# Parameters
+# args - a tuple of the flat buffer and the boundaries of the series in the chunk, their forecast horizons, the method, the seasonality, the timeout and whether the NumPy implementation of the method is used
+def _forecast_chunk(args):
+    values, offsets, forecast_horizons, method, seasonality, timeout, vectorized = args
+
+    # The models use the longest seasonality as the frequency of the series, same as msts
+    frequency = int(math.floor(max(np.atleast_1d(seasonality))))
+
+    if vectorized:
+        return VECTORIZED_METHODS[method](values, offsets, forecast_horizons, frequency)
+
+    r_session = _get_r_session()
+    forecasts = np.full((len(forecast_horizons), int(np.max(forecast_horizons))), np.nan)
+
+    for i in range(len(forecast_horizons)):
+        series = values[offsets[i]:offsets[i + 1]]
+
+        try:
+            series_forecasts = _forecast_series_in_r(r_session, series, forecast_horizons[i], method, seasonality, timeout)
+        except Exception as e:
+            # Same as the tryCatch of the R functions, e.g. when an error is raised outside of them
+            warnings.warn("Failed to forecast a series with " + method + ": " + str(e))
+            series_forecasts = local_models.get_snaive_forecasts(series, np.array([0, len(series)]), forecast_horizons[i:i + 1], frequency)[0]
+
+        forecasts[i, :forecast_horizons[i]] = series_forecasts[:forecast_horizons[i]]
+
+    return forecasts
+
+
+# Returns the R session of the process, loading models/local_univariate_models.R when it is first used
+def _get_r_session():
+    if len(_R_SESSION) == 0:
+        try:
+            import rpy2.robjects as robjects
+        except ImportError:
+            raise Exception("The rpy2 package is required to forecast with the R models.")
+
+        robjects.r("suppressMessages(library(forecast))")
+        robjects.r["source"](BASE_DIR + "/models/local_univariate_models.R")
+
+        _R_SESSION["robjects"] = robjects
+        _R_SESSION["forecast_with_time_limit"] = robjects.r(_R_FORECAST_WITH_TIME_LIMIT)
+
+    return _R_SESSION
+
+
+# Forecasts a series with an R function of models/local_univariate_models.R
+#
+# Parameters
+# r_session - the R session of the process
+# series - a numpy array of series values
+# forecast_horizon - expected forecast horizon
+# method - name of the local forecasting model
+# seasonality - seasonality of the dataset, or a list of seasonalities
+# timeout - maximum time in seconds to forecast the series
+def _forecast_series_in_r(r_session, series, forecast_horizon, method, seasonality, timeout):
+    robjects = r_session["robjects"]
+
+    time_series = robjects.r["msts"](robjects.FloatVector(series), **{"seasonal.periods": robjects.FloatVector(np.atleast_1d(seasonality))})
+    forecasts = r_session["forecast_with_time_limit"](robjects.r["get_" + method + "_forecasts"], time_series, int(forecast_horizon), float(timeout))
+
+    return np.array(forecasts, dtype=np.float64)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the fixed horizon evaluation of a local model")
+    parser.add_argument("dataset_name", help="name of the dataset")
+    parser.add_argument("method", help="name of the local forecasting model: " + ", ".join(R_METHODS))
+    parser.add_argument("input_file_name", help="name of the .tsf file corresponding with the dataset")
+    parser.add_argument("--horizon", type=int, default=None, help="the required forecast horizon, if it is not available in the .tsf file")
+    parser.add_argument("--integer-conversion", action="store_true", help="round the forecasts")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes forecasting different series in parallel")
+    parser.add_argument("--timeout", type=float, default=SERIES_TIMEOUT, help="maximum time in seconds to forecast a series with an R model")
+    parser.add_argument("--use-r", action="store_true", help="forecast ses, theta and snaive with the R functions instead of NumPy")
+    args = parser.parse_args()
+
+    do_fixed_horizon_local_forecasting(args.dataset_name, args.method, args.input_file_name, args.horizon, args.integer_conversion, args.workers, args.timeout, args.use_r)
+
@@ -0,0 +1,76 @@
+import time
+import numpy as np
+import utils.error_calculator as error_calculator
+
+
+# The per-series loop of calculate_mase in utils/error_calculator.R, used as the reference for the benchmark
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+# training_set - a list containing the training series
+# seasonality - frequency of the dataset, e.g. 12 for monthly
+def calculate_mase_per_series(forecasts, test_set, training_set, seasonality):
+    mase_per_series = np.empty(len(forecasts))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k in range(len(forecasts)):
+            te = test_set[k][~np.isnan(test_set[k])]
+            tr = training_set[k][~np.isnan(training_set[k])]
+            f = forecasts[k][~np.isnan(forecasts[k])]
+
+            mase = np.nan
+            if seasonality < len(tr):
+                lag = int(seasonality)
+                mase = np.mean(np.abs(te - f)) / np.mean(np.abs(tr[lag:] - tr[:-lag]))
+
+            if np.isnan(mase):
+                mase = np.mean(np.abs(te - f)) / np.mean(np.abs(tr[1:] - tr[:-1]))
+
+            mase_per_series[k] = mase
+
+    return mase_per_series[np.isfinite(mase_per_series)]
+
+
+# Creates random training series of different lengths with a few missing values, and the test sets and forecasts of them
+#
+# Parameters
+# num_series - number of series
+# min_length - minimum length of the training series
+# max_length - maximum length of the training series
+# horizon - forecast horizon
+# seed - random seed
+def create_synthetic_sets(num_series, min_length, max_length, horizon, seed=1):
+    rng = np.random.default_rng(seed)
+
+    training_set = []
+    for length in rng.integers(min_length, max_length + 1, num_series):
+        series = rng.gamma(2, 50, length)
+        series[rng.random(length) < 0.01] = np.nan
+        training_set.append(series)
+
+    test_set = rng.gamma(2, 50, (num_series, horizon))
+    forecasts = test_set + rng.normal(0, 10, (num_series, horizon))
+
+    return forecasts, test_set, training_set
+
+
+if __name__ == "__main__":
+    # Short series make some seasonal scales unavailable, which exercises the lag 1 fallback
+    shapes = [("yearly", 20000, 10, 40, 6, 1), ("monthly", 50000, 20, 300, 18, 12), ("weekly", 20000, 40, 2000, 8, 365.25 / 7), ("hourly", 2000, 500, 20000, 48, 24)]
+
+    for shape_name, num_series, min_length, max_length, horizon, seasonality in shapes:
+        forecasts, test_set, training_set = create_synthetic_sets(num_series, min_length, max_length, horizon)
+
+        start_time = time.perf_counter()
+        expected = calculate_mase_per_series(forecasts, test_set, training_set, seasonality)
+        loop_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        actual = error_calculator.calculate_mase(forecasts, test_set, training_set, seasonality)
+        batched_time = time.perf_counter() - start_time
+
+        if len(expected) != len(actual) or not np.allclose(expected, actual, rtol=1e-12):
+            raise Exception("Batched MASE does not match the per-series MASE for " + shape_name + ".")
+
+        print(shape_name + ": per-series loop " + "%.3f" % loop_time + "s, batched " + "%.3f" % batched_time + "s (" + "%.1f" % (loop_time / batched_time) + "x)")
@@ -0,0 +1,279 @@
+import argparse
+from datetime import datetime
+import fnmatch
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import utils.data_loader as loader
+import utils.error_calculator as error_calculator
+from utils.atomic_write import open_atomically
+from utils.profiler import StageProfiler
+from utils.ragged_series import RaggedSeries
+
+BASE_DIR = "TSForecasting"
+
+BASELINE_PATH = BASE_DIR + "/results/benchmark_baselines/throughput.json"
+
+# A stage is reported as a regression when its throughput drops or its peak memory grows by more than this fraction of the baseline
+REGRESSION_TOLERANCE = 0.2
+
+# Datasets used by the benchmark
+# Each shape is given by name, number of series, minimum and maximum series length (equal for equal length series), attribute types, ratio of missing values and horizon
+BENCHMARK_SHAPES = [
+    ("many_short_series", 100000, 30, 30, ["string", "date"], 0.0, 6),
+    ("few_long_series", 500, 20000, 20000, ["string", "date"], 0.0, 48),
+    ("unequal_lengths", 20000, 50, 2000, ["string", "date"], 0.0, 18),
+    ("missing_values", 20000, 50, 2000, ["string", "date"], 0.1, 18),
+    ("numeric_attributes", 20000, 500, 500, ["string", "numeric", "numeric"], 0.0, 8),
+    ("many_attributes", 20000, 500, 500, ["string", "date", "numeric", "string", "date"], 0.02, 8),
+]
+
+
+# Writes a synthetic .tsf file with the same layout as tsf_data/sample.tsf
+# The first attribute of each series is its name, or its index if the attribute is numeric. The other attributes are random values of their types
+#
+# Parameters
+# file_path - path of the .tsf file to be created
+# num_series - number of series in the file
+# min_length - minimum number of values in a series
+# max_length - maximum number of values in a series. If equal to min_length, all series have the same length
+# attribute_types - list of attribute types: numeric, string or date
+# missing_ratio - fraction of the values that are written as missing (?)
+# horizon - forecast horizon written into the meta-data
+# seed - random seed used to generate the values
+def write_synthetic_tsf(file_path, num_series, min_length, max_length, attribute_types, missing_ratio=0.0, horizon=8, seed=1):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(min_length, max_length + 1, num_series)
+
+    attribute_columns = []
+    for i, attribute_type in enumerate(attribute_types):
+        if attribute_type == "numeric":
+            column = np.arange(1, num_series + 1) if i == 0 else rng.integers(0, 100000, num_series)
+        elif attribute_type == "string":
+            column = np.char.add("T", (np.arange(1, num_series + 1) if i == 0 else rng.integers(0, 1000, num_series)).astype(str))
+        elif attribute_type == "date":
+            start_dates = np.datetime64("2000-01-01T00:00:00") + rng.integers(0, 20 * 365, num_series).astype("timedelta64[D]") + rng.integers(0, 24, num_series).astype("timedelta64[h]")
+            column = pd.to_datetime(start_dates).strftime("%Y-%m-%d %H-%M-%S")
+        else:
+            raise Exception("Invalid attribute type.")
+
+        attribute_columns.append(np.asarray(column).astype(str))
+
+    with open(file_path, "w", encoding="cp1252") as output:
+        output.write("@relation synthetic\n")
+        for i, attribute_type in enumerate(attribute_types):
+            output.write("@attribute " + ("series_name" if i == 0 else "attribute_" + str(i)) + " " + attribute_type + "\n")
+        output.write("@frequency daily\n")
+        output.write("@horizon " + str(horizon) + "\n")
+        output.write("@missing " + str(missing_ratio > 0).lower() + "\n")
+        output.write("@equallength " + str(min_length == max_length).lower() + "\n")
+        output.write("@data\n")
+
+        for i in range(num_series):
+            values = np.char.mod("%.3f", rng.gamma(2, 50, lengths[i]))
+
+            if missing_ratio > 0:
+                missing = rng.random(lengths[i]) < missing_ratio
+                missing[0] = False # Each series needs at least one value
+                values[missing] = "?"
+
+            output.write(":".join(column[i] for column in attribute_columns) + ":" + ",".join(values) + "\n")
+
+
+# Runs a stage of the benchmark repeat times and returns the measurements of the fastest run
+# The peak memory is the largest peak of all runs
+#
+# Parameters
+# profiler - a StageProfiler recording the runs
+# stage - name of the stage
+# function - function running the stage
+# repeats - number of runs
+def time_stage(profiler, stage, function, repeats):
+    records = []
+
+    for _ in range(repeats):
+        with profiler.stage(stage):
+            result = function()
+        records.append(profiler.records[-1])
+
+    fastest = dict(min(records, key=lambda record: record["wall_time"]))
+    fastest["peak_rss"] = max(record["peak_rss"] for record in records)
+
+    return result, fastest
+
+
+# Times loading a .tsf file with convert_tsf_to_dataframe, splitting its series into training and test sets and calculating the errors of naive forecasts
+# Returns a dictionary containing the wall time, CPU time, throughput and peak memory of each stage
+#
+# Parameters
+# file_path - path of the .tsf file
+# repeats - number of runs of each stage. The fastest run is reported
+# workers - number of processes used to parse the data section
+def benchmark_dataset(file_path, repeats=3, workers=1):
+    profiler = StageProfiler(os.path.basename(file_path))
+    file_size = os.path.getsize(file_path) / (1024 * 1024)
+
+    (df, frequency, forecast_horizon, contain_missing_values, contain_equal_length), load = time_stage(
+        profiler, "load", lambda: loader.convert_tsf_to_dataframe(file_path, workers=workers), repeats)
+
+    # The same split as in prepare_dataset of experiments/deep_learning_experiments.py
+    def split_dataset():
+        train_series, test_series = RaggedSeries.from_dataframe(df).train_test_split(forecast_horizon)
+        return train_series, test_series.to_matrix()
+
+    (train_series, test_set), split = time_stage(profiler, "split", split_dataset, repeats)
+
+    # Naive forecasts, i.e. the last training value of each series, repeated for the horizon
+    last_values = pd.DataFrame(train_series.to_matrix(np.nan)).ffill(axis=1).to_numpy()[:, -1] if len(train_series) > 0 else np.empty(0)
+    forecasts = np.repeat(last_values[:, None], forecast_horizon, axis=1)
+    forecasts[np.isnan(test_set)] = np.nan # The errors are calculated over the values that are not missing in both
+
+    # The same errors as calculate_errors, without writing them into files
+    def calculate_errors():
+        return (error_calculator.calculate_smape(forecasts, test_set),
+                error_calculator.calculate_msmape(forecasts, test_set),
+                error_calculator.calculate_mase(forecasts, test_set, train_series, 7),
+                error_calculator.calculate_mae(forecasts, test_set),
+                error_calculator.calculate_rmse(forecasts, test_set))
+
+    _, evaluate = time_stage(profiler, "evaluate", calculate_errors, repeats)
+
+    num_series = len(df)
+    results = {}
+
+    for record in [load, split, evaluate]:
+        results[record["stage"]] = {
+            "wall_time": record["wall_time"],
+            "cpu_time": record["cpu_time"],
+            "mb_per_second": file_size / record["wall_time"],
+            "series_per_second": num_series / record["wall_time"],
+            "peak_rss": record["peak_rss"],
+            "peak_rss_scope": record["peak_rss_scope"],
+        }
+
+    return {"file_size": file_size, "num_series": num_series, "stages": results}
+
+
+# Compares benchmark results against a baseline
+# Returns a list of messages describing the stages whose throughput dropped or whose peak memory grew by more than the tolerance
+#
+# Parameters
+# results - dictionary of dataset names and results returned by benchmark_dataset
+# baseline - dictionary of the same layout containing the baseline results
+# tolerance - allowed relative change
+def find_regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    regressions = []
+
+    for shape_name, result in results.items():
+        if shape_name not in baseline:
+            continue
+
+        for stage, measurements in result["stages"].items():
+            expected = baseline[shape_name]["stages"].get(stage)
+            if expected is None:
+                continue
+
+            if measurements["series_per_second"] < expected["series_per_second"] * (1 - tolerance):
+                regressions.append(shape_name + " " + stage + ": " + "%.0f" % measurements["series_per_second"] + " series/s, baseline " + "%.0f" % expected["series_per_second"] + " series/s")
+
+            # Peak memory of different scopes cannot be compared
+            if measurements["peak_rss_scope"] == expected["peak_rss_scope"] and measurements["peak_rss"] > expected["peak_rss"] * (1 + tolerance):
+                regressions.append(shape_name + " " + stage + ": peak memory " + "%.1f" % (measurements["peak_rss"] / 1024 ** 2) + " MB, baseline " + "%.1f" % (expected["peak_rss"] / 1024 ** 2) + " MB")
+
+    return regressions
+
+
+# Reads the benchmark results saved by save_baseline. Returns None if the file does not exist
+#
+# Parameters
+# baseline_path - path of the baseline file
+def load_baseline(baseline_path):
+    if not os.path.exists(baseline_path):
+        return None
+
+    with open(baseline_path, "r") as file:
+        return json.load(file)["results"]
+
+
+# Saves benchmark results as a baseline, together with a description of the machine as the throughput depends on it
+#
+# Parameters
+# results - dictionary of dataset names and results returned by benchmark_dataset
+# baseline_path - path of the baseline file
+def save_baseline(results, baseline_path):
+    baseline = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": results,
+    }
+
+    with open_atomically(baseline_path, "w") as output:
+        json.dump(baseline, output, indent=2)
+
+
+# Benchmarks loading, splitting and evaluating synthetic datasets of different shapes
+# The results are compared against the saved baseline, if any, and the script exits with an error if a stage regressed
+# Example: python experiments/throughput_benchmark.py --scale 0.1 --save-baseline
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the throughput of loading, splitting and evaluating datasets")
+    parser.add_argument("--shapes", action="append", default=None, metavar="PATTERN", help="benchmark only the shapes matching the pattern, e.g. 'missing_*' (can be repeated)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the number of series of each shape, e.g. 0.1 for a quick run")
+    parser.add_argument("--repeats", type=int, default=3, help="number of runs of each stage. The fastest run is reported")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes used to parse the data section")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="path of the baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="allowed relative drop of throughput or growth of peak memory before a stage is reported as a regression")
+    args = parser.parse_args()
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for shape_name, num_series, min_length, max_length, attribute_types, missing_ratio, horizon in BENCHMARK_SHAPES:
+            if args.shapes is not None and not any(fnmatch.fnmatch(shape_name, pattern) for pattern in args.shapes):
+                continue
+
+            file_path = os.path.join(temp_dir, shape_name + ".tsf")
+            write_synthetic_tsf(file_path, max(1, int(num_series * args.scale)), min_length, max_length, attribute_types, missing_ratio, horizon)
+
+            results[shape_name] = result = benchmark_dataset(file_path, args.repeats, args.workers)
+            os.remove(file_path)
+
+            print(shape_name + ": " + str(result["num_series"]) + " series, " + "%.1f" % result["file_size"] + " MB")
+            for stage, measurements in result["stages"].items():
+                print("  " + stage + ": " + "%.3f" % measurements["wall_time"] + "s, " + "%.1f" % measurements["mb_per_second"] + " MB/s, " + "%.0f" % measurements["series_per_second"] + " series/s, peak memory " + "%.1f" % (measurements["peak_rss"] / 1024 ** 2) + " MB")
+
+    # The results of different scales are not comparable, so the scale is part of the dataset names in the baseline
+    if args.scale != 1.0:
+        results = {shape_name + "@" + str(args.scale): result for shape_name, result in results.items()}
+
+    baseline = load_baseline(args.baseline)
+    regressions = find_regressions(results, baseline, args.tolerance) if baseline is not None else []
+
+    if args.save_baseline:
+        save_baseline(dict(baseline or {}, **results), args.baseline)
+        print("Saved baseline: " + args.baseline)
+
+    if baseline is None:
+        if not args.save_baseline:
+            print("No baseline found at " + args.baseline)
+    elif len(regressions) > 0:
+        print("Regressions compared to the baseline:")
+        for regression in regressions:
+            print("  " + regression)
+        if not args.save_baseline:
+            sys.exit(1)
+    else:
+        print("No regressions compared to the baseline")
@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+
+import utils.global_model_helper as global_model_helper
+from utils.window_sampler import WindowSampler
+
+# Implementation of the pooled regression global model of models/global_models.R, trained from sampled minibatches
+# The embedded matrix is never created, so the memory usage depends on the minibatch size instead of the dataset size
+
+# The number of windows in a training minibatch
+BATCH_SIZE = 4096
+
+
+# Forecasting with different lags
+#
+# Parameters
+# dataset - a list containing the training series or a RaggedSeries container
+# lag - the number of past lags used to predict the next value
+# forecast_horizon - the number of future values to be forecast
+# series_weights - array containing a sampling weight per series. If None, all training windows are equally likely
+# seed - random seed of the window sampler
+# batch_size - the number of windows in a training minibatch
+# num_batches - the number of training minibatches. If None, the number of windows divided by batch_size is used, so about as many windows are sampled as there are rows in the embedded matrix
+def start_forecasting(dataset, lag, forecast_horizon, series_weights=None, seed=1, batch_size=BATCH_SIZE, num_batches=None):
+    sampler = WindowSampler(dataset, lag + 1, series_weights, seed)
+
+    series_means = global_model_helper.get_series_means(sampler.series) # Mean value of each series
+    final_lags = global_model_helper.get_final_lags(sampler.series, lag, series_means) # Test set
+
+    if num_batches is None:
+        num_batches = max(1, math.ceil(np.sum(sampler.num_windows) / batch_size))
+
+    coefficients = fit_pooled_regression(sampler, series_means, num_batches, batch_size)
+
+    return forec_recursive(lag, coefficients, final_lags, forecast_horizon, series_means)
+
+
+# Fits a pooled regression model, a linear regression of the target on the lags without an intercept as glm in models/global_models.R
+# The normal equations are accumulated over the minibatches, so only a lag x lag matrix is kept between them
+# Returns the coefficients of Lag1, ..., Lag<lag>
+#
+# Parameters
+# sampler - WindowSampler sampling windows of lag + 1 values
+# series_means - array containing the mean of each series used to normalise its values
+# num_batches - the number of training minibatches
+# batch_size - the number of windows in a training minibatch
+def fit_pooled_regression(sampler, series_means, num_batches, batch_size=BATCH_SIZE):
+    lag = sampler.window_length - 1
+    lags_cross_product = np.zeros((lag, lag))
+    lags_target_product = np.zeros(lag)
+
+    for _ in range(num_batches):
+        lags, targets = sampler.sample_lags_and_targets(batch_size, series_means, dtype=np.float64)
+        lags_cross_product += lags.T @ lags
+        lags_target_product += lags.T @ targets
+
+    return np.linalg.lstsq(lags_cross_product, lags_target_product, rcond=None)[0]
+
+
+# Recursive forecasting of the series until a given horizon
+#
+# Parameters
+# lag - the number of past lags used to predict the next value
+# coefficients - coefficients of the pooled regression model
+# final_lags - matrix containing the last lag values of each series in reverse order, mean normalised
+# forecast_horizon - the number of future values to be forecast
+# series_means - array containing the mean of each series
+def forec_recursive(lag, coefficients, final_lags, forecast_horizon, series_means):
+    # This will store the predictions corresponding with each horizon
+    predictions = np.empty((len(final_lags), forecast_horizon))
+
+    for i in range(forecast_horizon):
+        # Get predictions for the current horizon
+        predictions[:, i] = final_lags @ coefficients
+
+        # Updating the test set for the next horizon
+        final_lags = np.column_stack((predictions[:, i], final_lags[:, :lag - 1]))
+
+    # Renormalise the predictions
+    return predictions * series_means[:, None]
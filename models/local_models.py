@@ -0,0 +1,334 @@
+import numpy as np
+
+# Implementations of the SES, Theta and seasonal naive models of models/local_univariate_models.R, fitted for all series of a dataset at once
+# The series are given as one flat buffer and their boundaries, and the smoothing recursions run over the time steps with NumPy operations across the series, instead of fitting one series at a time
+#
+# Each function takes 4 parameters
+# values - flat buffer containing the values of all series, with NaN for missing values
+# offsets - array of length (number of series + 1) containing the series boundaries, where series i is values[offsets[i]:offsets[i + 1]]
+# forecast_horizons - array containing the forecast horizon of each series
+# seasonality - the seasonal period of the series, e.g. 12 for monthly. Series with several seasonalities use the longest period, same as msts
+#
+# Each function returns a matrix with one row per series and as many columns as the longest horizon. The forecasts of a series after its own horizon are NaN
+# If a model fails to provide forecasts for a series, e.g. because it has no values, it returns snaive forecasts for that series
+
+# Bounds of the smoothing parameter of SES, same as ets
+ALPHA_BOUNDS = (0.0001, 0.9999)
+
+# Number of smoothing parameters evaluated for each series in each round of the search
+ALPHA_GRID_SIZE = 11
+
+# Number of rounds of the search. Each round searches around the best smoothing parameter of the previous round with a 5 times finer grid
+ALPHA_SEARCH_ROUNDS = 6
+
+# Seasonal indices smaller than this make the Theta method non-seasonal, same as thetaf
+MIN_SEASONAL_INDEX = 1e-4
+
+# Maximum number of values in the matrix used to calculate autocorrelations with FFT
+AUTOCORRELATION_CHUNK_SIZE = 2 ** 24
+
+
+# Calculate simple exponential smoothing forecasts
+def get_ses_forecasts(values, offsets, forecast_horizons, seasonality):
+    levels, _ = fit_ses(values, offsets)
+    forecasts = np.repeat(levels[:, None], _max_horizon(forecast_horizons), axis=1)
+
+    return _with_snaive_fallback(forecasts, values, offsets, forecast_horizons, seasonality)
+
+
+# Calculate theta forecasts, same as thetaf
+# The series that are seasonal according to the autocorrelation test of thetaf are seasonally adjusted with a classical multiplicative decomposition before fitting, and their forecasts are reseasonalised
+def get_theta_forecasts(values, offsets, forecast_horizons, seasonality):
+    seasonality = int(seasonality)
+    lengths = np.diff(offsets)
+    series_ids = np.repeat(np.arange(len(lengths)), lengths)
+    steps = np.arange(_max_horizon(forecast_horizons))
+
+    seasonal, failed = _test_seasonality(values, offsets, seasonality)
+    adjusted = values
+
+    if seasonal.any():
+        seasonal_indices = _get_seasonal_indices(values, offsets, seasonality, seasonal)
+
+        # thetaf uses the non-seasonal method if a seasonal index is close to zero
+        usable = np.all(np.abs(seasonal_indices) >= MIN_SEASONAL_INDEX, axis=1)
+        failed[seasonal] |= ~np.all(np.isfinite(seasonal_indices), axis=1)
+        seasonal_indices = seasonal_indices[usable]
+        seasonal[seasonal] = usable
+
+        positions = np.arange(len(values)) - offsets[:-1][series_ids]
+        index_rows = np.cumsum(seasonal) - 1
+
+        adjusted = values.copy()
+        seasonal_values = seasonal[series_ids]
+        adjusted[seasonal_values] /= seasonal_indices[index_rows[series_ids[seasonal_values]], positions[seasonal_values] % seasonality]
+
+    levels, alphas = fit_ses(adjusted, offsets)
+    slopes = _get_trend_slopes(adjusted, offsets) / 2
+    alphas = np.maximum(1e-10, alphas)
+
+    forecasts = levels[:, None] + slopes[:, None] * (steps + ((1 - (1 - alphas) ** lengths) / alphas)[:, None])
+
+    if seasonal.any():
+        forecasts[seasonal] *= seasonal_indices[np.arange(len(seasonal_indices))[:, None], (lengths[seasonal][:, None] + steps) % seasonality]
+
+    forecasts[failed] = np.nan
+
+    return _with_snaive_fallback(forecasts, values, offsets, forecast_horizons, seasonality)
+
+
+# Calculate snaive forecasts, repeating the last seasonal period of each series
+# Series shorter than a seasonal period are forecast with their last value
+def get_snaive_forecasts(values, offsets, forecast_horizons, seasonality):
+    seasonality = int(seasonality)
+    lengths = np.diff(offsets)
+    steps = np.arange(_max_horizon(forecast_horizons))
+
+    lags = np.where(lengths >= seasonality, seasonality, 1)
+    positions = offsets[1:, None] - lags[:, None] + steps % lags[:, None]
+
+    forecasts = np.full(positions.shape, np.nan)
+    has_values = lengths > 0
+    forecasts[has_values] = values[positions[has_values]]
+
+    return _mask_after_horizons(forecasts, forecast_horizons)
+
+
+# Fits simple exponential smoothing models, same as ses with ets(model = "ANN", opt.crit = "mse")
+# Returns the final level and the smoothing parameter of each series. Series without values get NaN
+# For a given smoothing parameter, the one-step errors are linear in the initial level, so the initial level minimising the MSE has a closed form. The smoothing parameter is found with a grid search refined around the best value of each series
+# Missing values are skipped, so the level is carried over them
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+def fit_ses(values, offsets):
+    lengths = np.diff(offsets)
+    num_series = len(lengths)
+    series_ids = np.repeat(np.arange(num_series), lengths)
+
+    # The series are centred, as the errors are the same for a shifted series
+    valid = ~np.isnan(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.bincount(series_ids[valid], values[valid], num_series) / np.bincount(series_ids[valid], minlength=num_series)
+    centred = values - means[series_ids]
+
+    grid = np.linspace(ALPHA_BOUNDS[0], ALPHA_BOUNDS[1], ALPHA_GRID_SIZE)
+    alphas = np.repeat(grid[None, :], num_series, axis=0)
+    step = grid[1] - grid[0]
+
+    for _ in range(ALPHA_SEARCH_ROUNDS):
+        errors, levels = _ses_errors(centred, offsets, alphas)
+        best = np.argmin(np.where(np.isnan(errors), np.inf, errors), axis=1)
+        best_alphas = alphas[np.arange(num_series), best]
+
+        # The next grid covers the neighbours of the best smoothing parameter
+        low = np.maximum(ALPHA_BOUNDS[0], best_alphas - step)
+        high = np.minimum(ALPHA_BOUNDS[1], best_alphas + step)
+        alphas = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, ALPHA_GRID_SIZE)
+        step = 2 * step / (ALPHA_GRID_SIZE - 1)
+
+    return levels[np.arange(num_series), best] + means, best_alphas
+
+
+# Runs the SES recursion of all series for several smoothing parameters per series with an initial level of 0
+# Returns the sum of squared one-step errors with the best initial level and the final level of each series and smoothing parameter
+# The time steps are looped over, and at each step only the series longer than the step are updated. The series are sorted by decreasing length, so they are the first rows of the state
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - series boundaries
+# alphas - matrix with one row per series containing the smoothing parameters to evaluate
+def _ses_errors(values, offsets, alphas):
+    lengths = np.diff(offsets)
+    order = np.argsort(-lengths, kind="stable")
+    starts = offsets[:-1][order]
+    alphas = alphas[order]
+    max_length = int(lengths.max()) if len(lengths) > 0 else 0
+
+    # Number of series longer than each time step
+    active_counts = len(lengths) - np.cumsum(np.bincount(lengths, minlength=max_length + 1))
+
+    levels = np.zeros(alphas.shape)
+    weights = np.ones(alphas.shape) # The coefficient of the initial level in the current level
+    squared_errors = np.zeros(alphas.shape)
+    weighted_errors = np.zeros(alphas.shape)
+    squared_weights = np.zeros(alphas.shape)
+
+    decays = 1 - alphas
+    has_missing_values = np.isnan(values).any()
+
+    for t in range(max_length):
+        k = active_counts[t]
+        y = values[starts[:k] + t][:, None]
+        errors = y - levels[:k]
+
+        # Missing values give no error and leave the level and the weight unchanged
+        if has_missing_values:
+            valid = ~np.isnan(y)
+            errors[~valid[:, 0]] = 0
+            squared_weights[:k] += np.where(valid, weights[:k] ** 2, 0)
+            squared_errors[:k] += errors ** 2
+            weighted_errors[:k] += errors * weights[:k]
+            weights[:k] *= np.where(valid, decays[:k], 1)
+        else:
+            squared_weights[:k] += weights[:k] ** 2
+            squared_errors[:k] += errors ** 2
+            weighted_errors[:k] += errors * weights[:k]
+            weights[:k] *= decays[:k]
+
+        errors *= alphas[:k]
+        levels[:k] += errors
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        initial_levels = weighted_errors / squared_weights
+        sum_squared_errors = squared_errors - weighted_errors * initial_levels
+
+    results = np.empty((2,) + alphas.shape)
+    results[:, order] = [sum_squared_errors, levels + weights * initial_levels]
+
+    return results[0], results[1]
+
+
+# Tests which series are seasonal, same as thetaf: the series that are not constant and longer than two seasonal periods, with a significant autocorrelation at the seasonal lag at the 90% level
+# Returns a boolean array of the seasonal series and a boolean array of the series that cannot be tested, as acf fails for series with missing values
+def _test_seasonality(values, offsets, seasonality):
+    lengths = np.diff(offsets)
+    seasonal = np.zeros(len(lengths), dtype=bool)
+    failed = np.zeros(len(lengths), dtype=bool)
+
+    if seasonality <= 1:
+        return seasonal, failed
+
+    has_values = lengths > 0
+    maximums = np.full(len(lengths), np.nan)
+    minimums = np.full(len(lengths), np.nan)
+    with np.errstate(invalid="ignore"):
+        maximums[has_values] = np.fmax.reduceat(values, offsets[:-1][has_values])
+        minimums[has_values] = np.fmin.reduceat(values, offsets[:-1][has_values])
+
+    candidates = (lengths > 2 * seasonality) & (maximums != minimums)
+
+    missing_counts = np.zeros(len(lengths), dtype=np.int64)
+    missing_counts[has_values] = np.add.reduceat(np.isnan(values), offsets[:-1][has_values], dtype=np.int64)
+    failed = candidates & (missing_counts > 0)
+    candidates &= ~failed
+
+    indices = np.flatnonzero(candidates)
+    if len(indices) > 0:
+        autocorrelations = _get_autocorrelations(values, offsets, indices, seasonality)
+        statistics = np.sqrt((1 + 2 * np.sum(autocorrelations[:, :-1] ** 2, axis=1)) / lengths[indices])
+        seasonal[indices] = np.abs(autocorrelations[:, -1]) / statistics > 1.6448536269514722 # qnorm(0.95)
+
+    return seasonal, failed
+
+
+# Returns the autocorrelations at lags 1, ..., max_lag of the given series, same as acf
+# The autocovariances are calculated with FFT for groups of series of similar lengths
+def _get_autocorrelations(values, offsets, indices, max_lag):
+    lengths = np.diff(offsets)[indices]
+    order = np.argsort(lengths, kind="stable")
+    autocorrelations = np.empty((len(indices), max_lag))
+
+    start = 0
+    while start < len(order):
+        # The longest series of a group is its last one, so the group is as large as possible within the chunk size
+        width = int(lengths[order[start]])
+        end = start + 1
+        while end < len(order) and (end - start + 1) * 2 * lengths[order[end]] <= AUTOCORRELATION_CHUNK_SIZE:
+            width = int(lengths[order[end]])
+            end = end + 1
+
+        group = indices[order[start:end]]
+        matrix = np.zeros((len(group), width))
+        for row, i in enumerate(group):
+            series = values[offsets[i]:offsets[i + 1]]
+            matrix[row, :len(series)] = series - np.mean(series)
+
+        spectrum = np.fft.rfft(matrix, n=2 * width, axis=1)
+        autocovariances = np.fft.irfft(spectrum * np.conj(spectrum), n=2 * width, axis=1)[:, :max_lag + 1]
+        autocorrelations[order[start:end]] = autocovariances[:, 1:] / autocovariances[:, :1]
+
+        start = end
+
+    return autocorrelations
+
+
+# Returns the seasonal indices of the given series from a classical multiplicative decomposition, same as decompose(type = "multiplicative")
+# The trend is a centred moving average over one seasonal period, and the index of each position in the period is the mean ratio of the values to the trend, normalised to have a mean of 1
+# Returns a matrix with one row per selected series and one column per position in the seasonal period
+def _get_seasonal_indices(values, offsets, seasonality, selected):
+    lengths = np.diff(offsets)
+    series_ids = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.arange(len(values)) - offsets[:-1][series_ids]
+
+    # Moving sums over the flat buffer from cumulative sums. Even periods use half weights for the two end values
+    half_width = seasonality // 2
+    cumulative_sums = np.concatenate(([0], np.cumsum(np.nan_to_num(values))))
+    cumulative_missing = np.concatenate(([0], np.cumsum(np.isnan(values))))
+
+    inside = (positions >= half_width) & (positions < lengths[series_ids] - half_width)
+    window_starts = np.where(inside, np.arange(len(values)) - half_width, 0)
+    window_ends = np.where(inside, np.arange(len(values)) + half_width + 1, 0)
+
+    if seasonality % 2 == 0:
+        sums = (cumulative_sums[window_ends - 1] - cumulative_sums[window_starts]) + (cumulative_sums[window_ends] - cumulative_sums[window_starts + 1])
+        trend = sums / (2 * seasonality)
+    else:
+        trend = (cumulative_sums[window_ends] - cumulative_sums[window_starts]) / seasonality
+
+    complete = inside & (cumulative_missing[window_ends] == cumulative_missing[window_starts]) & selected[series_ids]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = values[complete] / trend[complete]
+
+    rows = (np.cumsum(selected) - 1)[series_ids[complete]]
+    bins = rows * seasonality + positions[complete] % seasonality
+    num_bins = int(np.sum(selected)) * seasonality
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indices = (np.bincount(bins, ratios, num_bins) / np.bincount(bins, minlength=num_bins)).reshape(-1, seasonality)
+        return indices / np.mean(indices, axis=1, keepdims=True)
+
+
+# Returns the slope of the least squares line of each series against time, same as lsfit(0:(n - 1), x)$coef[2]. Missing values are left out
+def _get_trend_slopes(values, offsets):
+    lengths = np.diff(offsets)
+    num_series = len(lengths)
+    series_ids = np.repeat(np.arange(num_series), lengths)
+    times = (np.arange(len(values)) - offsets[:-1][series_ids]).astype(np.float64)
+
+    valid = ~np.isnan(values)
+    series_ids, times, values = series_ids[valid], times[valid], values[valid]
+    counts = np.bincount(series_ids, minlength=num_series)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centred_times = times - (np.bincount(series_ids, times, num_series) / counts)[series_ids]
+        centred_values = values - (np.bincount(series_ids, values, num_series) / counts)[series_ids]
+
+        return np.bincount(series_ids, centred_times * centred_values, num_series) / np.bincount(series_ids, centred_times ** 2, num_series)
+
+
+# Replaces the forecasts of the series whose forecasts are not finite with snaive forecasts, as the R models do when they fail
+def _with_snaive_fallback(forecasts, values, offsets, forecast_horizons, seasonality):
+    forecasts = _mask_after_horizons(forecasts, forecast_horizons)
+    failed = ~np.all(np.isfinite(forecasts) | (np.arange(forecasts.shape[1]) >= np.asarray(forecast_horizons)[:, None]), axis=1)
+
+    if failed.any():
+        forecasts[failed] = get_snaive_forecasts(values, offsets, forecast_horizons, seasonality)[failed]
+
+    return forecasts
+
+
+def _mask_after_horizons(forecasts, forecast_horizons):
+    forecasts[np.arange(forecasts.shape[1]) >= np.asarray(forecast_horizons)[:, None]] = np.nan
+    return forecasts
+
+
+def _max_horizon(forecast_horizons):
+    return int(np.max(forecast_horizons)) if len(forecast_horizons) > 0 else 0
+
+
+# Example of usage
+# values, offsets = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 5.0, 4.0]), np.array([0, 4, 7])
+# forecasts = get_theta_forecasts(values, offsets, np.array([2, 3]), 1)
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules are imported from the repository folder as in the experiments, e.g. utils.data_loader
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+SAMPLE_TSF = os.path.join(REPO_DIR, "tsf_data", "sample.tsf")
+
+
+# Writes a small .tsf file with series of different lengths, missing values and a date attribute
+# Returns the file path and the list of series values, with NaN for the missing values
+#
+# Parameters
+# path - path of the .tsf file
+# num_series - number of series
+# seed - seed of the random values
+def write_test_tsf(path, num_series=40, seed=0):
+    rng = np.random.default_rng(seed)
+    all_series = []
+
+    lines = [
+        "# A test dataset",
+        "@relation test",
+        "@attribute series_name string",
+        "@attribute start_timestamp date",
+        "@frequency monthly",
+        "@horizon 6",
+        "@missing true",
+        "@equallength false",
+        "@data",
+    ]
+
+    for i in range(num_series):
+        values = np.round(rng.gamma(2, 50, rng.integers(8, 60)), 3)
+        if i % 5 == 0:
+            values[rng.integers(0, len(values), 2)] = np.nan
+
+        all_series.append(values)
+        texts = ["?" if np.isnan(value) else repr(float(value)) for value in values]
+        lines.append("T" + str(i + 1) + ":2010-0" + str(i % 9 + 1) + "-01 00-00-00:" + ",".join(texts))
+
+    with open(path, "w", encoding="cp1252") as output:
+        output.write("\n".join(lines) + "\n")
+
+    return path, all_series
+
+
+@pytest.fixture
+def test_tsf(tmp_path):
+    return write_test_tsf(str(tmp_path / "test.tsf"))
@@ -0,0 +1,197 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.data_loader as loader
+from conftest import SAMPLE_TSF
+
+
+# The series values parsed one value at a time, as the loader did before parsing them in bulk
+def _parse_values_one_by_one(full_file_path_and_name, replace_missing_vals_with="NaN"):
+    all_series = []
+
+    with open(full_file_path_and_name, "r", encoding="cp1252") as file:
+        in_data_section = False
+
+        for line in file:
+            line = line.strip()
+
+            if line.startswith("@data"):
+                in_data_section = True
+            elif in_data_section and line and not line.startswith("#"):
+                numeric_series = []
+                for val in line.split(":")[-1].split(","):
+                    if val == "?":
+                        numeric_series.append(replace_missing_vals_with)
+                    else:
+                        numeric_series.append(float(val))
+
+                all_series.append(pd.Series(numeric_series).array)
+
+    return all_series
+
+
+def test_bulk_parsing_matches_value_by_value_parsing(test_tsf):
+    path, _ = test_tsf
+
+    for replace_missing_vals_with in ["NaN", 0, -1.5]:
+        loaded_data, _, _, _, _ = loader.convert_tsf_to_dataframe(path, replace_missing_vals_with)
+        expected = _parse_values_one_by_one(path, replace_missing_vals_with)
+
+        assert len(loaded_data) == len(expected)
+        for values, expected_values in zip(loaded_data["series_value"], expected):
+            assert list(values) == list(expected_values)
+
+
+def test_bulk_parsing_of_sample_dataset():
+    loaded_data, frequency, forecast_horizon, contain_missing_values, contain_equal_length = loader.convert_tsf_to_dataframe(SAMPLE_TSF)
+    expected = _parse_values_one_by_one(SAMPLE_TSF)
+
+    assert (frequency, forecast_horizon, contain_missing_values, contain_equal_length) == ("weekly", 8, False, True)
+    assert len(loaded_data) == 299
+    for values, expected_values in zip(loaded_data["series_value"], expected):
+        np.testing.assert_array_equal(np.asarray(values, dtype=np.float64), np.asarray(expected_values, dtype=np.float64))
+
+
+def test_parse_series_values():
+    values, missing = loader.parse_series_values("1.5,?,3,-2e3")
+
+    np.testing.assert_array_equal(values, [1.5, np.nan, 3, -2000])
+    np.testing.assert_array_equal(missing, [False, True, False, False])
+    assert loader.parse_series_values("1,2")[1] is None
+
+
+@pytest.mark.parametrize("series", ["1,nan,3", "nan", "1,?,NaN", "1,abc", "1,,2"])
+def test_parse_series_values_rejects_values_that_are_not_numeric(series):
+    with pytest.raises(Exception):
+        loader.parse_series_values(series)
+
+    with pytest.raises(Exception, match="line 1"):
+        list(loader._iterate_tsf_data([series], [], []))
+
+
+def test_parse_dates():
+    dates = loader.parse_dates(["2010-01-01 00-00-00", "1677-09-22 00-00-00", "2010-01-01 00-00-00", "2262-04-11 00-00-00"])
+
+    assert dates.dtype == np.dtype("datetime64[ns]")
+    np.testing.assert_array_equal(dates, np.array(["2010-01-01", "1677-09-22", "2010-01-01", "2262-04-11"], dtype="datetime64[ns]"))
+
+
+@pytest.mark.parametrize("date", ["1500-01-01 00-00-00", "2300-01-01 00-00-00", "2010-13-01 00-00-00", "2010-01-01"])
+def test_parse_dates_rejects_invalid_dates(date):
+    with pytest.raises(Exception, match="Invalid date attribute value: " + date):
+        loader.parse_dates(["2010-01-01 00-00-00", date])
+
+
+def test_dates_out_of_range_are_rejected_when_loading(tmp_path):
+    path = str(tmp_path / "old.tsf")
+    with open(path, "w", encoding="cp1252") as output:
+        output.write("@relation old\n@attribute series_name string\n@attribute start_timestamp date\n@frequency yearly\n@missing false\n@equallength false\n@data\n"
+                     "T1:2010-01-01 00-00-00:1,2,3\nT2:1500-01-01 00-00-00:4,5\n")
+
+    with pytest.raises(Exception, match="Invalid date attribute value: 1500-01-01 00-00-00"):
+        loader.convert_tsf_to_dataframe(path)
+
+
+def _assert_same_dataframes(loaded, expected):
+    assert loaded[1:] == expected[1:]
+    assert loaded[0]["series_name"].tolist() == expected[0]["series_name"].tolist()
+    assert loaded[0]["start_timestamp"].tolist() == expected[0]["start_timestamp"].tolist()
+    for values, expected_values in zip(loaded[0]["series_value"], expected[0]["series_value"]):
+        assert list(values) == list(expected_values)
+
+
+def test_parallel_parsing_matches_serial_parsing(test_tsf):
+    path, _ = test_tsf
+    expected = loader.convert_tsf_to_dataframe(path)
+
+    for workers in [2, 3, None]:
+        _assert_same_dataframes(loader.convert_tsf_to_dataframe(path, workers=workers), expected)
+
+
+def test_byte_ranges_end_at_line_boundaries(test_tsf):
+    path, _ = test_tsf
+
+    with open(path, "rb") as file:
+        content = file.read()
+
+    data_start = content.index(b"@data\n") + len(b"@data\n")
+    byte_ranges = loader.split_tsf_data_section(path, data_start, 7)
+
+    assert byte_ranges[0][0] == data_start and byte_ranges[-1][1] == len(content)
+    for (_, end), (start, _) in zip(byte_ranges[:-1], byte_ranges[1:]):
+        assert end == start and content[end - 1:end] == b"\n"
+
+
+def test_parallel_parsing_reports_the_line_of_an_invalid_series(test_tsf, tmp_path):
+    path, _ = test_tsf
+
+    with open(path, "r", encoding="cp1252") as file:
+        lines = file.read().split("\n")
+    lines[30] = "T99:2010-01-01 00-00-00"
+
+    invalid_path = str(tmp_path / "invalid.tsf")
+    with open(invalid_path, "w", encoding="cp1252") as output:
+        output.write("\n".join(lines))
+
+    messages = []
+    for workers in [1, 3]:
+        with pytest.raises(Exception) as error:
+            loader.convert_tsf_to_dataframe(invalid_path, workers=workers)
+        messages.append(str(error.value))
+
+    assert messages[0] == messages[1]
+    assert "(line 31)" in messages[0]
+
+
+@pytest.mark.parametrize("extension, compression", [("", None), (".gz", "gzip"), (".bz2", "bz2"), (".xz", "xz")])
+def test_written_tsf_round_trip(test_tsf, tmp_path, extension, compression):
+    path, _ = test_tsf
+    expected = loader.convert_tsf_to_dataframe(path)
+
+    output_path = str(tmp_path / ("written.tsf" + extension))
+    loader.convert_dataframe_to_tsf(output_path, *expected)
+
+    assert loader.get_tsf_compression(output_path) == compression
+    _assert_same_dataframes(loader.convert_tsf_to_dataframe(output_path), expected)
+
+    # The values are written with the shortest text giving back the same value, same as the test file, except for integers written without decimals
+    with open(path, "r", encoding="cp1252") as file:
+        expected_lines = re.sub(r"\.0(?=[,\n])", "", file.read().split("@data\n")[1])
+    with loader.open_tsf_file(output_path) as file:
+        assert file.read().split("@data\n")[1] == expected_lines
+
+
+def test_written_zstd_tsf_round_trip(test_tsf, tmp_path):
+    pytest.importorskip("zstandard")
+    test_written_tsf_round_trip(test_tsf, tmp_path, ".zst", "zstd")
+
+
+def test_parallel_parsing_of_compressed_file(test_tsf, tmp_path, monkeypatch):
+    path, _ = test_tsf
+    expected = loader.convert_tsf_to_dataframe(path)
+
+    output_path = str(tmp_path / "written.tsf.gz")
+    loader.convert_dataframe_to_tsf(output_path, *expected)
+
+    # Small blocks, so the lines are sent to the workers in several blocks
+    monkeypatch.setattr(loader, "DECOMPRESSED_BLOCK_SIZE", 500)
+    _assert_same_dataframes(loader.convert_tsf_to_dataframe(output_path, workers=2), expected)
+
+
+def test_format_values():
+    values = np.array([1.0, -2.5, np.nan, 0.1 + 0.2, 1e20, -123456789.125, 0.0, 1 / 3])
+    text, text_offsets = loader._format_values(values, np.array([0, 3, 8]))
+    texts = text.split(",")[:-1]
+
+    assert texts[:3] == ["1", "-2.5", "?"] and texts[6] == "0"
+    assert text_offsets.tolist() == [0, len("1,-2.5,?,"), len(text)]
+    np.testing.assert_array_equal([float(value) if value != "?" else np.nan for value in texts], values)
+
+    # Values with at most MAX_FAST_DECIMALS decimals are written with array operations
+    decimal_values = np.array([0.5, -10.25, 3.0, 1234.0001, np.nan])
+    assert loader._format_decimal_values(decimal_values)[0] == "0.5,-10.25,3,1234.0001,?,"
+    assert loader._format_values(decimal_values, np.array([0, 5]))[0] == loader._format_values(np.append(decimal_values, 1 / 3), np.array([0, 6]))[0][:-len(repr(1 / 3)) - 1]
+
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("gluonts")
+
+import experiments.deep_learning_experiments as deep_learning_experiments
+
+
+def test_short_series_are_padded_and_left_out_of_training(tmp_path):
+    path = str(tmp_path / "short.tsf")
+    with open(path, "w", encoding="cp1252") as output:
+        output.write(
+            "@relation short\n@attribute series_name string\n@attribute start_timestamp date\n@frequency monthly\n@horizon 3\n@missing false\n@equallength false\n@data\n"
+            "T1:2010-01-01 00-00-00:1,2,3,4,5,6\n"
+            "T2:2010-01-01 00-00-00:7,8\n"
+        )
+
+    train_series, test_series_matrix, train_ds, test_ds, _, seasonality, forecast_horizon = deep_learning_experiments.prepare_dataset(path)
+
+    assert (seasonality, forecast_horizon) == (12, 3)
+    np.testing.assert_array_equal(train_series[0], [1, 2, 3])
+    assert len(train_series[1]) == 0
+    np.testing.assert_array_equal(test_series_matrix, [[4, 5, 6], [7, 8, np.nan]])
+
+    # The series without training values is only left out of the training dataset
+    assert [len(entry["target"]) for entry in train_ds] == [3]
+    assert [len(entry["target"]) for entry in test_ds] == [6, 2]
@@ -0,0 +1,46 @@
+import numpy as np
+
+import experiments.deep_learning_helper as deep_learning_helper
+
+
+# Forecast with the median and quantile interface of the GluonTS forecasts
+class QuantileForecast:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @property
+    def median(self):
+        return self.values * 10
+
+    def quantile(self, level):
+        return self.values * level
+
+
+def test_forecast_quantiles():
+    forecasts = iter([QuantileForecast([1, 2, 3]), QuantileForecast([4, 5, 6])])
+
+    quantile_forecasts = deep_learning_helper.get_forecast_quantiles(forecasts, 2, [0.1, 0.5, 0.9], 3)
+
+    assert quantile_forecasts.shape == (2, 3, 3)
+    assert quantile_forecasts.dtype == np.float32
+    # The medians are taken from the median property
+    np.testing.assert_allclose(quantile_forecasts[:, 1], [[10, 20, 30], [40, 50, 60]])
+    np.testing.assert_allclose(quantile_forecasts[:, 0], [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]], rtol=1e-6)
+    np.testing.assert_allclose(quantile_forecasts[:, 2], [[0.9, 1.8, 2.7], [3.6, 4.5, 5.4]], rtol=1e-6)
+
+
+def test_forecast_quantiles_of_no_forecasts():
+    assert deep_learning_helper.get_forecast_quantiles(iter([]), 0, [0.5], 4).shape == (0, 1, 4)
+
+
+def test_rolling_origin_train_lengths_match_r():
+    lengths = np.array([2, 3, 4, 5, 10, 12, 13])
+
+    # round(length * 0.8) in R, and 1 for series of length 2
+    np.testing.assert_array_equal(deep_learning_helper.get_rolling_origin_train_lengths(lengths), [1, 2, 3, 4, 8, 10, 10])
+
+
+def test_rolling_origin_train_lengths_round_halves_to_even():
+    lengths = np.array([1, 3, 5, 7])
+
+    np.testing.assert_array_equal(deep_learning_helper.get_rolling_origin_train_lengths(lengths, 0.5), [0, 2, 2, 4])
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pytest
+
+import utils.error_calculator as error_calculator
+from conftest import REPO_DIR
+from utils.ragged_series import RaggedSeries
+
+# Expected error files written by tests/fixtures/errors/make_fixtures.R
+FIXTURE_DIR = os.path.join(REPO_DIR, "tests", "fixtures", "errors")
+
+ERROR_FILE_SUFFIXES = [".txt", "_smape.txt", "_msmape.txt", "_mase.txt", "_mae.txt", "_rmse.txt"]
+
+# Same inputs as tests/fixtures/errors/make_fixtures.R
+TRAINING_SET = [[1, 2, 3, 4], [0, 0, 0], [5], [1, 3], [2, 4, 6, 8, 10]]
+TEST_SET = np.array([[4, 6], [0, 0], [100000, 100000], [2, 4], [np.nan, 12]])
+FORECASTS = np.array([[3, 4], [0, 0], [200000, 200000], [1, 3], [np.nan, 13]])
+
+
+def _assert_error_files_match(tmp_path, case):
+    for suffix in ERROR_FILE_SUFFIXES:
+        with open(os.path.join(FIXTURE_DIR, case + suffix), "rb") as file:
+            expected = file.read()
+        with open(str(tmp_path / case) + suffix, "rb") as file:
+            assert file.read() == expected, case + suffix
+
+
+@pytest.mark.parametrize("case, rows", [("errors", slice(None)), ("no_mase", slice(2, 3))])
+def test_error_files_match_r(tmp_path, case, rows):
+    error_calculator.calculate_errors(FORECASTS[rows], TEST_SET[rows], TRAINING_SET[rows], 2, str(tmp_path / case))
+    _assert_error_files_match(tmp_path, case)
+
+
+def test_error_files_with_missing_actual_values_match_r(tmp_path):
+    forecasts = np.array([[1, 2, 3], [1, 2, 3]])
+    test_set = np.array([[1, np.nan, 2], [2, 2, 2]])
+
+    error_calculator.calculate_errors(forecasts, test_set, [[1, 2, 3, 4], [2, 4, 6]], 1, str(tmp_path / "missing_test"))
+    _assert_error_files_match(tmp_path, "missing_test")
+
+
+def test_mase_recycles_the_shorter_values():
+    # After removing the missing values, R recycles the shorter vector when subtracting: [1, 2, 1] - [1, 2, 3]
+    forecasts = np.array([[1, 2, 3], [np.nan, 2, np.nan], [1, 2, 3]])
+    test_set = np.array([[1, np.nan, 2], [1, 2, 4], [np.nan, np.nan, np.nan]])
+
+    mase = error_calculator.calculate_mase(forecasts, test_set, [[1, 2, 3, 4], [1, 2, 3, 4], [1, 2, 3, 4]], 1)
+
+    np.testing.assert_allclose(mase, [2 / 3, 1])
+
+
+@pytest.mark.parametrize("value, text", [
+    (0.1 + 0.2, "0.3"),
+    (1 / 3, "0.333333333333333"),
+    (2 / 3, "0.666666666666667"),
+    (100000.0, "1e+05"),
+    (50000.0, "50000"),
+    (123456.0, "123456"),
+    (0.0001, "1e-04"),
+    (0.00012, "0.00012"),
+    (-1.5, "-1.5"),
+    (1e-20, "1e-20"),
+    (1.5e300, "1.5e+300"),
+    (0.0, "0"),
+    (np.inf, "Inf"),
+    (-np.inf, "-Inf"),
+    (np.nan, "NaN"),
+    (None, "NA"),
+])
+def test_format_r_number(value, text):
+    assert error_calculator.format_r_number(value) == text
+
+
+# calculate_mase of utils/error_calculator.R, looping over the series
+def _calculate_mase_in_loop(forecasts, test_set, training_set, seasonality):
+    mase_per_series = []
+
+    for k in range(len(forecasts)):
+        te = test_set[k][~np.isnan(test_set[k])]
+        tr = np.asarray(training_set[k], dtype=np.float64)
+        tr = tr[~np.isnan(tr)]
+        f = forecasts[k][~np.isnan(forecasts[k])]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            num_values = max(len(te), len(f))
+            errors = np.mean(np.abs(np.resize(te, num_values) - np.resize(f, num_values))) if len(te) > 0 and len(f) > 0 else np.nan
+
+            lag = int(np.min(seasonality))
+            mase = errors / (np.mean(np.abs(tr[lag:] - tr[:-lag])) if len(tr) > lag else np.nan)
+
+            if np.isnan(mase):
+                mase = errors / (np.mean(np.abs(tr[1:] - tr[:-1])) if len(tr) > 1 else np.nan)
+
+        mase_per_series.append(mase)
+
+    mase_per_series = np.array(mase_per_series)
+    return mase_per_series[np.isfinite(mase_per_series)]
+
+
+@pytest.mark.parametrize("seasonality", [1, 7, 365.25 / 7, [24, 168]])
+def test_batched_mase_matches_loop(seasonality):
+    rng = np.random.default_rng(1)
+
+    training_set = [rng.normal(100, 20, rng.integers(1, 200)) for _ in range(300)]
+    training_set[3] = np.full(50, 4.0)
+    training_set[4][::3] = np.nan
+    training_set[5] = np.array([np.nan])
+
+    test_set = rng.normal(100, 20, (300, 8))
+    forecasts = test_set + rng.normal(0, 5, (300, 8))
+    forecasts[3] = test_set[3]
+    test_set[6, 5:] = np.nan
+    forecasts[6, 5:] = np.nan
+    test_set[7, 2] = np.nan
+    forecasts[8, [0, 4]] = np.nan
+    test_set[9] = np.nan
+
+    expected = _calculate_mase_in_loop(forecasts, test_set, training_set, seasonality)
+    np.testing.assert_allclose(error_calculator.calculate_mase(forecasts, test_set, training_set, seasonality), expected, rtol=1e-12)
+
+    # The same series given as windows of a flat buffer
+    series = RaggedSeries.from_offsets(*error_calculator.flatten_series([np.r_[0.0, values] for values in training_set])).window(1, None)
+    np.testing.assert_allclose(error_calculator.calculate_mase(forecasts, test_set, series, seasonality), expected, rtol=1e-12)
+
+
+def test_calculate_scales():
+    values, offsets = error_calculator.flatten_series([[1, 3, 6, 10], [5], [2, 2], []])
+
+    np.testing.assert_array_equal(error_calculator.calculate_scales(values, offsets, 1), [3, np.nan, 0, np.nan])
+    np.testing.assert_array_equal(error_calculator.calculate_scales(values, offsets, 2), [6, np.nan, np.nan, np.nan])
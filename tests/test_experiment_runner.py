@@ -0,0 +1,178 @@
+import os
+
+import pytest
+
+import experiments.experiment_runner as experiment_runner
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0:01:02.345678", 62.345678),
+    ("12:00:00", 43200),
+    ("1 day, 2:03:04", 93784),
+    ("2 days, 0:00:01.5\n", 172801.5),
+    ("1.234 secs", 1.234),
+    ("1.5 mins\n", 90),
+    ("2 hours", 7200),
+    ("1.5 days", 129600),
+    ("1e-04 secs", 0.0001),
+    ("1.5 weeks", None),
+    ("", None),
+    ("1:02", None),
+    ("abc", None),
+])
+def test_parse_execution_time(text, expected):
+    assert experiment_runner.parse_execution_time(text) == pytest.approx(expected)
+
+
+def test_load_execution_times(tmp_path):
+    (tmp_path / "a_deepar.txt").write_text("0:00:10")
+    (tmp_path / "a_nbeats.txt").write_text("2.5 mins\n")
+    (tmp_path / "b_deepar.txt").write_text("invalid")
+    (tmp_path / "c_deepar.csv").write_text("0:00:10")
+
+    assert experiment_runner.load_execution_times(str(tmp_path)) == {"a_deepar": 10, "a_nbeats": 150}
+    assert experiment_runner.load_execution_times(str(tmp_path / "missing")) == {}
+
+
+def test_jobs_are_ordered_longest_first():
+    execution_times = {"a": 5, "b": 20, "c": 1, "e": 20}
+    jobs = ["a", "b", "c", "d", "e", "f"]
+
+    ordered_jobs = experiment_runner.order_jobs_longest_first(jobs, lambda job: job, execution_times)
+
+    # Jobs without a previous execution time go first, and ties keep the original order
+    assert ordered_jobs == ["d", "f", "b", "e", "a", "c"]
+
+
+def test_jobs_are_grouped_longest_first():
+    execution_times = {"a1": 5, "a2": 20, "b1": 10, "b2": 10, "c1": 1}
+    jobs = ["a1", "b1", "c1", "a2", "b2"]
+
+    groups = experiment_runner.group_jobs_longest_first(jobs, lambda job: job, execution_times, lambda job: job[0])
+
+    assert groups == [["a2", "a1"], ["b1", "b2"], ["c1"]]
+    assert experiment_runner.group_jobs_longest_first(jobs, lambda job: job, execution_times) == [["a2"], ["b1"], ["b2"], ["a1"], ["c1"]]
+
+
+def test_group_with_an_unknown_job_goes_first():
+    groups = experiment_runner.group_jobs_longest_first(["a1", "b1", "b2"], lambda job: job, {"a1": 100, "b1": 1}, lambda job: job[0])
+
+    assert groups == [["b2", "b1"], ["a1"]]
+
+
+# Module level, so that the spawned worker processes can import it
+def write_output(output_dir, job_name, fail=False):
+    if fail:
+        raise ValueError("failed " + job_name)
+
+    with open(os.path.join(output_dir, job_name + ".txt"), "w") as output:
+        output.write(job_name)
+
+
+def _get_job_name(output_dir, job_name, fail=False):
+    return job_name
+
+
+def _sweep(tmp_path, job_names, failing=()):
+    (tmp_path / "input.tsf").write_text("1,2,3")
+    (tmp_path / "outputs").mkdir(exist_ok=True)
+    output_dir = str(tmp_path / "outputs")
+    jobs = [(output_dir, job_name, job_name in failing) for job_name in job_names]
+
+    def get_job_info(output_dir, job_name, fail=False):
+        return {
+            "dataset": job_name,
+            "method": "m",
+            "lag": 1,
+            "horizon": 1,
+            "input_file": str(tmp_path / "input.tsf"),
+            "outputs": [os.path.join(output_dir, job_name + ".txt")],
+        }
+
+    return jobs, get_job_info
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_experiments_returns_results_in_job_order(tmp_path, workers):
+    jobs, _ = _sweep(tmp_path, ["a", "b", "c"], failing=["b"])
+    (tmp_path / "times").mkdir()
+    (tmp_path / "times" / "a.txt").write_text("0:00:01")
+    (tmp_path / "times" / "c.txt").write_text("0:01:00")
+
+    results = experiment_runner.run_experiments(write_output, jobs, _get_job_name, workers=workers,
+                                                execution_times_dir=str(tmp_path / "times"))
+
+    assert [result[0] for result in results] == jobs
+    assert results[0][2] is None and results[2][2] is None
+    assert "ValueError: failed b" in results[1][2]
+    assert sorted(os.listdir(str(tmp_path / "outputs"))) == ["a.txt", "c.txt"]
+
+
+def test_run_experiments_skips_completed_jobs(tmp_path):
+    jobs, get_job_info = _sweep(tmp_path, ["a_deepar", "b_deepar", "a_nbeats"], failing=["b_deepar"])
+    manifest_path = str(tmp_path / "manifest.json")
+
+    def run(force=None):
+        return experiment_runner.run_experiments(write_output, jobs, _get_job_name, workers=1,
+                                                 manifest_path=manifest_path, get_job_info=get_job_info, force=force)
+
+    first_results = run()
+    assert first_results[0][1] is not None and first_results[2][1] is not None
+
+    # Completed jobs are skipped and the failed job is run again
+    second_results = run()
+    assert second_results[0][1:] == (None, None)
+    assert second_results[2][1:] == (None, None)
+    assert second_results[1][1] is not None
+
+    # Matching jobs are run even when they are completed
+    forced_results = run(force=["a_*"])
+    assert forced_results[0][1] is not None and forced_results[2][1] is not None
+
+    forced_results = run(force=["*_nbeats"])
+    assert forced_results[0][1:] == (None, None)
+    assert forced_results[2][1] is not None
+
+    # A changed input makes all jobs stale
+    (tmp_path / "input.tsf").write_text("1,2,3,4")
+    changed_results = run()
+    assert changed_results[0][1] is not None and changed_results[2][1] is not None
+
+
+# Changes the input file while the job runs
+def change_input(output_dir, job_name, fail=False):
+    write_output(output_dir, job_name)
+
+    with open(os.path.join(os.path.dirname(output_dir), "input.tsf"), "a") as file:
+        file.write(",4")
+
+
+def test_input_changed_by_a_running_job_makes_the_job_stale(tmp_path):
+    jobs, get_job_info = _sweep(tmp_path, ["a"])
+    manifest_path = str(tmp_path / "manifest.json")
+
+    experiment_runner.run_experiments(change_input, jobs, _get_job_name, workers=1,
+                                      manifest_path=manifest_path, get_job_info=get_job_info)
+    results = experiment_runner.run_experiments(write_output, jobs, _get_job_name, workers=1,
+                                                manifest_path=manifest_path, get_job_info=get_job_info)
+
+    assert results[0][1] is not None
+
+
+# Writes the id of the worker process running the job
+def write_process_id(output_dir, job_name, fail=False):
+    with open(os.path.join(output_dir, job_name + ".txt"), "w") as output:
+        output.write(str(os.getpid()))
+
+
+def test_grouped_jobs_run_in_the_same_process(tmp_path):
+    job_names = ["a_deepar", "b_deepar", "a_nbeats", "b_nbeats", "a_wavenet"]
+    jobs, _ = _sweep(tmp_path, job_names)
+
+    results = experiment_runner.run_experiments(write_process_id, jobs, _get_job_name, workers=2,
+                                                get_job_group=lambda output_dir, job_name, fail=False: job_name[0])
+
+    assert all(result[2] is None for result in results)
+    process_ids = {job_name: (tmp_path / "outputs" / (job_name + ".txt")).read_text() for job_name in job_names}
+    assert process_ids["a_deepar"] == process_ids["a_nbeats"] == process_ids["a_wavenet"]
+    assert process_ids["b_deepar"] == process_ids["b_nbeats"]
@@ -0,0 +1,207 @@
+import math
+
+import numpy as np
+import pytest
+
+import experiments.feature_functions as feature_functions
+
+
+def _create_series(seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = np.concatenate([rng.integers(1, 40, 60), rng.integers(40, 300, 30)])
+    all_series = [
+        rng.gamma(2, 5, n) + np.sin(np.arange(n)) if i % 7 else np.full(n, 3.0)
+        for i, n in enumerate(lengths)
+    ]
+    return all_series, np.concatenate(all_series), np.concatenate(([0], np.cumsum(lengths)))
+
+
+def _assert_close(values, expected):
+    np.testing.assert_allclose(np.asarray(values, dtype=np.float64), np.asarray(expected, dtype=np.float64), rtol=1e-7, atol=1e-9, equal_nan=True)
+
+
+def _acf(series, max_lag):
+    centred = series - np.mean(series)
+    return np.array([np.sum(centred[:-lag] * centred[lag:]) / np.sum(centred ** 2) if lag < len(series) else np.nan for lag in range(1, max_lag + 1)])
+
+
+def _max_shift(series, width, use_variance):
+    if len(series) < width:
+        return np.nan, np.nan
+
+    statistic = (lambda window: np.var(window, ddof=1) if width > 1 else np.nan) if use_variance else np.mean
+    rolling = np.array([statistic(series[i:i + width]) for i in range(len(series) - width + 1)])
+    shifts = np.abs(rolling[width:] - rolling[:-width])
+
+    if len(shifts) == 0:
+        return 0, np.nan
+    if np.all(np.isnan(shifts)):
+        return np.nan, np.nan
+    return np.nanmax(shifts), np.nanargmax(shifts) + width
+
+
+def _kpss(series):
+    n = len(series)
+    max_lag = int(np.trunc(4 * (n / 100) ** 0.25))
+    residuals = series - np.mean(series)
+
+    denominator = np.sum(residuals ** 2) / n
+    for lag in range(1, max_lag + 1):
+        denominator += 2 / n * (1 - lag / (max_lag + 1)) * np.sum(residuals[lag:] * residuals[:-lag])
+
+    return np.sum(np.cumsum(residuals) ** 2) / n ** 2 / denominator
+
+
+def test_batched_features_match_series_by_series_features():
+    all_series, values, offsets = _create_series()
+
+    with np.errstate(all="ignore"):
+        for width in [12, 1]:
+            for use_variance in [False, True]:
+                expected = np.array([_max_shift(series, width, use_variance) for series in all_series]).T
+                _assert_close(np.array(feature_functions.calculate_max_shift(values, offsets, width, use_variance)), expected)
+
+        means, variances = feature_functions.calculate_mean_var(values, offsets)
+        _assert_close(means, [np.mean(series) for series in all_series])
+        _assert_close(variances, [np.var(series, ddof=1) if len(series) > 1 else np.nan for series in all_series])
+
+        acf_features = feature_functions.calculate_acf_features(values, offsets, 12)
+        _assert_close(acf_features["x_acf1"], [_acf(series, 1)[0] for series in all_series])
+        _assert_close(acf_features["x_acf10"], [np.sum(_acf(series, 10) ** 2) for series in all_series])
+        _assert_close(acf_features["seas_acf1"], [_acf(series, 12)[11] for series in all_series])
+
+        crossing_points = [np.sum((series <= np.median(series))[1:] != (series <= np.median(series))[:-1]) for series in all_series]
+        _assert_close(feature_functions.calculate_crossing_points(values, offsets), crossing_points)
+
+        long_series = [series for series in all_series if len(series) > 1]
+        long_offsets = np.concatenate(([0], np.cumsum([len(series) for series in long_series])))
+        _assert_close(feature_functions.calculate_kpss_statistic(np.concatenate(long_series), long_offsets), [_kpss(series) for series in long_series])
+
+
+# ar.burg of R with var.method = 1, ported loop by loop
+def _burg_in_loop(x, max_order):
+    n = len(x)
+    u = [x[n - 1 - t] for t in range(n)]
+    v = list(u)
+    coefficients = np.zeros((max_order, max_order))
+    variances = [sum(value * value for value in x) / n]
+
+    for p in range(1, max_order + 1):
+        numerator = sum(v[t] * u[t - 1] for t in range(p, n))
+        denominator = sum(v[t] * v[t] + u[t - 1] * u[t - 1] for t in range(p, n))
+        phi = 2 * numerator / denominator
+
+        coefficients[p - 1, p - 1] = phi
+        for j in range(1, p):
+            coefficients[p - 1, j - 1] = coefficients[p - 2, j - 1] - phi * coefficients[p - 2, p - j - 1]
+
+        previous_u = list(u)
+        for t in range(p, n):
+            u[t] = previous_u[t - 1] - phi * v[t]
+            v[t] = v[t] - phi * previous_u[t - 1]
+        variances.append(variances[-1] * (1 - phi * phi))
+
+    return coefficients, np.array(variances)
+
+
+# entropy of tsfeatures, computing the spectral density at each frequency as spec.ar does
+def _entropy(series):
+    n = len(series)
+    max_order = min(n - 1, math.floor(10 * math.log10(n)))
+    coefficients, variances = _burg_in_loop(series - np.mean(series), max_order)
+
+    order = int(np.argmin(n * np.log(variances) + 2 * np.arange(max_order + 1)))
+    ar = coefficients[order - 1, :order] if order > 0 else np.zeros(0)
+
+    spectrum = []
+    for frequency in np.linspace(0, 0.5, math.ceil(n / 2 + 1)):
+        cs = sum(ar[j] * math.cos(2 * math.pi * frequency * (j + 1)) for j in range(order))
+        sn = sum(ar[j] * math.sin(2 * math.pi * frequency * (j + 1)) for j in range(order))
+        spectrum.append(1 / ((1 - cs) ** 2 + sn ** 2))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_pred = variances[order] * n / (n - (order + 1))
+        fx = np.array(spectrum[:0:-1] + spectrum) * var_pred / n
+        fx = fx / np.sum(fx)
+        fx = 0.999 * fx + 0.001 / len(fx)
+        return np.minimum(1, -np.sum(fx * np.log(fx) / np.log(n)))
+
+
+def test_entropy_matches_spec_ar():
+    all_series, _, _ = _create_series()
+
+    for series in all_series:
+        if len(series) > 1 and np.any(series != series[0]):
+            assert feature_functions.calculate_entropy(series) == pytest.approx(_entropy(series), rel=1e-9, nan_ok=True)
+
+    assert np.isnan(feature_functions.calculate_entropy(np.full(20, 3.0)))
+    assert np.isnan(feature_functions.calculate_entropy(np.array([3.0])))
+
+
+def test_entropy_of_noise_and_trends():
+    rng = np.random.default_rng(0)
+
+    assert feature_functions.calculate_entropy(rng.normal(size=500)) > 0.95
+    assert feature_functions.calculate_entropy(np.cumsum(rng.normal(size=500))) < 0.3
+    assert feature_functions.calculate_entropy(np.sin(np.arange(200) / 3) + 0.01 * rng.normal(size=200)) < 0.5
+
+
+def test_hurst_of_noise_and_random_walks():
+    rng = np.random.default_rng(0)
+
+    # Fractionally integrated noise with d = 0.3 from the truncated moving average representation
+    d = 0.3
+    weights = np.cumprod(np.concatenate(([1], (np.arange(1, 3000) - 1 + d) / np.arange(1, 3000))))
+    fractional_noise = np.convolve(rng.normal(size=5000), weights)[3000:5000]
+
+    assert feature_functions.calculate_hurst(rng.normal(size=500)) == pytest.approx(0.5, abs=0.05)
+    assert feature_functions.calculate_hurst(np.cumsum(rng.normal(size=500))) == pytest.approx(1, abs=0.01)
+    assert feature_functions.calculate_hurst(fractional_noise) == pytest.approx(0.8, abs=0.05)
+    assert np.isnan(feature_functions.calculate_hurst(np.full(20, 3.0)))
+
+
+def test_hurst_maximises_the_likelihood():
+    rng = np.random.default_rng(1)
+    series = np.convolve(rng.normal(size=400), [1, 0.6, 0.3], "valid")
+
+    for length in [50, 398]:
+        fine_grid = np.linspace(feature_functions.FRACDIFF_D_BOUNDS[0], feature_functions.FRACDIFF_D_BOUNDS[1], 5001)
+        best_d = fine_grid[np.argmin(feature_functions._fractional_deviance(series[:length], fine_grid))]
+
+        assert feature_functions.calculate_hurst(series[:length]) == pytest.approx(best_d + 0.5, abs=1e-4)
+
+
+def test_parallel_features_match_serial_features(monkeypatch):
+    _, values, offsets = _create_series()
+    monkeypatch.setattr(feature_functions, "FEATURE_CHUNK_SIZE", 20)
+
+    with np.errstate(all="ignore"):
+        names, features = feature_functions.calculate_tsfeatures(values, offsets, 12, 1)
+        parallel_names, parallel_features = feature_functions.calculate_tsfeatures(values, offsets, 12, 2)
+
+    assert names == parallel_names
+    # The seasonal features cannot be calculated for the series shorter than the frequency, so they are left out
+    assert names == [
+        "mean", "var", "max_level_shift", "time_level_shift", "max_var_shift", "time_var_shift",
+        "x_acf1", "x_acf10", "diff1_acf1", "diff1_acf10", "diff2_acf1", "diff2_acf10",
+        "ARCH.LM", "crossing_points", "entropy", "flat_spots", "hurst", "lumpiness", "nonlinearity",
+        "x_pacf5", "diff1x_pacf5", "diff2x_pacf5", "stability", "unitroot_kpss",
+    ]
+    np.testing.assert_array_equal(features, parallel_features)
+
+
+def test_tsfeatures_are_written_into_the_subset_file(tmp_path, monkeypatch):
+    from conftest import write_test_tsf
+
+    (tmp_path / "tsf_data").mkdir()
+    write_test_tsf(str(tmp_path / "tsf_data" / "test.tsf"))
+    monkeypatch.setattr(feature_functions, "BASE_DIR", str(tmp_path))
+
+    feature_functions.calculate_features("test", "test.tsf")
+
+    assert not (tmp_path / "results" / "tsfeatures" / "test_features.csv").exists()
+    with open(str(tmp_path / "results" / "tsfeatures" / "test_features_subset.csv")) as file:
+        lines = file.read().splitlines()
+
+    assert len(lines) == 41
+    assert "entropy" in lines[0].split(",") and "hurst" in lines[0].split(",")
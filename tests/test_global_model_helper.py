@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import utils.global_model_helper as global_model_helper
+from utils.ragged_series import RaggedSeries
+
+
+# create_input_matrix of utils/global_model_helper.R, embedding the series one by one as embed(ts, lag + 1) does
+def _create_input_matrix_in_loop(dataset, lag):
+    embedded_series = []
+    final_lags = []
+    series_means = []
+
+    for series in dataset:
+        series = np.asarray(series, dtype=np.float64)
+
+        mean = np.mean(series)
+        if mean == 0:
+            mean = 1
+        series = series / mean
+        series_means.append(mean)
+
+        for t in range(lag, len(series)):
+            embedded_series.append(series[t - lag : t + 1][::-1])
+        final_lags.append(series[-lag:][::-1])
+
+    return np.array(embedded_series), np.array(final_lags), np.array(series_means)
+
+
+def _create_dataset(seed=0):
+    rng = np.random.default_rng(seed)
+    dataset = [rng.gamma(2, 50, rng.integers(12, 80)) for _ in range(100)]
+    dataset[3][:] = 0
+    dataset[7][:] = np.round(dataset[7])
+    return dataset
+
+
+@pytest.mark.parametrize("lag", [1, 5, 11])
+def test_input_matrix_matches_loop(lag):
+    dataset = _create_dataset()
+    embedded_series, final_lags, series_means = global_model_helper.create_input_matrix(dataset, lag)
+    expected = _create_input_matrix_in_loop(dataset, lag)
+
+    assert embedded_series.shape == (sum(len(series) - lag for series in dataset), lag + 1)
+    np.testing.assert_allclose(embedded_series, expected[0], rtol=1e-13)
+    np.testing.assert_allclose(final_lags, expected[1], rtol=1e-13)
+    np.testing.assert_allclose(series_means, expected[2], rtol=1e-13)
+    assert series_means[3] == 1
+
+
+def test_input_matrix_of_windows(monkeypatch):
+    dataset = _create_dataset()
+    lengths = [len(series) for series in dataset]
+    series = RaggedSeries.from_offsets(np.concatenate(dataset), np.concatenate(([0], np.cumsum(lengths)))).window(2, -1)
+
+    # A small buffer, so the embedded matrix is filled in several chunks
+    monkeypatch.setattr(global_model_helper, "FILL_CHUNK_SIZE", 1000)
+
+    embedded_series, final_lags, series_means = global_model_helper.create_input_matrix(series, 5)
+    expected = _create_input_matrix_in_loop([values[2:-1] for values in dataset], 5)
+
+    np.testing.assert_allclose(embedded_series, expected[0], rtol=1e-13)
+    np.testing.assert_allclose(final_lags, expected[1], rtol=1e-13)
+    np.testing.assert_allclose(series_means, global_model_helper.get_series_means(series), rtol=1e-13)
+    np.testing.assert_allclose(final_lags, global_model_helper.get_final_lags(series, 5, series_means), rtol=1e-13)
+
+
+def test_input_matrix_written_into_file(tmp_path):
+    dataset = _create_dataset()
+    output_path = str(tmp_path / "embedded.npy")
+
+    embedded_series, final_lags, _ = global_model_helper.create_input_matrix(dataset, 5, np.float32, output_path)
+    expected = _create_input_matrix_in_loop(dataset, 5)
+
+    assert isinstance(embedded_series, np.memmap)
+    assert embedded_series.dtype == np.float32 and final_lags.dtype == np.float32
+    np.testing.assert_array_equal(np.load(output_path), expected[0].astype(np.float32))
+
+
+def test_input_matrix_of_short_series():
+    with pytest.raises(Exception, match="lag \\+ 1"):
+        global_model_helper.create_input_matrix([np.arange(1.0, 11.0), np.arange(1.0, 5.0)], 4)
+
+    embedded_series, _, _ = global_model_helper.create_input_matrix([np.arange(1.0, 11.0), np.arange(1.0, 6.0)], 4)
+    assert embedded_series.shape == (7, 5)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import models.global_models as global_models
+import utils.global_model_helper as global_model_helper
+
+
+# Returns the rows of an embedded matrix in order as minibatches, in place of the random windows of WindowSampler
+class EmbeddedMatrixSampler:
+    def __init__(self, embedded_series):
+        self.embedded_series = embedded_series
+        self.window_length = embedded_series.shape[1]
+        self.next_row = 0
+
+    def sample_lags_and_targets(self, batch_size, series_means=None, dtype=np.float32):
+        rows = self.embedded_series[self.next_row:self.next_row + batch_size].astype(dtype)
+        self.next_row = self.next_row + batch_size
+        return rows[:, 1:], rows[:, 0]
+
+
+def _create_dataset(seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.gamma(2, 50, rng.integers(12, 80)) for _ in range(100)]
+
+
+# Creates series following x[t] = 0.6 x[t - 1] + 0.3 x[t - 2] - 0.1 x[t - 3] exactly
+def _create_autoregressive_dataset(seed=0):
+    rng = np.random.default_rng(seed)
+    dataset = []
+
+    for _ in range(50):
+        values = list(rng.uniform(50, 150, 3))
+        for _ in range(rng.integers(10, 60)):
+            values.append(0.6 * values[-1] + 0.3 * values[-2] - 0.1 * values[-3])
+        dataset.append(np.array(values))
+
+    return dataset
+
+
+@pytest.mark.parametrize("lag, batch_size", [(1, 64), (5, 1000), (10, 100000)])
+def test_pooled_coefficients_match_least_squares_of_the_embedded_matrix(lag, batch_size):
+    dataset = _create_dataset()
+    embedded_series, _, series_means = global_model_helper.create_input_matrix(dataset, lag)
+    num_batches = -(-len(embedded_series) // batch_size)
+
+    coefficients = global_models.fit_pooled_regression(EmbeddedMatrixSampler(embedded_series), series_means, num_batches, batch_size)
+
+    expected = np.linalg.lstsq(embedded_series[:, 1:], embedded_series[:, 0], rcond=None)[0]
+    np.testing.assert_allclose(coefficients, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_sampled_coefficients_of_autoregressive_series():
+    dataset = _create_autoregressive_dataset()
+    embedded_series, final_lags, series_means = global_model_helper.create_input_matrix(dataset, 3)
+
+    coefficients = global_models.fit_pooled_regression(global_models.WindowSampler(dataset, 4), series_means, 5, 500)
+
+    # Every window follows the same recursion, so the sampled windows give the coefficients of the full embedded matrix
+    expected = np.linalg.lstsq(embedded_series[:, 1:], embedded_series[:, 0], rcond=None)[0]
+    np.testing.assert_allclose(expected, [0.6, 0.3, -0.1], atol=1e-9)
+    np.testing.assert_allclose(coefficients, expected, atol=1e-9)
+
+
+def test_forecasts_of_autoregressive_series():
+    dataset = _create_autoregressive_dataset()
+
+    forecasts = global_models.start_forecasting(dataset, 3, 4)
+
+    for values, series_forecasts in zip(dataset, forecasts):
+        values = list(values)
+        for _ in range(4):
+            values.append(0.6 * values[-1] + 0.3 * values[-2] - 0.1 * values[-3])
+        np.testing.assert_allclose(series_forecasts, values[-4:], rtol=1e-7)
+
+
+def test_forecasts_are_deterministic_under_a_seed():
+    dataset = _create_dataset()
+
+    first_forecasts = global_models.start_forecasting(dataset, 5, 3, seed=4, batch_size=256)
+    second_forecasts = global_models.start_forecasting(dataset, 5, 3, seed=4, batch_size=256)
+    other_forecasts = global_models.start_forecasting(dataset, 5, 3, seed=5, batch_size=256)
+
+    assert first_forecasts.shape == (100, 3)
+    np.testing.assert_array_equal(first_forecasts, second_forecasts)
+    assert not np.array_equal(first_forecasts, other_forecasts)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import experiments.job_manifest as job_manifest
+
+
+def _job_info(tmp_path, dataset="d", method="m"):
+    return {
+        "dataset": dataset,
+        "method": method,
+        "lag": 3,
+        "horizon": 2,
+        "input_file": str(tmp_path / "input.tsf"),
+        "outputs": [str(tmp_path / (dataset + "_" + method + ".txt"))],
+    }
+
+
+@pytest.fixture
+def job_info(tmp_path):
+    (tmp_path / "input.tsf").write_text("1,2,3")
+    info = _job_info(tmp_path)
+    (tmp_path / "d_m.txt").write_text("forecasts")
+    return info
+
+
+def test_completed_job_is_persisted(tmp_path, job_info):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = job_manifest.JobManifest(manifest_path)
+    assert not manifest.is_completed(job_info)
+
+    manifest.record_completed(job_info, 1.5, manifest.get_input_state(job_info["input_file"]))
+
+    reloaded = job_manifest.JobManifest(manifest_path)
+    assert reloaded.is_completed(job_info)
+    record = reloaded.records[job_manifest.get_job_key(job_info)]
+    assert record["execution_time"] == 1.5
+    assert record["input_hash"] == job_manifest.hash_file(job_info["input_file"])
+    assert not os.path.exists(manifest_path + ".tmp")
+
+
+def test_job_is_stale_when_an_output_is_missing(tmp_path, job_info):
+    manifest = job_manifest.JobManifest(str(tmp_path / "manifest.json"))
+    manifest.record_completed(job_info, 1.0, manifest.get_input_state(job_info["input_file"]))
+
+    os.remove(job_info["outputs"][0])
+    assert not manifest.is_completed(job_info)
+
+
+def test_job_is_stale_when_the_input_changes(tmp_path, job_info):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = job_manifest.JobManifest(manifest_path)
+    manifest.record_completed(job_info, 1.0, manifest.get_input_state(job_info["input_file"]))
+
+    (tmp_path / "input.tsf").write_text("1,2,4")
+    assert not job_manifest.JobManifest(manifest_path).is_completed(job_info)
+
+    os.remove(job_info["input_file"])
+    assert not job_manifest.JobManifest(manifest_path).is_completed(job_info)
+
+
+def test_touched_input_with_the_same_content_is_up_to_date(tmp_path, job_info):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = job_manifest.JobManifest(manifest_path)
+    manifest.record_completed(job_info, 1.0, manifest.get_input_state(job_info["input_file"]))
+
+    stat = os.stat(job_info["input_file"])
+    os.utime(job_info["input_file"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert job_manifest.JobManifest(manifest_path).is_completed(job_info)
+
+
+def test_recorded_input_state_is_the_submitted_one(tmp_path, job_info):
+    manifest = job_manifest.JobManifest(str(tmp_path / "manifest.json"))
+    input_state = manifest.get_input_state(job_info["input_file"])
+
+    # The input changes while the job runs, so the job did not read the new content
+    (tmp_path / "input.tsf").write_text("1,2,3,4")
+    manifest.record_completed(job_info, 1.0, input_state)
+
+    assert not manifest.is_completed(job_info)
+
+
+@pytest.mark.parametrize("job_name, patterns, expected", [
+    ("m4_deepar_lag_10", None, False),
+    ("m4_deepar_lag_10", [], False),
+    ("m4_deepar_lag_10", ["m4_*"], True),
+    ("m4_deepar_lag_10", ["tourism_*", "*_deepar_lag_*"], True),
+    ("m4_deepar_lag_10", ["M4_*"], False),
+    ("m4_nbeats_lag_10", ["*_deepar_lag_*"], False),
+])
+def test_matches_any(job_name, patterns, expected):
+    assert job_manifest.matches_any(job_name, patterns) == expected
@@ -0,0 +1,53 @@
+import datetime
+import re
+
+import numpy as np
+import pytest
+
+import experiments.local_model_experiments as local_model_experiments
+from conftest import write_test_tsf
+
+
+@pytest.mark.parametrize("seconds, expected", [
+    (1.234, "1.234 secs"),
+    (1 / 3, "0.333333 secs"),
+    (59.5, "59.5 secs"),
+    (90, "1.5 mins"),
+    (7200, "2 hours"),
+    (129600, "1.5 days"),
+])
+def test_format_execution_time(seconds, expected):
+    assert local_model_experiments.format_execution_time(datetime.timedelta(seconds=seconds)) == expected
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    (tmp_path / "tsf_data").mkdir()
+    monkeypatch.setattr(local_model_experiments, "BASE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("method", ["ses", "theta", "snaive"])
+def test_fixed_horizon_local_forecasting(base_dir, method):
+    _, all_series = write_test_tsf(str(base_dir / "tsf_data" / "test.tsf"))
+
+    local_model_experiments.do_fixed_horizon_local_forecasting("test", method, "test.tsf", workers=2)
+
+    with open(str(base_dir / "results" / "fixed_horizon_forecasts" / ("test_" + method + ".txt"))) as file:
+        lines = file.read().splitlines()
+    assert [line.split(",")[0] for line in lines] == ["T" + str(i + 1) for i in range(len(all_series))]
+    assert all(len(line.split(",")) == 7 for line in lines)
+
+    with open(str(base_dir / "results" / "fixed_horizon_execution_times" / ("test_" + method + ".txt"))) as file:
+        assert re.fullmatch(r"[0-9.e-]+ (secs|mins|hours|days)\n", file.read())
+
+    assert (base_dir / "results" / "fixed_horizon_errors" / ("test_" + method + ".txt")).exists()
+
+
+def test_dataset_without_series_names(base_dir):
+    with open(str(base_dir / "tsf_data" / "unnamed.tsf"), "w", encoding="cp1252") as output:
+        output.write("@relation unnamed\n@attribute start_timestamp date\n@frequency monthly\n@horizon 2\n@missing false\n@equallength true\n@data\n")
+        output.write("2010-01-01 00-00-00:1,2,3,4,5\n2010-01-01 00-00-00:6,7,8,9,10\n")
+
+    with pytest.raises(Exception, match="should contain a series_name attribute"):
+        local_model_experiments.do_fixed_horizon_local_forecasting("unnamed", "snaive", "unnamed.tsf")
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+import models.local_models as local_models
+
+
+# ses of R: the smoothing parameter and the initial level minimising the sum of squared one-step errors, found with a fine grid search
+# Returns the sum of squared errors, the smoothing parameter and the final level
+def _fit_ses_with_grid(series, grid_size=20001):
+    alphas = np.linspace(local_models.ALPHA_BOUNDS[0], local_models.ALPHA_BOUNDS[1], grid_size)
+
+    # The errors with an initial level of 0 and the coefficient of the initial level in each error
+    errors = np.empty((len(series), grid_size))
+    weights = np.empty((len(series), grid_size))
+    level = np.zeros(grid_size)
+    weight = np.ones(grid_size)
+
+    for t in range(len(series)):
+        errors[t] = series[t] - level
+        weights[t] = weight
+        level = level + alphas * errors[t]
+        weight = weight * (1 - alphas)
+
+    initial_levels = np.sum(errors * weights, axis=0) / np.sum(weights ** 2, axis=0)
+    sum_squared_errors = np.sum((errors - weights * initial_levels) ** 2, axis=0)
+    best = np.argmin(sum_squared_errors)
+
+    return sum_squared_errors[best], alphas[best], level[best] + weight[best] * initial_levels[best]
+
+
+# Seasonal indices of decompose(type = "multiplicative")
+def _decompose(series, seasonality):
+    if seasonality % 2 == 0:
+        kernel = np.concatenate(([0.5], np.ones(seasonality - 1), [0.5])) / seasonality
+    else:
+        kernel = np.ones(seasonality) / seasonality
+
+    half = len(kernel) // 2
+    trend = np.full(len(series), np.nan)
+    for i in range(half, len(series) - half):
+        trend[i] = np.dot(kernel, series[i - half:i + half + 1])
+
+    ratios = series / trend
+    indices = np.array([np.nanmean(ratios[i::seasonality]) for i in range(seasonality)])
+    return indices / np.mean(indices)
+
+
+# thetaf of R, fitting one series at a time
+def _theta(series, horizon, seasonality):
+    n = len(series)
+    seasonal = False
+
+    if seasonality > 1 and np.ptp(series) > 0 and n > 2 * seasonality:
+        centred = series - np.mean(series)
+        acf = np.array([np.dot(centred[:n - k], centred[k:]) for k in range(1, seasonality + 1)]) / np.dot(centred, centred)
+        statistic = np.sqrt((1 + 2 * np.sum(acf[:-1] ** 2)) / n)
+        seasonal = abs(acf[-1]) / statistic > 1.6448536269514722
+
+    adjusted = series
+    if seasonal:
+        indices = _decompose(series, seasonality)
+        if np.any(np.abs(indices) < local_models.MIN_SEASONAL_INDEX):
+            seasonal = False
+        else:
+            adjusted = series / indices[np.arange(n) % seasonality]
+
+    _, alpha, level = _fit_ses_with_grid(adjusted)
+    slope = np.polyfit(np.arange(n), adjusted, 1)[0] / 2
+    alpha = max(1e-10, alpha)
+
+    forecasts = level + slope * (np.arange(horizon) + (1 - (1 - alpha) ** n) / alpha)
+    if seasonal:
+        forecasts = forecasts * indices[(n + np.arange(horizon)) % seasonality]
+
+    return forecasts
+
+
+def _create_series(seed=0):
+    rng = np.random.default_rng(seed)
+
+    all_series = [rng.normal(10, 2, rng.integers(5, 80)) for _ in range(10)]
+    all_series += [50 + 10 * np.sin(2 * np.pi * np.arange(n) / 12) + rng.normal(0, 1, n) + 0.3 * np.arange(n) for n in [30, 61, 100]]
+    all_series += [100 * (1 + 0.3 * np.sin(2 * np.pi * np.arange(n) / 12)) * np.exp(0.01 * np.arange(n)) * rng.uniform(0.95, 1.05, n) for n in [40, 73]]
+    all_series += [np.full(30, 5.0)]
+
+    return all_series, np.concatenate(all_series), np.concatenate(([0], np.cumsum([len(series) for series in all_series])))
+
+
+def test_ses_matches_grid_search():
+    all_series, values, offsets = _create_series()
+    horizons = np.full(len(all_series), 6)
+    horizons[3] = 2
+
+    levels, alphas = local_models.fit_ses(values, offsets)
+    forecasts = local_models.get_ses_forecasts(values, offsets, horizons, 12)
+
+    for i, series in enumerate(all_series):
+        _, _, level = _fit_ses_with_grid(series)
+
+        assert levels[i] == pytest.approx(level, rel=1e-4)
+        assert local_models.ALPHA_BOUNDS[0] <= alphas[i] <= local_models.ALPHA_BOUNDS[1]
+        np.testing.assert_array_equal(forecasts[i, :horizons[i]], levels[i])
+        assert np.all(np.isnan(forecasts[i, horizons[i]:]))
+
+
+def test_theta_matches_series_by_series_theta():
+    all_series, values, offsets = _create_series()
+    horizons = np.full(len(all_series), 6)
+    horizons[3] = 2
+
+    forecasts = local_models.get_theta_forecasts(values, offsets, horizons, 12)
+
+    for i, series in enumerate(all_series):
+        np.testing.assert_allclose(forecasts[i, :horizons[i]], _theta(series, horizons[i], 12), rtol=1e-4)
+
+
+def test_snaive_repeats_the_last_seasonal_period():
+    values = np.arange(1.0, 21.0)
+    offsets = np.array([0, 14, 17, 17, 20])
+
+    forecasts = local_models.get_snaive_forecasts(values, offsets, np.array([14, 2, 3, 3]), 12)
+
+    np.testing.assert_array_equal(forecasts[0], np.concatenate((np.arange(3.0, 15.0), [3, 4])))
+    np.testing.assert_array_equal(forecasts[1], [17, 17] + [np.nan] * 12)
+    assert np.all(np.isnan(forecasts[2]))
+    np.testing.assert_array_equal(forecasts[3, :3], [20, 20, 20])
+
+
+def test_models_fall_back_to_snaive_for_series_they_cannot_fit():
+    values = np.array([3.0, 1.0, 2.0, 4.0, np.nan, 5.0])
+    offsets = np.array([0, 1, 6])
+
+    for get_forecasts in [local_models.get_ses_forecasts, local_models.get_theta_forecasts]:
+        forecasts = get_forecasts(values, offsets, np.array([2, 2]), 12)
+        assert np.all(np.isfinite(forecasts))
+        np.testing.assert_array_equal(forecasts[0], [3, 3])
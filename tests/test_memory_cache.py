@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+import utils.memory_cache as memory_cache
+import utils.ragged_series as ragged_series
+from utils.ragged_series import RaggedSeries
+
+
+def test_shared_arrays_are_counted_once():
+    values = np.zeros(1000)
+    series = RaggedSeries.from_offsets(values, [0, 400, 1000])
+
+    assert memory_cache.estimate_size([values, values[10:20], series]) == values.nbytes + 3 * 8
+    assert memory_cache.estimate_size({"a": pd.Series(np.zeros(10)), "b": (np.ones(5, dtype=np.int32),)}) == 80 + 20
+
+
+def test_memory_mapped_arrays_are_not_counted(tmp_path):
+    np.save(str(tmp_path / "values.npy"), np.zeros(1000))
+    mapped = np.load(str(tmp_path / "values.npy"), mmap_mode="r")
+
+    assert memory_cache.estimate_size(mapped) == 0
+    assert memory_cache.estimate_size([np.asarray(mapped), mapped[100:200]]) == 0
+    assert memory_cache.estimate_size(np.array(mapped)) == 8000
+
+
+def test_cached_dataset_is_counted_without_its_values(test_tsf, tmp_path):
+    path, all_series = test_tsf
+    series, _, _, _, _ = ragged_series.convert_tsf_to_ragged_series(path, str(tmp_path / "cache"))
+
+    size = memory_cache.estimate_size(series)
+    num_values = sum(len(values) for values in all_series)
+
+    assert size > 0
+    assert size < num_values * 8
+    assert memory_cache.estimate_size(series.take(np.arange(len(series)))) < num_values * 8
+
+
+def test_memory_mapped_entries_do_not_fill_the_cache(tmp_path):
+    np.save(str(tmp_path / "values.npy"), np.zeros(10000))
+    cache = memory_cache.MemoryBoundedLRUCache(max_size=1000)
+
+    for key in range(5):
+        cache.get_or_create(key, lambda: np.load(str(tmp_path / "values.npy"), mmap_mode="r"))
+    cache.get_or_create("in_memory", lambda: np.zeros(100))
+
+    assert len(cache) == 6 and cache.evictions == 0
+    assert cache.stats()["size"] == 800
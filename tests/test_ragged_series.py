@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.data_loader as loader
+from utils.ragged_series import RaggedSeries
+
+
+def _assert_same_series(series, expected_series):
+    assert len(series) == len(expected_series)
+    for values, expected_values in zip(series, expected_series):
+        np.testing.assert_array_equal(values, expected_values)
+
+
+def test_dataframe_round_trip(test_tsf):
+    path, all_series = test_tsf
+    loaded_data, _, _, _, _ = loader.convert_tsf_to_dataframe(path)
+
+    series = RaggedSeries.from_dataframe(loaded_data)
+    _assert_same_series(series, all_series)
+
+    round_trip = series.to_dataframe()
+    assert round_trip["series_name"].tolist() == loaded_data["series_name"].tolist()
+    assert round_trip["start_timestamp"].tolist() == loaded_data["start_timestamp"].tolist()
+    for values, expected_values in zip(round_trip["series_value"], loaded_data["series_value"]):
+        assert list(values) == list(expected_values)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load_dataframe_with_string_and_date_columns(test_tsf, tmp_path, mmap):
+    path, all_series = test_tsf
+    loaded_data, _, _, _, _ = loader.convert_tsf_to_dataframe(path)
+    loaded_data["label"] = pd.Series(["a", None] * (len(loaded_data) // 2), dtype=object)
+
+    RaggedSeries.from_dataframe(loaded_data).save(str(tmp_path / "series"))
+    series = RaggedSeries.load(str(tmp_path / "series"), mmap=mmap)
+
+    _assert_same_series(series, all_series)
+    assert series.attributes["series_name"].tolist() == loaded_data["series_name"].tolist()
+    assert series.attributes["start_timestamp"].dtype == np.dtype("datetime64[ns]")
+    np.testing.assert_array_equal(series.attributes["start_timestamp"], loaded_data["start_timestamp"].to_numpy())
+    assert series.attributes["label"].tolist() == ["a", "None"] * (len(loaded_data) // 2)
+
+
+def test_save_and_load_windows(tmp_path):
+    series = RaggedSeries.from_offsets(np.arange(10, dtype=np.float64), [0, 4, 10], {"id": np.array([3, 7])})
+    series.window(1, -1).save(str(tmp_path / "windows"))
+    loaded = RaggedSeries.load(str(tmp_path / "windows"))
+
+    _assert_same_series(loaded, [[1, 2], [5, 6, 7, 8]])
+    np.testing.assert_array_equal(loaded.attributes["id"], [3, 7])
+
+
+def test_train_test_split_of_series_shorter_than_the_horizon():
+    series = RaggedSeries.from_offsets(np.arange(10, dtype=np.float64), [0, 7, 9, 10])
+    train, test = series.train_test_split(3)
+
+    _assert_same_series(train, [[0, 1, 2, 3], [], []])
+    _assert_same_series(test, [[4, 5, 6], [7, 8], [9]])
+    np.testing.assert_array_equal(test.to_matrix(np.nan), [[4, 5, 6], [7, 8, np.nan], [9, np.nan, np.nan]])
+
+    with pytest.raises(Exception):
+        test.to_matrix()
+
+
+@pytest.mark.parametrize("horizon", [0, -2, np.array([1, 0, 2])])
+def test_train_test_split_rejects_horizons_that_are_not_positive(horizon):
+    series = RaggedSeries.from_offsets(np.arange(10, dtype=np.float64), [0, 7, 9, 10])
+
+    with pytest.raises(Exception, match="positive"):
+        series.train_test_split(horizon)
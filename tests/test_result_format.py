@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+import stat
+import subprocess
+
+import numpy as np
+import pytest
+
+import utils.atomic_write as atomic_write
+import utils.result_format as result_format
+from conftest import REPO_DIR
+from utils.ragged_series import RaggedSeries
+
+ROWS = [np.array([1.5, 2.25, -3.0]), np.array([4.0]), np.array([]), np.array([np.nan, 6.0])]
+
+
+# Reads a result file in the same order and with the same sizes as read_result_matrix in utils/result_format.R
+def _read_like_r(file_path):
+    with open(file_path, "rb") as file:
+        assert file.read(8) == b"TSFRES01"
+        header_length = int.from_bytes(file.read(4), "little")
+        header = json.loads(file.read(header_length).decode("utf-8"))
+        value_size = int.from_bytes(file.read(4), "little")
+        num_rows, num_cols = int.from_bytes(file.read(4), "little"), int.from_bytes(file.read(4), "little")
+        lengths = np.frombuffer(file.read(4 * num_rows), dtype="<i4")
+        values = np.frombuffer(file.read(value_size * num_rows * num_cols), dtype="<f" + str(value_size))
+        assert file.read() == b""
+
+    return values.reshape(num_rows, num_cols), lengths, header
+
+
+def _padded(rows):
+    matrix = np.full((len(rows), max(len(row) for row in rows)), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_round_trip(tmp_path, dtype):
+    path = str(tmp_path / ("forecasts" + result_format.RESULT_FILE_EXTENSION))
+
+    result_format.write_result_matrix(path, ROWS, {"dataset": "sample", "method": "deepar", "lag": 10, "horizon": 3}, dtype)
+    matrix, lengths, header = result_format.read_result_matrix(path)
+
+    assert matrix.dtype == dtype
+    np.testing.assert_array_equal(matrix, _padded(ROWS).astype(dtype))
+    np.testing.assert_array_equal(lengths, [3, 1, 0, 2])
+    assert header == {"dataset": "sample", "method": "deepar", "lag": 10, "horizon": 3, "dtype": np.dtype(dtype).name, "shape": [4, 3]}
+
+    mapped_matrix = result_format.read_result_matrix(path, mmap=True)[0]
+    assert isinstance(mapped_matrix, np.memmap)
+    np.testing.assert_array_equal(mapped_matrix, matrix)
+
+    # The layout read by the R reader
+    r_matrix, r_lengths, r_header = _read_like_r(path)
+    np.testing.assert_array_equal(r_matrix, matrix)
+    np.testing.assert_array_equal(r_lengths, lengths)
+    assert r_header == header
+
+
+def test_matrix_and_ragged_series_give_the_same_file(tmp_path):
+    matrix = _padded(ROWS)
+    series = RaggedSeries.from_offsets(np.concatenate(ROWS), np.concatenate(([0], np.cumsum([len(row) for row in ROWS]))))
+
+    result_format.write_result_matrix(str(tmp_path / "list.bin"), ROWS)
+    result_format.write_result_matrix(str(tmp_path / "matrix.bin"), matrix, lengths=[3, 1, 0, 2])
+    result_format.write_result_matrix(str(tmp_path / "series.bin"), series)
+
+    content = (tmp_path / "list.bin").read_bytes()
+    assert (tmp_path / "matrix.bin").read_bytes() == content
+    assert (tmp_path / "series.bin").read_bytes() == content
+
+    result_format.write_result_matrix(str(tmp_path / "full.bin"), matrix)
+    np.testing.assert_array_equal(result_format.read_result_matrix(str(tmp_path / "full.bin"))[1], [3, 3, 3, 3])
+
+
+def test_invalid_files(tmp_path):
+    with pytest.raises(Exception, match="float32 or float64"):
+        result_format.write_result_matrix(str(tmp_path / "forecasts.bin"), ROWS, dtype=np.int32)
+
+    (tmp_path / "forecasts.txt").write_text("1,2,3\n")
+    with pytest.raises(Exception, match="not a result file"):
+        result_format.read_result_matrix(str(tmp_path / "forecasts.txt"))
+
+
+def test_export_result_text(tmp_path):
+    path = str(tmp_path / "forecasts.bin")
+    result_format.write_result_matrix(path, [np.array([1.5, 2.0]), np.array([0.1])], dtype=np.float32)
+
+    text_path = result_format.export_result_text(path)
+
+    assert text_path == str(tmp_path / "forecasts.txt")
+    assert (tmp_path / "forecasts.txt").read_text() == "1.5,2.0\n0.1\n"
+
+
+def test_export_result_text_with_row_names(tmp_path):
+    path = str(tmp_path / "forecasts.bin")
+    result_format.write_result_matrix(path, [np.array([1.0]), np.array([2.0, np.nan])], {"row_names": ["T1", "T2"]}, np.float64)
+
+    result_format.export_result_text(path, str(tmp_path / "named.txt"))
+
+    assert (tmp_path / "named.txt").read_text() == "T1,1.0\nT2,2.0,nan\n"
+
+
+def test_files_are_written_atomically(tmp_path):
+    path = str(tmp_path / "results" / "forecasts.txt")
+
+    with atomic_write.open_atomically(path) as output:
+        output.write("1,2\n")
+        assert not os.path.exists(path)
+
+    assert open(path).read() == "1,2\n"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~atomic_write.UMASK
+
+    with pytest.raises(ValueError):
+        with atomic_write.open_atomically(path) as output:
+            output.write("3,4\n")
+            raise ValueError()
+
+    assert open(path).read() == "1,2\n"
+    assert os.listdir(str(tmp_path / "results")) == ["forecasts.txt"]
+
+
+@pytest.mark.skipif(shutil.which("Rscript") is None, reason="R is not installed")
+def test_r_reader(tmp_path):
+    path = str(tmp_path / "forecasts.bin")
+    result_format.write_result_matrix(path, ROWS, {"dataset": "sample"}, np.float64)
+
+    script = (
+        'source("' + os.path.join(REPO_DIR, "utils", "result_format.R") + '"); '
+        'result <- read_result_matrix("' + path + '"); '
+        'write.table(result[[1]], stdout(), sep = ",", row.names = FALSE, col.names = FALSE); '
+        'cat(result[[2]], sep = ",")'
+    )
+    output = subprocess.run(["Rscript", "-e", script], capture_output=True, text=True, check=True).stdout.splitlines()
+
+    assert output == ["1.5,2.25,-3", "4,NA,NA", "NA,NA,NA", "NA,6,NA", "3,1,0,2"]
@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import shutil
+
+import numpy as np
+
+import utils.data_loader as loader
+import utils.tsf_cache as tsf_cache
+
+
+def _load_cached(args):
+    path, cache_dir = args
+    loaded_data, _, _, _, _ = tsf_cache.convert_tsf_to_dataframe_cached(path, 0, cache_dir=cache_dir)
+    return [np.sum(values) for values in loaded_data["series_value"]]
+
+
+def test_cached_dataframe_matches_loader(test_tsf, tmp_path):
+    path, _ = test_tsf
+    expected = loader.convert_tsf_to_dataframe(path)
+
+    for _ in range(2):  # The second call reads the entry built by the first call
+        loaded = tsf_cache.convert_tsf_to_dataframe_cached(path, cache_dir=str(tmp_path / "cache"))
+
+        assert loaded[1:] == expected[1:]
+        assert loaded[0]["series_name"].tolist() == expected[0]["series_name"].tolist()
+        for values, expected_values in zip(loaded[0]["series_value"], expected[0]["series_value"]):
+            assert list(values) == list(expected_values)
+
+
+def test_entry_built_by_another_process_is_kept(test_tsf, tmp_path, monkeypatch):
+    path, _ = test_tsf
+    cache_dir = str(tmp_path / "cache")
+    entry_path = os.path.join(cache_dir, tsf_cache.get_cache_key(path))
+
+    # Another process builds the entry after this process found that it does not exist
+    tsf_cache.build_tsf_cache(path, entry_path)
+
+    is_valid_entry = tsf_cache._is_valid_entry
+    checks = []
+
+    def is_valid_after_first_check(entry):
+        checks.append(entry)
+        return len(checks) > 1 and is_valid_entry(entry)
+
+    def fail_to_build(*args):
+        raise AssertionError("The entry should not be built again.")
+
+    monkeypatch.setattr(tsf_cache, "_is_valid_entry", is_valid_after_first_check)
+    monkeypatch.setattr(tsf_cache, "build_tsf_cache", fail_to_build)
+
+    assert tsf_cache.get_tsf_cache_entry(path, cache_dir) == entry_path
+    monkeypatch.undo()
+
+    assert tsf_cache._is_valid_entry(entry_path)
+    tsf_cache.read_tsf_cache(entry_path)
+
+
+def test_invalidation_removes_only_other_entries_of_the_file(test_tsf, tmp_path):
+    path, _ = test_tsf
+    cache_dir = str(tmp_path / "cache")
+    entry_path = tsf_cache.get_tsf_cache_entry(path, cache_dir)
+
+    stale_entry_path = os.path.join(cache_dir, "test.tsf_stale")
+    shutil.copytree(entry_path, stale_entry_path)
+
+    other_path = str(tmp_path / "other.tsf")
+    shutil.copy(path, other_path)
+    other_entry_path = tsf_cache.get_tsf_cache_entry(other_path, cache_dir)
+
+    unknown_folder = os.path.join(cache_dir, "unknown")
+    os.makedirs(unknown_folder)
+
+    tsf_cache.invalidate_tsf_cache(path, cache_dir, keep=entry_path)
+
+    assert os.path.exists(entry_path)
+    assert not os.path.exists(stale_entry_path)
+    assert os.path.exists(other_entry_path)
+    assert os.path.exists(unknown_folder)
+
+    tsf_cache.invalidate_tsf_cache(path, cache_dir)
+    assert not os.path.exists(entry_path)
+    assert os.path.exists(other_entry_path)
+
+
+def test_broken_entry_is_rebuilt(test_tsf, tmp_path):
+    path, _ = test_tsf
+    cache_dir = str(tmp_path / "cache")
+    entry_path = tsf_cache.get_tsf_cache_entry(path, cache_dir)
+
+    os.remove(os.path.join(entry_path, tsf_cache.METADATA_FILE_NAME))
+
+    assert tsf_cache.get_tsf_cache_entry(path, cache_dir) == entry_path
+    assert tsf_cache._is_valid_entry(entry_path)
+
+
+def test_concurrent_loads_of_the_same_dataset(test_tsf, tmp_path):
+    path, all_series = test_tsf
+    expected = [np.nansum(values) for values in all_series]
+
+    for attempt in range(3):
+        cache_dir = str(tmp_path / ("cache_" + str(attempt)))
+
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(_load_cached, [(path, cache_dir)] * 8))
+
+        for sums in results:
+            np.testing.assert_allclose(sums, expected)
@@ -0,0 +1,110 @@
+from datetime import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.data_loader as loader
+import utils.tsf_index as tsf_index
+from conftest import write_test_tsf
+
+
+def _assert_same_series(loaded_data, expected_data):
+    assert loaded_data["series_name"].tolist() == expected_data["series_name"].tolist()
+    assert loaded_data["start_timestamp"].tolist() == expected_data["start_timestamp"].tolist()
+    for values, expected_values in zip(loaded_data["series_value"], expected_data["series_value"]):
+        np.testing.assert_array_equal(np.asarray(values, dtype=np.float64), np.asarray(expected_values, dtype=np.float64))
+
+
+def test_lines_match_the_loaded_series(test_tsf):
+    path, all_series = test_tsf
+    expected_data = loader.convert_tsf_to_dataframe(path)[0]
+
+    index = tsf_index.open_tsf_index(path)
+
+    assert os.path.exists(path + tsf_index.INDEX_FILE_EXTENSION)
+    assert len(index) == len(expected_data)
+    np.testing.assert_array_equal(index.lengths, [len(values) for values in all_series])
+
+    # Each byte range contains exactly the line of its series
+    with open(path, "rb") as file:
+        content = file.read()
+    for i in range(len(index)):
+        line = content[index.line_starts[i]:index.line_starts[i] + index.line_sizes[i]].decode("cp1252")
+        assert line.startswith(expected_data["series_name"][i] + ":")
+        assert "\n" not in line
+        assert content[index.line_starts[i] + index.line_sizes[i]:index.line_starts[i] + index.line_sizes[i] + 1] == b"\n"
+
+    _assert_same_series(index.read_dataframe(np.arange(len(index))), expected_data)
+
+
+def test_read_tsf_series_in_the_given_order(test_tsf):
+    path, _ = test_tsf
+    expected_data, *expected_metadata = loader.convert_tsf_to_dataframe(path)
+
+    loaded_data, *metadata = tsf_index.read_tsf_series(path, ["T12", "T3", "T40"])
+
+    assert metadata == expected_metadata
+    _assert_same_series(loaded_data, expected_data.iloc[[11, 2, 39]].reset_index(drop=True))
+
+
+def test_positions_of_dates(test_tsf):
+    path, _ = test_tsf
+    index = tsf_index.open_tsf_index(path)
+
+    # T3 is the first series starting in March 2010
+    assert index.attributes["start_timestamp"].dtype == np.dtype("datetime64[ns]")
+    expected = [2, 2, 2, 2, 0]
+    keys = [np.datetime64("2010-03-01"), pd.Timestamp("2010-03-01"), datetime(2010, 3, 1), "2010-03-01T00:00:00", index.attributes["start_timestamp"][0]]
+    np.testing.assert_array_equal(index.get_positions(keys, "start_timestamp"), expected)
+
+
+def test_unknown_keys(test_tsf):
+    path, _ = test_tsf
+    index = tsf_index.open_tsf_index(path)
+
+    with pytest.raises(Exception, match="Series not found: T0, T41"):
+        index.get_positions(["T1", "T0", "T41"])
+    with pytest.raises(Exception, match="Series not found: 2011-03-01"):
+        index.get_positions([np.datetime64("2011-03-01")], "start_timestamp")
+    with pytest.raises(Exception, match="Invalid attribute: name"):
+        index.get_positions(["T1"], "name")
+    with pytest.raises(Exception, match="between 0 and 39"):
+        index.read_series([40])
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    path, _ = write_test_tsf(str(tmp_path / "test.tsf"), num_series=10)
+    index = tsf_index.open_tsf_index(path)
+    assert len(index) == 10
+
+    path, _ = write_test_tsf(path, num_series=12, seed=1)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    rebuilt_index = tsf_index.open_tsf_index(path)
+    assert len(rebuilt_index) == 12
+    _assert_same_series(rebuilt_index.read_dataframe(np.arange(12)), loader.convert_tsf_to_dataframe(path)[0])
+
+
+def test_index_of_an_older_layout_is_rebuilt(tmp_path, monkeypatch):
+    path, _ = write_test_tsf(str(tmp_path / "test.tsf"), num_series=10)
+    tsf_index.build_tsf_index(path)
+
+    monkeypatch.setattr(tsf_index, "INDEX_FORMAT_VERSION", tsf_index.INDEX_FORMAT_VERSION + 1)
+
+    assert tsf_index._read_tsf_index(path, path + tsf_index.INDEX_FILE_EXTENSION) is None
+    assert tsf_index.open_tsf_index(path).metadata["version"] == tsf_index.INDEX_FORMAT_VERSION
+
+
+def test_compressed_files_cannot_be_indexed(test_tsf, tmp_path):
+    path, _ = test_tsf
+    output_path = str(tmp_path / "written.tsf.gz")
+    loader.convert_dataframe_to_tsf(output_path, *loader.convert_tsf_to_dataframe(path))
+
+    with pytest.raises(Exception, match="cannot be indexed"):
+        tsf_index.build_tsf_index(output_path)
+    with pytest.raises(Exception, match="cannot be indexed"):
+        tsf_index.read_tsf_series(output_path, ["T1"])
+    assert not os.path.exists(output_path + tsf_index.INDEX_FILE_EXTENSION)
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import utils.global_model_helper as global_model_helper
+from utils.ragged_series import RaggedSeries
+from utils.window_sampler import WindowSampler
+
+
+def _create_dataset(seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.gamma(2, 50, rng.integers(3, 40)) for _ in range(30)]
+
+
+def test_same_seed_samples_the_same_windows():
+    dataset = _create_dataset()
+
+    first_batches = list(WindowSampler(dataset, 6, seed=7).iterate_batches(50, 3))
+    second_batches = list(WindowSampler(dataset, 6, seed=7).iterate_batches(50, 3))
+    other_batches = list(WindowSampler(dataset, 6, seed=8).iterate_batches(50, 3))
+
+    assert len(first_batches) == 3
+    for first, second in zip(first_batches, second_batches):
+        np.testing.assert_array_equal(first.attributes["series_index"], second.attributes["series_index"])
+        np.testing.assert_array_equal(first.attributes["position"], second.attributes["position"])
+        np.testing.assert_array_equal(first.to_matrix(), second.to_matrix())
+    assert not all(np.array_equal(first.to_matrix(), other.to_matrix()) for first, other in zip(first_batches, other_batches))
+
+
+def test_windows_are_views_of_the_series():
+    dataset = _create_dataset()
+    sampler = WindowSampler(dataset, 6)
+
+    windows = sampler.sample_windows(500)
+
+    assert windows.values is sampler.series.values
+    assert np.all(windows.lengths == 6)
+    for window, s, position in zip(windows, windows.attributes["series_index"], windows.attributes["position"]):
+        assert len(dataset[s]) >= 6
+        np.testing.assert_array_equal(window, dataset[s][position:position + 6])
+
+
+def test_windows_are_equally_likely():
+    dataset = [np.arange(10.0), np.arange(40.0), np.arange(3.0)]
+    sampler = WindowSampler(dataset, 5)
+
+    windows = sampler.sample_windows(200000)
+
+    # 6 and 36 windows. The series shorter than the window is never sampled
+    counts = np.bincount(windows.attributes["series_index"], minlength=3)
+    np.testing.assert_allclose(counts / len(windows), [6 / 42, 36 / 42, 0], atol=0.005)
+    positions = windows.attributes["position"][windows.attributes["series_index"] == 1]
+    np.testing.assert_allclose(np.bincount(positions) / len(positions), np.full(36, 1 / 36), atol=0.01)
+
+
+def test_series_weights():
+    dataset = [np.arange(10.0), np.arange(40.0), np.arange(20.0)]
+    sampler = WindowSampler(dataset, 5, series_weights=[1, 0, 3])
+
+    counts = np.bincount(sampler.sample_windows(100000).attributes["series_index"], minlength=3)
+
+    np.testing.assert_allclose(counts / counts.sum(), [0.25, 0, 0.75], atol=0.01)
+
+    with pytest.raises(Exception, match="non-negative"):
+        WindowSampler(dataset, 5, series_weights=[1, -1, 1])
+    with pytest.raises(Exception, match="non-negative"):
+        WindowSampler(dataset, 50)
+
+
+def test_short_series_are_sampled_as_one_window():
+    dataset = [np.arange(3.0), np.arange(10.0)]
+    sampler = WindowSampler(dataset, 5, series_weights=[1, 0], allow_short_series=True)
+
+    windows = sampler.sample_windows(10)
+
+    assert np.all(windows.attributes["series_index"] == 0)
+    np.testing.assert_array_equal(windows.to_matrix(), np.tile(np.arange(3.0), (10, 1)))
+    with pytest.raises(Exception, match="full length"):
+        sampler.sample_lags_and_targets(10)
+
+
+def test_lags_and_targets_are_rows_of_the_embedded_matrix():
+    lag = 4
+    dataset = [values for values in _create_dataset() if len(values) > lag]
+    series = RaggedSeries.from_offsets(np.concatenate(dataset), np.concatenate(([0], np.cumsum([len(values) for values in dataset]))))
+    embedded_series, _, series_means = global_model_helper.create_input_matrix(series, lag)
+    sampler = WindowSampler(series, lag + 1, seed=3)
+
+    lags, targets = sampler.sample_lags_and_targets(300, series_means, dtype=np.float64)
+
+    # The rows of a series start after the rows of the previous series
+    windows = WindowSampler(series, lag + 1, seed=3).sample_windows(300)
+    first_rows = np.concatenate(([0], np.cumsum(sampler.num_windows)))[:-1]
+    rows = first_rows[windows.attributes["series_index"]] + windows.attributes["position"]
+    np.testing.assert_allclose(targets, embedded_series[rows, 0], rtol=1e-13)
+    np.testing.assert_allclose(lags, embedded_series[rows, 1:], rtol=1e-13)
+    assert sampler.sample_lags_and_targets(10, series_means)[0].dtype == np.float32
@@ -0,0 +1,42 @@
+import contextlib
+import os
+import tempfile
+
+# Function to write files atomically, shared by the modules writing results, caches and manifests
+# It only depends on the standard library, so any module can import it
+
+# The umask of the process, used to give the written files the usual permissions
+# It is read once when the module is imported, as os.umask can only read the umask by changing it, which would race with other threads creating files
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+# Opens a temporary file next to a file for writing and moves it to the file when it is closed without an error
+# Readers, e.g. other sweeps running at the same time, never see a partially written file
+#
+# Parameters
+# file_path - path of the file
+# mode - file mode, "w" for text or "wb" for binary
+@contextlib.contextmanager
+def open_atomically(file_path, mode="w"):
+    folder = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(folder, exist_ok=True)
+
+    file_descriptor, temp_path = tempfile.mkstemp(prefix=".tmp_", dir=folder)
+
+    try:
+        with os.fdopen(file_descriptor, mode) as output:
+            yield output
+
+        # mkstemp creates the file readable only by its owner, so the usual permissions are restored
+        os.chmod(temp_path, 0o666 & ~UMASK)
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+# Example of usage
+# with open_atomically("results/manifest.json", "w") as output:
+#     output.write("{}")
@@ -1,148 +1,391 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from distutils.util import strtobool
+import bz2
+import functools
+import gzip
+import io
+import lzma
+import os
 
+import numpy as np
 import pandas as pd
 
+from utils.atomic_write import open_atomically
 
-# Converts the contents in a .tsf file into a dataframe and returns it along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+# pandas renamed PandasArray to NumpyExtensionArray in 1.5; both wrap a numpy array without copying
+_NumpyArray = getattr(pd.arrays, "NumpyExtensionArray", None) or pd.arrays.PandasArray
+
+# Format of the date attributes
+DATE_FORMAT = "%Y-%m-%d %H-%M-%S"
+
+# Maximum number of distinct dates remembered by parse_date
+DATE_CACHE_SIZE = 4096
+
+# The first bytes of compressed .tsf files and their compression formats
+COMPRESSION_MAGIC_NUMBERS = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+# File name extensions of the compression formats, used to compress the .tsf files written by convert_dataframe_to_tsf
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+# Number of characters of a compressed .tsf file decompressed at once and sent to a worker process when it is parsed in parallel
+DECOMPRESSED_BLOCK_SIZE = 16 * 1024 ** 2
+
+# Number of values converted into text at once by convert_dataframe_to_tsf
+WRITE_CHUNK_SIZE = 1000000
+
+# Series values with at most this number of decimals are written with array operations instead of converting each value into a string
+MAX_FAST_DECIMALS = 10
+
+
+# Converts the comma separated values of a series into a float64 numpy array in bulk, without a per-value Python loop
+# Returns the values along with a boolean mask indicating the positions of the missing values given by ? symbol
+# Only ? indicates a missing value, so NaN values written as text (e.g. nan) are rejected like other values that are not numeric
+#
+# Parameters
+# series - comma separated series values as a string
+def parse_series_values(series):
+    values = np.array(series.replace("?", "nan").split(","), dtype=np.float64)
+    missing = np.isnan(values)
+
+    if not missing.any():
+        return values, None
+
+    # The values parsed as NaN should all be given by ? symbol
+    texts = np.array(series.split(","), dtype=object)[missing]
+    invalid = texts != "?"
+    if invalid.any():
+        raise Exception("Invalid series value: " + str(texts[invalid][0]) + ". Missing values should be indicated with ? symbol")
+
+    return values, missing
+
+
+# Converts date attribute values into a datetime64[ns] array in one vectorized pass
+# Each distinct value is parsed only once, as most datasets have the same or only a few distinct start timestamps
+# Dates outside the range of datetime64[ns], about years 1677 to 2262, are rejected as invalid values
+#
+# Parameters
+# dates - list or array of date strings in the format given by DATE_FORMAT
+def parse_dates(dates):
+    codes, unique_dates = pd.factorize(np.asarray(dates, dtype=object))
+
+    try:
+        parsed_dates = pd.to_datetime(unique_dates, format=DATE_FORMAT)
+
+        # Newer pandas versions parse the dates outside the datetime64[ns] range with a coarser unit instead of raising, and converting them would silently overflow
+        out_of_range = (parsed_dates < pd.Timestamp.min) | (parsed_dates > pd.Timestamp.max)
+        if out_of_range.any():
+            raise Exception("Invalid date attribute value: " + str(unique_dates[np.argmax(out_of_range)]) + ". Dates should be between " + str(pd.Timestamp.min) + " and " + str(pd.Timestamp.max))
+
+        parsed_dates = parsed_dates.to_numpy(dtype="datetime64[ns]")
+    except (ValueError, OverflowError) as e:
+        # Find the first invalid value to report it
+        for date in unique_dates:
+            try:
+                pd.Timestamp(parse_date(date)).as_unit("ns")
+            except (ValueError, OverflowError):
+                raise Exception("Invalid date attribute value: " + str(date)) from e
+        raise
+
+    return parsed_dates[codes]
+
+
+# Converts a date attribute value into a datetime, remembering the recently parsed values
+#
+# Parameters
+# date - date string in the format given by DATE_FORMAT
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(date):
+    return datetime.strptime(date, DATE_FORMAT)
+
+
+# Wraps the parsed values of a series in the same pandas array type used for the series values column of the returning dataframe
+# Missing values are replaced by replace_missing_vals_with. If it is not numeric, an object array is created as the values cannot be stored as floats
+# The given values are never modified, so read-only or memory-mapped buffers can be passed
+#
+# Parameters
+# values - float64 numpy array containing series values
+# missing - boolean mask indicating the missing values or None if there are no missing values
+# replace_missing_vals_with - a term to indicate the missing values in series
+def to_series_array(values, missing, replace_missing_vals_with="NaN"):
+    if missing is not None and missing.any():
+        if isinstance(replace_missing_vals_with, (int, float)) and not isinstance(
+            replace_missing_vals_with, bool
+        ):
+            values = np.where(missing, float(replace_missing_vals_with), values)
+        else:
+            values = values.astype(object)
+            values[missing] = replace_missing_vals_with
+
+    return _NumpyArray(values)
+
+
+# Returns the compression format of a .tsf file found from its first bytes: gzip, bz2, xz or zstd, or None if the file is not compressed
 #
 # Parameters
 # full_file_path_and_name - complete .tsf file path
-# replace_missing_vals_with - a term to indicate the missing values in series in the returning dataframe
-# value_column_name - Any name that is preferred to have as the name of the column containing series values in the returning dataframe
-def convert_tsf_to_dataframe(
-    full_file_path_and_name,
-    replace_missing_vals_with="NaN",
-    value_column_name="series_value",
-):
+def get_tsf_compression(full_file_path_and_name):
+    with open(full_file_path_and_name, "rb") as file:
+        first_bytes = file.read(8)
+
+    for magic_number, compression in COMPRESSION_MAGIC_NUMBERS.items():
+        if first_bytes.startswith(magic_number):
+            return compression
+
+    return None
+
+
+# Opens a .tsf file in text mode. Compressed files are decompressed while they are read, so they are never written to disk decompressed
+# The zstd format requires the zstandard package
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path, which can be compressed with gzip, bz2, xz or zstd
+def open_tsf_file(full_file_path_and_name):
+    compression = get_tsf_compression(full_file_path_and_name)
+
+    if compression is None:
+        return open(full_file_path_and_name, "r", encoding="cp1252")
+    elif compression == "gzip":
+        return gzip.open(full_file_path_and_name, "rt", encoding="cp1252")
+    elif compression == "bz2":
+        return bz2.open(full_file_path_and_name, "rt", encoding="cp1252")
+    elif compression == "xz":
+        return lzma.open(full_file_path_and_name, "rt", encoding="cp1252")
+    else:
+        zstandard = _import_zstandard()
+        file = open(full_file_path_and_name, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(io.BufferedReader(reader), encoding="cp1252")
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception("The zstandard package is required to read and write .tsf files compressed with zstd.")
+
+    return zstandard
+
+
+# Reads the meta-data section of a .tsf file until the @data tag and returns the attribute names and types along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+# The number of lines read, including the @data tag, is also returned to number the lines of the data section in error messages
+# After returning, the file is positioned at the start of the data section
+#
+# Parameters
+# file - a .tsf file opened in text mode
+def read_tsf_header(file):
     col_names = []
     col_types = []
-    all_data = {}
     line_count = 0
+    line_number = 0
     frequency = None
     forecast_horizon = None
     contain_missing_values = None
     contain_equal_length = None
-    found_data_tag = False
-    found_data_section = False
-    started_reading_data_section = False
-
-    with open(full_file_path_and_name, "r", encoding="cp1252") as file:
-        for line in file:
-            # Strip white space from start/end of line
-            line = line.strip()
-
-            if line:
-                if line.startswith("@"):  # Read meta-data
-                    if not line.startswith("@data"):
-                        line_content = line.split(" ")
-                        if line.startswith("@attribute"):
-                            if (
-                                len(line_content) != 3
-                            ):  # Attributes have both name and type
-                                raise Exception("Invalid meta-data specification.")
-
-                            col_names.append(line_content[1])
-                            col_types.append(line_content[2])
-                        else:
-                            if (
-                                len(line_content) != 2
-                            ):  # Other meta-data have only values
-                                raise Exception("Invalid meta-data specification.")
-
-                            if line.startswith("@frequency"):
-                                frequency = line_content[1]
-                            elif line.startswith("@horizon"):
-                                forecast_horizon = int(line_content[1])
-                            elif line.startswith("@missing"):
-                                contain_missing_values = bool(
-                                    strtobool(line_content[1])
-                                )
-                            elif line.startswith("@equallength"):
-                                contain_equal_length = bool(strtobool(line_content[1]))
 
+    while True:
+        line = file.readline()
+        if not line:
+            break
+
+        line_number = line_number + 1
+
+        # Strip white space from start/end of line
+        line = line.strip()
+
+        if line:
+            line_count = line_count + 1
+
+            if line.startswith("@"):  # Read meta-data
+                if not line.startswith("@data"):
+                    line_content = line.split(" ")
+                    if line.startswith("@attribute"):
+                        if len(line_content) != 3:  # Attributes have both name and type
+                            raise Exception("Invalid meta-data specification.")
+
+                        col_names.append(line_content[1])
+                        col_types.append(line_content[2])
                     else:
-                        if len(col_names) == 0:
-                            raise Exception(
-                                "Missing attribute section. Attribute section must come before data."
-                            )
+                        if len(line_content) != 2:  # Other meta-data have only values
+                            raise Exception("Invalid meta-data specification.")
+
+                        if line.startswith("@frequency"):
+                            frequency = line_content[1]
+                        elif line.startswith("@horizon"):
+                            forecast_horizon = int(line_content[1])
+                        elif line.startswith("@missing"):
+                            contain_missing_values = bool(strtobool(line_content[1]))
+                        elif line.startswith("@equallength"):
+                            contain_equal_length = bool(strtobool(line_content[1]))
 
-                        found_data_tag = True
-                elif not line.startswith("#"):
+                else:
                     if len(col_names) == 0:
                         raise Exception(
                             "Missing attribute section. Attribute section must come before data."
                         )
-                    elif not found_data_tag:
-                        raise Exception("Missing @data tag.")
-                    else:
-                        if not started_reading_data_section:
-                            started_reading_data_section = True
-                            found_data_section = True
-                            all_series = []
-
-                            for col in col_names:
-                                all_data[col] = []
-
-                        full_info = line.split(":")
-
-                        if len(full_info) != (len(col_names) + 1):
-                            raise Exception("Missing attributes/values in series.")
-
-                        series = full_info[len(full_info) - 1]
-                        series = series.split(",")
-
-                        if len(series) == 0:
-                            raise Exception(
-                                "A given series should contains a set of comma separated numeric values. At least one numeric value should be there in a series. Missing values should be indicated with ? symbol"
-                            )
-
-                        numeric_series = []
-
-                        for val in series:
-                            if val == "?":
-                                numeric_series.append(replace_missing_vals_with)
-                            else:
-                                numeric_series.append(float(val))
-
-                        if numeric_series.count(replace_missing_vals_with) == len(
-                            numeric_series
-                        ):
-                            raise Exception(
-                                "All series values are missing. A given series should contains a set of comma separated numeric values. At least one numeric value should be there in a series."
-                            )
-
-                        all_series.append(pd.Series(numeric_series).array)
-
-                        for i in range(len(col_names)):
-                            att_val = None
-                            if col_types[i] == "numeric":
-                                att_val = int(full_info[i])
-                            elif col_types[i] == "string":
-                                att_val = str(full_info[i])
-                            elif col_types[i] == "date":
-                                att_val = datetime.strptime(
-                                    full_info[i], "%Y-%m-%d %H-%M-%S"
-                                )
-                            else:
-                                raise Exception(
-                                    "Invalid attribute type."
-                                )  # Currently, the code supports only numeric, string and date types. Extend this as required.
-
-                            if att_val is None:
-                                raise Exception("Invalid attribute value.")
-                            else:
-                                all_data[col_names[i]].append(att_val)
-
-                line_count = line_count + 1
-
-        if line_count == 0:
-            raise Exception("Empty file.")
-        if len(col_names) == 0:
-            raise Exception("Missing attribute section.")
-        if not found_data_section:
+
+                    return (
+                        col_names,
+                        col_types,
+                        frequency,
+                        forecast_horizon,
+                        contain_missing_values,
+                        contain_equal_length,
+                        line_number,
+                    )
+            elif not line.startswith("#"):
+                if len(col_names) == 0:
+                    raise Exception(
+                        "Missing attribute section. Attribute section must come before data."
+                    )
+                else:
+                    raise Exception("Missing @data tag.")
+
+    if line_count == 0:
+        raise Exception("Empty file.")
+    if len(col_names) == 0:
+        raise Exception("Missing attribute section.")
+
+    raise Exception("Missing series information under data section.")
+
+
+# Parses a line in the data section of a .tsf file
+# Returns the attribute values of the series, the series values as a float64 numpy array and the mask of missing values (None if there are no missing values)
+# Date attributes are returned as strings, so the dates of all series can be converted together by parse_dates
+#
+# Parameters
+# line - a stripped line from the data section
+# col_names - attribute names given in the meta-data section
+# col_types - attribute types given in the meta-data section
+def parse_tsf_data_line(line, col_names, col_types):
+    full_info = line.split(":")
+
+    if len(full_info) != (len(col_names) + 1):
+        raise Exception("Missing attributes/values in series.")
+
+    series = full_info[len(full_info) - 1]
+
+    if len(series) == 0:
+        raise Exception(
+            "A given series should contains a set of comma separated numeric values. At least one numeric value should be there in a series. Missing values should be indicated with ? symbol"
+        )
+
+    values, missing = parse_series_values(series)
+
+    if missing is not None and missing.all():
+        raise Exception(
+            "All series values are missing. A given series should contains a set of comma separated numeric values. At least one numeric value should be there in a series."
+        )
+
+    attributes = []
+
+    for i in range(len(col_names)):
+        att_val = None
+        if col_types[i] == "numeric":
+            att_val = int(full_info[i])
+        elif col_types[i] == "string":
+            att_val = str(full_info[i])
+        elif col_types[i] == "date":
+            att_val = str(full_info[i]) # Converted together with the dates of the other series by parse_dates
+        else:
+            raise Exception(
+                "Invalid attribute type."
+            )  # Currently, the code supports only numeric, string and date types. Extend this as required.
+
+        if att_val is None:
+            raise Exception("Invalid attribute value.")
+        else:
+            attributes.append(att_val)
+
+    return attributes, values, missing
+
+
+# Yields the parsed lines of the data section of a .tsf file one at a time, skipping empty lines and comments
+# Errors in a line are raised with the line number
+#
+# Parameters
+# lines - iterable of the lines in the data section, e.g. a .tsf file positioned at the start of the data section
+# col_names - attribute names given in the meta-data section
+# col_types - attribute types given in the meta-data section
+# line_number - number of lines before the data section
+def _iterate_tsf_data(lines, col_names, col_types, line_number=0):
+    for line in lines:
+        line_number = line_number + 1
+
+        # Strip white space from start/end of line
+        line = line.strip()
+
+        if line and not line.startswith("#") and not line.startswith("@"):
+            try:
+                parsed_line = parse_tsf_data_line(line, col_names, col_types)
+            except Exception as e:
+                raise Exception(_add_line_number(e, line_number)) from e
+
+            yield parsed_line
+
+
+def _add_line_number(message, line_number):
+    return str(message) + " (line " + str(line_number) + ")"
+
+
+# Converts the contents in a .tsf file into a dataframe and returns it along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path, which can be compressed with gzip, bz2, xz or zstd
+# replace_missing_vals_with - a term to indicate the missing values in series in the returning dataframe
+# value_column_name - Any name that is preferred to have as the name of the column containing series values in the returning dataframe
+# workers - number of processes used to parse the data section. The data section is split into byte ranges at line boundaries, which are parsed in parallel and merged in the original order. Compressed files are split into blocks of lines while they are decompressed. None uses all available cores
+def convert_tsf_to_dataframe(
+    full_file_path_and_name,
+    replace_missing_vals_with="NaN",
+    value_column_name="series_value",
+    workers=1,
+):
+    with open_tsf_file(full_file_path_and_name) as file:
+        (
+            col_names,
+            col_types,
+            frequency,
+            forecast_horizon,
+            contain_missing_values,
+            contain_equal_length,
+            data_line_number,
+        ) = read_tsf_header(file)
+
+        all_data = {col: [] for col in col_names}
+        all_series = []
+
+        if workers is None or workers > 1:
+            parsed_lines = _parse_tsf_data_in_parallel(
+                full_file_path_and_name,
+                file,
+                data_line_number,
+                col_names,
+                col_types,
+                workers,
+            )
+        else:
+            parsed_lines = _iterate_tsf_data(file, col_names, col_types, data_line_number)
+
+        for attributes, values, missing in parsed_lines:
+            all_series.append(to_series_array(values, missing, replace_missing_vals_with))
+
+            for i in range(len(col_names)):
+                all_data[col_names[i]].append(attributes[i])
+
+        if len(all_series) == 0:
             raise Exception("Missing series information under data section.")
 
+        for i in range(len(col_names)):
+            if col_types[i] == "date":
+                all_data[col_names[i]] = parse_dates(all_data[col_names[i]])
+
         all_data[value_column_name] = all_series
         loaded_data = pd.DataFrame(all_data)
 
@@ -155,6 +398,530 @@ def convert_tsf_to_dataframe(
         )
 
 
+# Splits the data section of a .tsf file into byte ranges ending at line boundaries
+# Returns the list of (start, end) byte positions
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# data_start - byte position of the start of the data section
+# num_chunks - required number of byte ranges. Fewer ranges are returned for small files
+def split_tsf_data_section(full_file_path_and_name, data_start, num_chunks):
+    file_size = os.path.getsize(full_file_path_and_name)
+    boundaries = [data_start]
+
+    with open(full_file_path_and_name, "rb") as file:
+        for k in range(1, num_chunks):
+            position = data_start + (file_size - data_start) * k // num_chunks
+
+            if position <= boundaries[-1]:
+                continue
+
+            # Move to the start of the next line
+            file.seek(position - 1)
+            file.readline()
+            position = file.tell()
+
+            if position >= file_size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+
+    boundaries.append(file_size)
+
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+
+# Parses a byte range of the data section of a .tsf file in a worker process
+# Returns the number of lines in the range, the parsed lines and the error raised while parsing, if any, together with its line number within the range
+#
+# Parameters
+# args - a tuple of the .tsf file path, start and end byte positions of the range, attribute names and attribute types
+def _parse_tsf_byte_range(args):
+    full_file_path_and_name, start, end, col_names, col_types = args
+
+    with open(full_file_path_and_name, "rb") as file:
+        file.seek(start)
+        content = file.read(end - start).decode("cp1252")
+
+    return _parse_tsf_text(content, col_names, col_types)
+
+
+# Parses a block of lines of the data section of a compressed .tsf file in a worker process
+# Returns the same as _parse_tsf_byte_range
+#
+# Parameters
+# args - a tuple of the decompressed text, attribute names and attribute types
+def _parse_tsf_text_block(args):
+    content, col_names, col_types = args
+    return _parse_tsf_text(content, col_names, col_types)
+
+
+def _parse_tsf_text(content, col_names, col_types):
+    lines = content.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    attributes = []
+    lengths = []
+    all_values = []
+
+    for line_index in range(len(lines)):
+        line = lines[line_index].strip()
+
+        if line and not line.startswith("#") and not line.startswith("@"):
+            try:
+                series_attributes, values, _ = parse_tsf_data_line(line, col_names, col_types)
+            except Exception as e:
+                return len(lines), None, (line_index + 1, str(e))
+
+            attributes.append(series_attributes)
+            lengths.append(len(values))
+            all_values.append(values)
+
+    # Send one values buffer per range to reduce the inter-process communication overhead
+    values = np.concatenate(all_values) if len(all_values) > 0 else np.empty(0)
+
+    return len(lines), (attributes, lengths, values), None
+
+
+# Parses the data section of a .tsf file with a pool of worker processes and yields the parsed lines in the original order
+# Plain files are split into byte ranges read by the workers. Compressed files are decompressed in this process and blocks of lines are sent to the workers, with a few blocks in flight at a time
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# file - the .tsf file opened by open_tsf_file, positioned at the start of the data section
+# data_line_number - number of lines before the data section
+# col_names - attribute names given in the meta-data section
+# col_types - attribute types given in the meta-data section
+# workers - number of worker processes. None uses all available cores
+def _parse_tsf_data_in_parallel(
+    full_file_path_and_name,
+    file,
+    data_line_number,
+    col_names,
+    col_types,
+    workers,
+):
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if get_tsf_compression(full_file_path_and_name) is None:
+        # Use more ranges than workers so that the ranges with longer series do not hold up the other workers
+        byte_ranges = split_tsf_data_section(full_file_path_and_name, file.tell(), workers * 4)
+        parse_function = _parse_tsf_byte_range
+        tasks = [
+            (full_file_path_and_name, start, end, col_names, col_types)
+            for start, end in byte_ranges
+        ]
+    else:
+        parse_function = _parse_tsf_text_block
+        tasks = (
+            (content, col_names, col_types)
+            for content in _read_text_blocks(file, DECOMPRESSED_BLOCK_SIZE)
+        )
+
+    line_number = data_line_number
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for num_lines, parsed_range, error in _map_in_order(executor, parse_function, tasks, workers * 2):
+            if error is not None:
+                raise Exception(_add_line_number(error[1], line_number + error[0]))
+
+            attributes, lengths, values = parsed_range
+            start = 0
+
+            for i in range(len(lengths)):
+                series_values = values[start : start + lengths[i]]
+                start = start + lengths[i]
+
+                missing = np.isnan(series_values)
+                yield attributes[i], series_values, missing if missing.any() else None
+
+            line_number = line_number + num_lines
+
+
+# Yields blocks of about block_size characters of a file opened in text mode, each ending at a line boundary
+def _read_text_blocks(file, block_size):
+    while True:
+        content = file.read(block_size)
+        if not content:
+            break
+
+        yield content + file.readline()
+
+
+# Same as executor.map, but only submits max_pending tasks ahead of the result being returned, so the tasks are created as they are needed
+def _map_in_order(executor, function, tasks, max_pending):
+    futures = deque()
+
+    for task in tasks:
+        futures.append(executor.submit(function, task))
+
+        if len(futures) >= max_pending:
+            yield futures.popleft().result()
+
+    while futures:
+        yield futures.popleft().result()
+
+
+# Opens a .tsf file and reads its meta-data section
+# Returns a generator of the parsed lines of the data section, raising an exception if there are none, along with the attribute names and types and other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+def _open_tsf_data(full_file_path_and_name):
+    file = open_tsf_file(full_file_path_and_name)
+
+    try:
+        (
+            col_names,
+            col_types,
+            frequency,
+            forecast_horizon,
+            contain_missing_values,
+            contain_equal_length,
+            data_line_number,
+        ) = read_tsf_header(file)
+    except Exception:
+        file.close()
+        raise
+
+    def line_generator():
+        with file:
+            found_data_section = False
+
+            for parsed_line in _iterate_tsf_data(
+                file, col_names, col_types, data_line_number
+            ):
+                found_data_section = True
+                yield parsed_line
+
+            if not found_data_section:
+                raise Exception("Missing series information under data section.")
+
+    return (
+        line_generator(),
+        col_names,
+        col_types,
+        frequency,
+        forecast_horizon,
+        contain_missing_values,
+        contain_equal_length,
+    )
+
+
+# Reads a .tsf file series by series without loading the whole data section into memory
+# Returns a generator along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+# The meta-data is read before returning, so it is available before the first series is read
+# The generator yields (attributes, values) pairs where attributes is a dictionary of attribute names and values, and values is a float64 numpy array with NaN for missing values
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path, which can be compressed with gzip, bz2, xz or zstd
+def iterate_tsf_series(full_file_path_and_name):
+    parsed_lines, col_names, col_types, *metadata = _open_tsf_data(full_file_path_and_name)
+
+    def series_generator():
+        for attributes, values, missing in parsed_lines:
+            for i in range(len(col_names)):
+                if col_types[i] == "date":
+                    try:
+                        attributes[i] = parse_date(attributes[i])
+                    except ValueError as e:
+                        raise Exception("Invalid date attribute value: " + attributes[i]) from e
+
+            yield dict(zip(col_names, attributes)), values
+
+    return (series_generator(), *metadata)
+
+
+# Reads a .tsf file in chunks of series without loading the whole data section into memory
+# Returns a generator along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+# The generator yields dataframes of at most chunk_size series with the same columns as the dataframe returned by convert_tsf_to_dataframe
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path, which can be compressed with gzip, bz2, xz or zstd
+# chunk_size - maximum number of series in a yielded dataframe
+# replace_missing_vals_with - a term to indicate the missing values in series in the yielded dataframes
+# value_column_name - Any name that is preferred to have as the name of the column containing series values in the yielded dataframes
+def iterate_tsf_chunks(
+    full_file_path_and_name,
+    chunk_size,
+    replace_missing_vals_with="NaN",
+    value_column_name="series_value",
+):
+    if chunk_size < 1:
+        raise Exception("Chunk size should be a positive integer.")
+
+    parsed_lines, col_names, col_types, *metadata = _open_tsf_data(full_file_path_and_name)
+
+    def to_dataframe(chunk):
+        chunk_data = {}
+
+        for i in range(len(col_names)):
+            column = [attributes[i] for attributes, _ in chunk]
+            chunk_data[col_names[i]] = parse_dates(column) if col_types[i] == "date" else column
+
+        chunk_data[value_column_name] = [series for _, series in chunk]
+        return pd.DataFrame(chunk_data)
+
+    def chunk_generator():
+        chunk = []
+
+        for attributes, values, missing in parsed_lines:
+            chunk.append((attributes, to_series_array(values, missing, replace_missing_vals_with)))
+
+            if len(chunk) == chunk_size:
+                yield to_dataframe(chunk)
+                chunk = []
+
+        if len(chunk) > 0:
+            yield to_dataframe(chunk)
+
+    return (chunk_generator(), *metadata)
+
+
+
+# Writes a dataframe with the same layout as the dataframe returned by convert_tsf_to_dataframe into a .tsf file, so that convert_dataframe_to_tsf(path, *convert_tsf_to_dataframe(other_path)) copies a dataset
+# The values of many series are converted into text together with NumPy instead of one value at a time. Missing values (NaN or values that are not numeric) are written with the ? symbol
+# The file is compressed if its name ends with .gz, .bz2, .xz or .zst, and it is written atomically
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# loaded_data - dataframe containing one series per row
+# frequency - frequency of the dataset. Not written if None
+# forecast_horizon - forecast horizon of the dataset. Not written if None
+# contain_missing_values - whether the dataset contains missing values. If None, it is found from the series
+# contain_equal_length - whether the series have equal lengths. If None, it is found from the series
+# value_column_name - name of the column containing the series values
+# relation_name - name of the dataset written with the @relation tag. If None, the file name without its extensions is used
+# attribute_types - dictionary of attribute names and types (numeric, string or date). The types of the other attributes are found from the column types
+def convert_dataframe_to_tsf(
+    full_file_path_and_name,
+    loaded_data,
+    frequency=None,
+    forecast_horizon=None,
+    contain_missing_values=None,
+    contain_equal_length=None,
+    value_column_name="series_value",
+    relation_name=None,
+    attribute_types=None,
+):
+    col_names = [col for col in loaded_data.columns if col != value_column_name]
+    col_types = [_get_attribute_type(loaded_data[col], (attribute_types or {}).get(col)) for col in col_names]
+
+    if len(col_names) == 0:
+        raise Exception("Missing attribute section. At least one attribute is required.")
+
+    attribute_columns = [_format_attribute(loaded_data[col_names[i]], col_types[i]) for i in range(len(col_names))]
+
+    for i in range(len(col_names)):
+        if " " in str(col_names[i]):
+            raise Exception("Invalid attribute name: " + str(col_names[i]))
+        if any(":" in value or "\n" in value for value in attribute_columns[i]):
+            raise Exception("Attribute values should not contain colons or line breaks: " + str(col_names[i]))
+
+    all_series = [_to_float_array(series) for series in loaded_data[value_column_name]]
+    offsets = np.concatenate(([0], np.cumsum([len(series) for series in all_series]))).astype(np.int64)
+    values = np.concatenate(all_series) if len(all_series) > 0 else np.empty(0)
+
+    if np.any(offsets[1:] == offsets[:-1]):
+        raise Exception("A given series should contains at least one numeric value.")
+
+    if contain_missing_values is None:
+        contain_missing_values = bool(np.isnan(values).any())
+    if contain_equal_length is None:
+        contain_equal_length = bool(np.all(np.diff(offsets) == offsets[1] - offsets[0]))
+
+    if relation_name is None:
+        relation_name = os.path.basename(full_file_path_and_name).split(".")[0]
+
+    header = ["@relation " + relation_name]
+    header += ["@attribute " + str(col_names[i]) + " " + col_types[i] for i in range(len(col_names))]
+    if frequency is not None:
+        header.append("@frequency " + str(frequency))
+    if forecast_horizon is not None:
+        header.append("@horizon " + str(forecast_horizon))
+    header.append("@missing " + str(contain_missing_values).lower())
+    header.append("@equallength " + str(contain_equal_length).lower())
+    header.append("@data")
+
+    compression = COMPRESSION_EXTENSIONS.get(os.path.splitext(full_file_path_and_name)[1])
+
+    with open_atomically(full_file_path_and_name, "wb") as output:
+        with io.TextIOWrapper(_open_compressed_output(output, compression), encoding="cp1252", newline="\n") as text_output:
+            text_output.write("\n".join(header) + "\n")
+
+            # The series are written in chunks of about WRITE_CHUNK_SIZE values, so the text of the whole dataset is never in memory
+            first = 0
+            while first < len(all_series):
+                last = max(first + 1, int(np.searchsorted(offsets, offsets[first] + WRITE_CHUNK_SIZE, side="right")) - 1)
+                last = min(last, len(all_series))
+
+                values_text, text_offsets = _format_values(values[offsets[first]:offsets[last]], offsets[first:last + 1] - offsets[first])
+                text_offsets = text_offsets.tolist()
+
+                # The separator after the last value of each series is left out
+                text_output.write("".join(
+                    ":".join([column[i] for column in attribute_columns] + [values_text[text_offsets[i - first]:text_offsets[i - first + 1] - 1]]) + "\n"
+                    for i in range(first, last)
+                ))
+
+                first = last
+
+
+# Returns the .tsf attribute type of a dataframe column, given or found from the column type
+def _get_attribute_type(column, attribute_type=None):
+    if attribute_type is None:
+        if pd.api.types.is_datetime64_any_dtype(column):
+            attribute_type = "date"
+        elif pd.api.types.is_integer_dtype(column):
+            attribute_type = "numeric"
+        else:
+            attribute_type = "string"
+
+    if attribute_type not in ["numeric", "string", "date"]:
+        raise Exception("Invalid attribute type.")
+
+    return attribute_type
+
+
+# Converts the values of an attribute column into a list of strings in the format of .tsf files
+def _format_attribute(column, attribute_type):
+    if attribute_type == "date":
+        return pd.to_datetime(column).dt.strftime(DATE_FORMAT).tolist()
+    elif attribute_type == "numeric":
+        return column.astype(np.int64).astype(str).tolist()
+    else:
+        return column.astype(str).tolist()
+
+
+# Converts the values of a series into a float array. Values which are not numbers are converted into missing values
+def _to_float_array(series):
+    try:
+        return np.asarray(series, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(np.asarray(series, dtype=object)), errors="coerce").to_numpy(dtype=np.float64)
+
+
+# Converts the values of consecutive series into one text where each value is followed by a comma
+# Returns the text and the position in the text where each series starts, along with the end position of the last series
+# Integer values are written without decimals, the other values with the shortest text giving back the same value and missing values as "?"
+#
+# Parameters
+# values - values of the series
+# offsets - position of the first value of each series in values, along with the number of values
+def _format_values(values, offsets):
+    formatted = _format_decimal_values(values)
+
+    if formatted is None:
+        with np.errstate(invalid="ignore"):
+            integers = (values == np.round(values)) & (np.abs(values) < 1e15)
+
+        texts = [
+            "?" if value != value else str(int(value)) if is_integer else repr(value)
+            for value, is_integer in zip(values.tolist(), integers.tolist())
+        ]
+        text = "".join(text + "," for text in texts)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) + 1
+    else:
+        text, lengths = formatted
+
+    text_ends = np.concatenate(([0], np.cumsum(lengths)))
+
+    return text, text_ends[offsets]
+
+
+# Formats values having at most MAX_FAST_DECIMALS decimals by writing their digits with array operations
+# Returns the text of the values, each followed by a comma, along with the length of the text of each value, or None if some values have more decimals
+def _format_decimal_values(values):
+    missing = np.isnan(values)
+    filled = np.where(missing, 0.0, values)
+
+    # The number of decimals of each value is the smallest number giving back the same value
+    decimals = np.zeros(len(values), dtype=np.int64)
+    scaled = np.zeros(len(values))
+    remaining = np.arange(len(values))
+
+    for decimal_count in range(MAX_FAST_DECIMALS + 1):
+        candidates = np.round(filled[remaining] * 10.0 ** decimal_count)
+        found = (candidates / 10.0 ** decimal_count == filled[remaining]) & (np.abs(candidates) < 2.0 ** 53)
+
+        decimals[remaining[found]] = decimal_count
+        scaled[remaining[found]] = candidates[found]
+        remaining = remaining[~found]
+
+        if len(remaining) == 0:
+            break
+
+    if len(remaining) > 0:
+        return None
+
+    negative = scaled < 0
+    scaled = np.abs(scaled).astype(np.int64)
+    powers = 10 ** np.arange(19, dtype=np.int64)
+    integer_parts = scaled // powers[decimals]
+    fraction_parts = scaled % powers[decimals]
+    integer_widths = np.maximum(np.searchsorted(powers, integer_parts, side="right"), 1)
+
+    integer_width = int(integer_widths.max()) if len(values) > 0 else 1
+    fraction_width = int(decimals.max()) if len(values) > 0 else 0
+
+    # Each row holds the sign, the integer digits, the decimal point, the decimals and the comma of a value. Only the kept characters are written
+    chars = np.zeros((len(values), integer_width + fraction_width + 3), dtype=np.uint8)
+    keep = np.zeros(chars.shape, dtype=bool)
+
+    chars[:, 0] = np.where(missing, ord("?"), ord("-"))
+    keep[:, 0] = missing | negative
+
+    for position in range(integer_width):
+        column = integer_width - position
+        chars[:, column] = integer_parts // powers[position] % 10 + ord("0")
+        keep[:, column] = (position < integer_widths) & ~missing
+
+    chars[:, integer_width + 1] = ord(".")
+    keep[:, integer_width + 1] = decimals > 0
+
+    for position in range(fraction_width):
+        column = integer_width + 2 + position
+        chars[:, column] = fraction_parts // powers[np.maximum(decimals - 1 - position, 0)] % 10 + ord("0")
+        keep[:, column] = position < decimals
+
+    chars[:, -1] = ord(",")
+    keep[:, -1] = True
+
+    return chars[keep].tobytes().decode("ascii"), keep.sum(axis=1)
+
+
+# Returns a binary stream compressing the data written into output with the given compression format, or output itself if compression is None
+# Closing the returned stream finishes the compressed data but does not close output
+def _open_compressed_output(output, compression):
+    if compression is None:
+        return _UnclosedWriter(output)
+    elif compression == "gzip":
+        return gzip.GzipFile(fileobj=output, mode="wb")
+    elif compression == "bz2":
+        return bz2.BZ2File(output, "wb")
+    elif compression == "xz":
+        return lzma.LZMAFile(output, "wb")
+    else:
+        return _import_zstandard().ZstdCompressor().stream_writer(output, closefd=False)
+
+
+# A binary stream writing into another stream without closing it, so that open_atomically closes the file
+class _UnclosedWriter(io.RawIOBase):
+    def __init__(self, output):
+        self.output = output
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.output.write(data)
+
+    def flush(self):
+        self.output.flush()
+
+
 # Example of usage
 # loaded_data, frequency, forecast_horizon, contain_missing_values, contain_equal_length = convert_tsf_to_dataframe("TSForecasting/tsf_data/sample.tsf")
 
@@ -163,3 +930,12 @@ def convert_tsf_to_dataframe(
 # print(forecast_horizon)
 # print(contain_missing_values)
 # print(contain_equal_length)
+
+# Example of reading the series one at a time
+# series_iterator, frequency, forecast_horizon, contain_missing_values, contain_equal_length = iterate_tsf_series("TSForecasting/tsf_data/sample.tsf")
+
+# for attributes, values in series_iterator:
+#     print(attributes["series_name"], len(values))
+
+# Example of writing a dataset into a compressed .tsf file
+# convert_dataframe_to_tsf("TSForecasting/tsf_data/sample.tsf.gz", *convert_tsf_to_dataframe("TSForecasting/tsf_data/sample.tsf"))
@@ -0,0 +1,312 @@
+import math
+
+import numpy as np
+
+from utils.atomic_write import open_atomically
+
+# Functions to calculate smape, msmape, mase, mae and rmse
+# These are Python versions of the functions in utils/error_calculator.R and write the same error files, so the R interpreter is not needed to evaluate the forecasts
+
+
+# Function to calculate series wise smape values
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+#             no: of rows should be equal to number of series and no: of columns should be equal to the forecast horizon
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+def calculate_smape(forecasts, test_set):
+    forecasts, test_set = _to_matrix(forecasts), _to_matrix(test_set)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        smape = 2 * np.abs(forecasts - test_set) / (np.abs(forecasts) + np.abs(test_set))
+
+    return _row_means(smape)
+
+
+# Function to calculate series wise msmape values
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+#             no: of rows should be equal to number of series and no: of columns should be equal to the forecast horizon
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+def calculate_msmape(forecasts, test_set):
+    forecasts, test_set = _to_matrix(forecasts), _to_matrix(test_set)
+
+    epsilon = 0.1
+    comparator = 0.5 + epsilon
+
+    with np.errstate(invalid="ignore"):
+        total = np.maximum(comparator, np.abs(forecasts) + np.abs(test_set) + epsilon)
+        smape = 2 * np.abs(forecasts - test_set) / total
+
+    return _row_means(smape)
+
+
+# Function to calculate series wise mase values
+# The in-sample seasonal naive error is used as the scale. If the resulting mase is NaN (e.g. when the training series is not longer than the seasonality), the lag 1 naive error is used instead
+# Series with infinite or NaN mase values are removed from the result
+# All series are processed together over one flat buffer of training values, without a loop over the series
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+#             no: of rows should be equal to number of series and no: of columns should be equal to the forecast horizon
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+# training_set - a list containing the training series or a RaggedSeries container
+# seasonality - frequency of the dataset, e.g. 12 for monthly
+def calculate_mase(forecasts, test_set, training_set, seasonality):
+    forecasts, test_set = _to_matrix(forecasts), _to_matrix(test_set)
+    values, offsets = flatten_series(training_set)
+
+    # Missing values are removed before differencing, so the values around them become adjacent
+    valid = ~np.isnan(values)
+    if not valid.all():
+        values, offsets = _remove_missing_values(values, offsets, valid)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        absolute_errors = _mean_absolute_errors(forecasts, test_set)
+
+        mase_per_series = absolute_errors / calculate_scales(values, offsets, np.min(seasonality))
+
+        fallback = np.isnan(mase_per_series)
+        if fallback.any():
+            lag_1_scales = calculate_scales(values, offsets, 1)
+            mase_per_series[fallback] = absolute_errors[fallback] / lag_1_scales[fallback]
+
+    return mase_per_series[np.isfinite(mase_per_series)]
+
+
+# Calculates the in-sample naive error of all series in one pass, same as mean(abs(diff(x, lag = lag))) for each series x
+# A non-integer lag is truncated as in R. Series that are not longer than lag get NaN
+#
+# Parameters
+# values - flat buffer containing the values of all series
+# offsets - array of length (number of series + 1) containing the series boundaries, where series i is values[offsets[i]:offsets[i + 1]]
+# lag - lag of the naive forecasts
+def calculate_scales(values, offsets, lag):
+    num_series = len(offsets) - 1
+    lag = int(lag)
+    lengths = np.diff(offsets)
+
+    if lag >= len(values) or num_series == 0:
+        return np.full(num_series, np.nan)
+
+    # differences[j] is the difference between values[j + lag] and values[j]. For series i, the differences in [offsets[i], offsets[i + 1] - lag) are within the series
+    # The last lag differences of each series mix two series and are set to zero, so the differences of each series can be summed over [offsets[i], offsets[i + 1])
+    differences = np.empty(len(values))
+    np.subtract(values[lag:], values[:-lag], out=differences[:-lag])
+    np.abs(differences, out=differences)
+    differences[_range_indices(np.maximum(offsets[1:] - lag, offsets[:-1]), offsets[1:])] = 0
+
+    counts = lengths - lag
+    sums = np.zeros(num_series)
+    has_values = lengths > 0
+    sums[has_values] = np.add.reduceat(differences, offsets[:-1][has_values])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+# Returns the indices in the ranges [starts[i], ends[i]) as one array
+def _range_indices(starts, ends):
+    lengths = ends - starts
+    range_offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - range_offsets, lengths) + np.arange(lengths.sum())
+
+
+# Removes the missing values of a flat buffer and shifts the series boundaries accordingly
+def _remove_missing_values(values, offsets, valid):
+    lengths = np.diff(offsets)
+    valid_lengths = np.zeros(len(lengths), dtype=np.int64)
+    has_values = lengths > 0
+    valid_lengths[has_values] = np.add.reduceat(valid, offsets[:-1][has_values], dtype=np.int64)
+
+    return values[valid], np.concatenate(([0], np.cumsum(valid_lengths)))
+
+
+# Converts a list of series or a RaggedSeries container into one flat float64 buffer and the series boundaries
+# Returns the buffer and an array of length (number of series + 1), where series i is values[offsets[i]:offsets[i + 1]]
+#
+# Parameters
+# series_list - a list of series or a RaggedSeries container
+def flatten_series(series_list):
+    if hasattr(series_list, "starts") and hasattr(series_list, "ends"):
+        lengths = series_list.ends - series_list.starts
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        values = np.asarray(series_list.values, dtype=np.float64)
+
+        # Adjacent series can use a view of the buffer instead of a copy
+        if len(lengths) > 0 and np.array_equal(series_list.starts[1:], series_list.ends[:-1]):
+            return values[series_list.starts[0] : series_list.ends[-1]], offsets
+
+        return values[_range_indices(series_list.starts, series_list.ends)], offsets
+
+    all_values = [np.asarray(series, dtype=np.float64) for series in series_list]
+    offsets = np.concatenate(([0], np.cumsum([len(values) for values in all_values])))
+    values = np.concatenate(all_values) if len(all_values) > 0 else np.empty(0)
+
+    return values, offsets.astype(np.int64)
+
+
+# Function to calculate series wise mae values
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+#             no: of rows should be equal to number of series and no: of columns should be equal to the forecast horizon
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+def calculate_mae(forecasts, test_set):
+    forecasts, test_set = _to_matrix(forecasts), _to_matrix(test_set)
+    return _row_means(np.abs(forecasts - test_set))
+
+
+# Function to calculate series wise rmse values
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+#             no: of rows should be equal to number of series and no: of columns should be equal to the forecast horizon
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+def calculate_rmse(forecasts, test_set):
+    forecasts, test_set = _to_matrix(forecasts), _to_matrix(test_set)
+    return np.sqrt(_row_means((forecasts - test_set) ** 2))
+
+
+# Function to provide a summary of 4 error metrics: smape, mase, mae and rmse
+# The error files have the same names and format as the files written by calculate_errors in utils/error_calculator.R
+#
+# Parameters
+# forecasts - a matrix containing forecasts for a set of series
+#             no: of rows should be equal to number of series and no: of columns should be equal to the forecast horizon
+# test_set - a matrix with the same dimensions as 'forecasts' containing the actual values corresponding with them
+# training_set - a list containing the training series
+# seasonality - frequency of the dataset, e.g. 12 for monthly
+# output_file_name - The prefix of error file names
+def calculate_errors(forecasts, test_set, training_set, seasonality, output_file_name):
+    # calculating smape
+    smape_per_series = calculate_smape(forecasts, test_set)
+
+    # calculating msmape
+    msmape_per_series = calculate_msmape(forecasts, test_set)
+
+    # calculating mase
+    mase_per_series = calculate_mase(forecasts, test_set, training_set, seasonality)
+
+    # calculating mae
+    mae_per_series = calculate_mae(forecasts, test_set)
+
+    # calculating rmse
+    rmse_per_series = calculate_rmse(forecasts, test_set)
+
+    summary = [
+        "Mean SMAPE: " + format_r_number(_mean(smape_per_series)),
+        "Median SMAPE: " + format_r_number(_median(smape_per_series)),
+        "Mean mSMAPE: " + format_r_number(_mean(msmape_per_series)),
+        "Median mSMAPE: " + format_r_number(_median(msmape_per_series)),
+        "Mean MASE: " + format_r_number(_mean(mase_per_series)),
+        "Median MASE: " + format_r_number(_median(mase_per_series)),
+        "Mean MAE: " + format_r_number(_mean(mae_per_series)),
+        "Median MAE: " + format_r_number(_median(mae_per_series)),
+        "Mean RMSE: " + format_r_number(_mean(rmse_per_series)),
+        "Median RMSE: " + format_r_number(_median(rmse_per_series)),
+    ]
+
+    for line in summary:
+        print(line)
+
+    # writing error measures into files
+    _write_values(smape_per_series, output_file_name + "_smape.txt")
+    _write_values(msmape_per_series, output_file_name + "_msmape.txt")
+    _write_values(mase_per_series, output_file_name + "_mase.txt")
+    _write_values(mae_per_series, output_file_name + "_mae.txt")
+    _write_values(rmse_per_series, output_file_name + "_rmse.txt")
+
+    with open_atomically(output_file_name + ".txt", "w") as output:
+        output.write("\n".join(summary + ["\n"]) + "\n")
+
+
+# Formats a number in the same way as R does when writing it as text, using at most 15 significant digits and the shorter of the fixed and scientific notations
+#
+# Parameters
+# x - a number, or None for a missing value
+def format_r_number(x):
+    if x is None:
+        return "NA"
+
+    x = float(x)
+
+    if math.isnan(x):
+        return "NaN"
+    if math.isinf(x):
+        return "Inf" if x > 0 else "-Inf"
+    if x == 0:
+        return "0"
+
+    mantissa, exponent = ("%.14e" % x).split("e")
+    mantissa = mantissa.rstrip("0").rstrip(".")
+    exponent = int(exponent)
+
+    significant_digits = len(mantissa.replace("-", "").replace(".", ""))
+    decimals = max(0, significant_digits - 1 - exponent)
+
+    fixed = "%.*f" % (decimals, x)
+    scientific = mantissa + "e" + ("-" if exponent < 0 else "+") + "%02d" % abs(exponent)
+
+    return fixed if len(fixed) <= len(scientific) else scientific
+
+
+def _to_matrix(values):
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+# Row means ignoring NaN values. Rows without any non-NaN value give NaN, same as rowMeans with na.rm = TRUE
+def _row_means(values):
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(valid, values, 0).sum(axis=1) / counts
+
+
+# Mean absolute errors of the forecasts, where the missing values are removed from the forecasts and the actual values separately as in calculate_mase of utils/error_calculator.R
+# If a different number of values remains, the shorter vector is recycled as R does when subtracting them. Series without any value give NaN
+def _mean_absolute_errors(forecasts, test_set):
+    forecasts_missing = np.isnan(forecasts)
+    test_missing = np.isnan(test_set)
+
+    with np.errstate(invalid="ignore"):
+        absolute_errors = _row_means(np.abs(forecasts - test_set))
+
+    # Rows where the missing values are at different positions pair different values after removing them
+    for k in np.nonzero((forecasts_missing != test_missing).any(axis=1))[0]:
+        te = test_set[k][~test_missing[k]]
+        f = forecasts[k][~forecasts_missing[k]]
+
+        if len(te) > 0 and len(f) > 0:
+            num_values = max(len(te), len(f))
+            absolute_errors[k] = np.mean(np.abs(np.resize(te, num_values) - np.resize(f, num_values)))
+        else:
+            absolute_errors[k] = np.nan
+
+    return absolute_errors
+
+
+# Same as mean in R, which refines the sum based mean with a second pass over the values
+def _mean(values):
+    if len(values) == 0:
+        return np.nan
+
+    mean = math.fsum(values) / len(values)
+    if math.isfinite(mean):
+        mean = mean + math.fsum(values - mean) / len(values)
+
+    return mean
+
+
+# Same as median in R, which gives NA for an empty vector or a vector containing NaN
+def _median(values):
+    return np.median(values) if len(values) > 0 and not np.isnan(values).any() else None
+
+
+# Writes one value per line, same as write.table in R, which writes NaN as NA
+def _write_values(values, file_path):
+    with open_atomically(file_path, "w") as output:
+        for value in values:
+            output.write(("NA" if np.isnan(value) else format_r_number(value)) + "\n")
@@ -0,0 +1,92 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import utils.error_calculator as error_calculator
+
+# Maximum size of the temporary buffer used when filling the embedded matrix, in bytes
+FILL_CHUNK_SIZE = 256 * 1024 ** 2
+
+
+# Creating embedded matrix and final lags to train the global models for a given lag
+# This is a Python version of create_input_matrix in utils/global_model_helper.R
+# Each series is mean normalised and all series are embedded together through sliding windows over one flat buffer, so the embedded matrix is allocated once instead of being grown series by series
+# Returns the embedded matrix, the final lags and the series means
+# The embedded matrix has the columns y, Lag1, ..., Lag<lag> and one row per training window, with the windows of each series in order
+# The final lags matrix has the columns Lag1, ..., Lag<lag> and one row per series containing its last lag values in reverse order
+#
+# Parameters
+# dataset - a list containing the training series or a RaggedSeries container
+# lag - the number of past lags used to predict the next value
+# dtype - data type of the embedded matrix and the final lags, e.g. np.float32 to halve the memory usage
+# output_path - path of a .npy file to write the embedded matrix into. If given, the embedded matrix is a memory-mapped array of that file, so it does not need to fit in memory
+def create_input_matrix(dataset, lag, dtype=np.float64, output_path=None):
+    values, offsets = error_calculator.flatten_series(dataset)
+    lengths = np.diff(offsets)
+
+    if np.any(lengths < lag + 1):
+        raise Exception("All series should contain at least lag + 1 values.")
+
+    series_means = np.add.reduceat(values, offsets[:-1]) / lengths if len(lengths) > 0 else np.empty(0)
+
+    # Mean normalisation
+    series_means[series_means == 0] = 1 # Avoid division by zero
+    normalised_values = values / np.repeat(series_means, lengths)
+
+    # Row j of the windows contains the values j, ..., j + lag, so the windows starting within a series and ending before its end are the training windows of that series
+    num_rows = lengths - lag
+    row_offsets = np.concatenate(([0], np.cumsum(num_rows)))
+    window_indices = np.arange(row_offsets[-1]) + np.repeat(offsets[:-1] - row_offsets[:-1], num_rows)
+
+    windows = sliding_window_view(normalised_values, lag + 1)
+
+    shape = (int(row_offsets[-1]), lag + 1)
+    if output_path is None:
+        embedded_series = np.empty(shape, dtype=dtype)
+    else:
+        embedded_series = np.lib.format.open_memmap(output_path, mode="w+", dtype=dtype, shape=shape)
+
+    # The windows are reversed, so that the value to be predicted comes first followed by its lags, as in embed of R
+    chunk_rows = max(1, FILL_CHUNK_SIZE // ((lag + 1) * 8))
+    for chunk_start in range(0, shape[0], chunk_rows):
+        chunk_end = min(chunk_start + chunk_rows, shape[0])
+        embedded_series[chunk_start:chunk_end] = windows[window_indices[chunk_start:chunk_end], ::-1]
+
+    if output_path is not None:
+        embedded_series.flush()
+
+    # Creating the test set
+    final_lags = sliding_window_view(normalised_values, lag)[offsets[1:] - lag, ::-1].astype(dtype)
+
+    return embedded_series, final_lags, series_means
+
+
+# Returns the column names of the embedded matrix and the final lags returned by create_input_matrix, same as in utils/global_model_helper.R
+#
+# Parameters
+# lag - the number of past lags used to predict the next value
+def get_column_names(lag):
+    lag_names = ["Lag" + str(i) for i in range(1, lag + 1)]
+    return ["y"] + lag_names, lag_names
+
+
+# Returns the mean of each series used for the mean normalisation in create_input_matrix. Zero means are replaced by 1
+# The series are read one by one, so a memory-mapped values buffer is not loaded into memory at once
+#
+# Parameters
+# series - a RaggedSeries container
+def get_series_means(series):
+    series_means = np.fromiter((np.sum(values) for values in series), dtype=np.float64, count=len(series)) / series.lengths
+    series_means[series_means == 0] = 1 # Avoid division by zero
+    return series_means
+
+
+# Returns the final lags of create_input_matrix: the last lag values of each series in reverse order, mean normalised
+#
+# Parameters
+# series - a RaggedSeries container
+# lag - the number of past lags used to predict the next value
+# series_means - array containing the mean of each series
+# dtype - data type of the final lags
+def get_final_lags(series, lag, series_means, dtype=np.float64):
+    positions = series.ends[:, None] - 1 - np.arange(lag)
+    return (np.asarray(series.values)[positions] / series_means[:, None]).astype(dtype)
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+import mmap
+
+import numpy as np
+
+
+# A least recently used cache bounded by the estimated memory size of its entries
+# Hit and miss counters are kept, so the reuse of the cached entries can be checked
+class MemoryBoundedLRUCache:
+    # Parameters
+    # max_size - maximum total estimated size of the cached entries in bytes
+    # get_size - function returning the estimated size of an entry in bytes. Defaults to estimate_size
+    def __init__(self, max_size, get_size=None):
+        self.max_size = max_size
+        self.get_size = get_size if get_size is not None else estimate_size
+        self.entries = OrderedDict()
+        self.total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Returns the cached entry of a key, creating and caching it in the first call
+    # An entry larger than max_size is returned without being cached
+    #
+    # Parameters
+    # key - hashable key of the entry
+    # create_entry - function without arguments that creates the entry
+    def get_or_create(self, key, create_entry):
+        if key in self.entries:
+            self.hits = self.hits + 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses = self.misses + 1
+        entry = create_entry()
+        size = self.get_size(entry)
+
+        if size <= self.max_size:
+            self.entries[key] = (entry, size)
+            self.total_size = self.total_size + size
+
+            while self.total_size > self.max_size:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_size = self.total_size - evicted_size
+                self.evictions = self.evictions + 1
+
+        return entry
+
+    # Removes all entries. The counters are kept
+    def clear(self):
+        self.entries.clear()
+        self.total_size = 0
+
+    # Returns the cache counters and sizes as a dictionary
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "size": self.total_size,
+        }
+
+
+# Estimates the memory size of an object in bytes by adding the sizes of the numpy arrays it contains
+# Lists, tuples, dictionaries, objects with __slots__ (e.g. RaggedSeries) and pandas arrays are searched recursively. Shared arrays are counted once
+# Memory-mapped arrays, e.g. the values buffers of the dataset cache, are not counted, as their pages are read from the file when needed and can be dropped by the operating system
+#
+# Parameters
+# obj - object to be measured
+def estimate_size(obj):
+    seen = {}  # Keeps the visited objects alive, so their ids are not reused
+    size = 0
+    stack = [obj]
+
+    while stack:
+        current = stack.pop()
+
+        if id(current) in seen:
+            continue
+        seen[id(current)] = current
+
+        if isinstance(current, np.ndarray):
+            # Views are counted by the buffer they refer to
+            base = current
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            if base is not current:
+                stack.append(base)
+            elif not isinstance(current.base, mmap.mmap):
+                size = size + current.nbytes
+        elif hasattr(current, "to_numpy") and hasattr(current, "dtype"):
+            stack.append(current.to_numpy())
+        elif isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+        elif hasattr(current, "__slots__"):
+            stack.extend(getattr(current, name, None) for name in current.__slots__)
+
+    return size
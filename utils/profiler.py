@@ -0,0 +1,132 @@
+import contextlib
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from utils.atomic_write import open_atomically
+
+
+# Records the wall time, CPU time and peak memory usage of the stages of a job, e.g. load, split, train, predict, write and evaluate
+# Each stage is written as one JSON line, so the profiles of many jobs can be compared
+# Optionally, each stage can also be profiled with cProfile and the peak memory allocated by Python objects can be traced with tracemalloc
+class StageProfiler:
+    # Parameters
+    # job_name - name of the job, e.g. the name of the experiment
+    # output_path - path of the JSON lines file written by write. If None, the records are only kept in memory
+    # cprofile_dir - folder to write a cProfile file per stage, named <job_name>_<stage>.prof. If None, cProfile is not used
+    # trace_memory - whether the peak memory allocated by Python objects in each stage is traced with tracemalloc. This slows down the job
+    def __init__(self, job_name, output_path=None, cprofile_dir=None, trace_memory=False):
+        self.job_name = job_name
+        self.output_path = output_path
+        self.cprofile_dir = cprofile_dir
+        self.trace_memory = trace_memory
+        self.records = []
+
+    # Context manager measuring a stage
+    #
+    # Parameters
+    # stage - name of the stage
+    # fields - additional fields written with the stage, e.g. cached=True
+    @contextlib.contextmanager
+    def stage(self, stage, **fields):
+        stage_peak_rss = _reset_peak_rss()
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        profile = None
+        if self.cprofile_dir is not None:
+            profile = cProfile.Profile()
+            profile.enable()
+
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_wall_time
+            cpu_time = time.process_time() - start_cpu_time
+
+            if profile is not None:
+                profile.disable()
+                os.makedirs(self.cprofile_dir, exist_ok=True)
+                profile.dump_stats(os.path.join(self.cprofile_dir, self.job_name + "_" + stage + ".prof"))
+
+            record = {
+                "job": self.job_name,
+                "stage": stage,
+                "wall_time": wall_time,
+                "cpu_time": cpu_time,
+                "peak_rss": _get_peak_rss(),
+                # Without a resettable peak, the peak of the process up to the end of the stage is recorded
+                "peak_rss_scope": "stage" if stage_peak_rss else "process",
+            }
+
+            if self.trace_memory:
+                record["traced_peak"] = tracemalloc.get_traced_memory()[1]
+
+            record.update(fields)
+            self.records.append(record)
+
+    # Writes the records of all stages to output_path as JSON lines, replacing the records of a previous run of the job
+    def write(self):
+        if self.output_path is None:
+            return
+
+        with open_atomically(self.output_path, "w") as output:
+            for record in self.records:
+                output.write(json.dumps(record) + "\n")
+
+
+# Resets the peak resident set size of the process, so that the next reading gives the peak of a stage
+# Returns whether the peak could be reset, which is only supported on Linux
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# Returns the peak resident set size of the process in bytes
+def _get_peak_rss():
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+# Reads the JSON lines files written by StageProfiler and returns their records as a list of dictionaries
+#
+# Parameters
+# file_paths - list of paths of JSON lines files
+def read_profiles(file_paths):
+    records = []
+
+    for file_path in file_paths:
+        with open(file_path, "r") as file:
+            records.extend(json.loads(line) for line in file if line.strip())
+
+    return records
+
+
+# Example of usage
+# profiler = StageProfiler("sample_deepar_lag_10", "TSForecasting/results/fixed_horizon_profiles/sample_deepar_lag_10.jsonl")
+# with profiler.stage("load"):
+#     ...
+# profiler.write()
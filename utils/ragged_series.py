@@ -0,0 +1,276 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import utils.data_loader as loader
+import utils.tsf_cache as tsf_cache
+
+
+# A compact container for a set of series of different lengths
+# All series values are stored in one flat float64 buffer and series i is values[starts[i]:ends[i]], with NaN for missing values
+# Slicing windows of the series only changes the start and end positions, so the flat buffer is shared and never copied
+# The buffer can be an np.memmap, so datasets larger than memory can be used
+class RaggedSeries:
+    __slots__ = ("values", "starts", "ends", "attributes")
+
+    # Parameters
+    # values - flat float64 buffer containing the values of all series
+    # starts - start position of each series in the buffer
+    # ends - end position (exclusive) of each series in the buffer
+    # attributes - a dictionary of attribute names and numpy arrays containing one attribute value per series
+    def __init__(self, values, starts, ends, attributes=None):
+        self.values = values
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.attributes = attributes if attributes is not None else {}
+
+        if len(self.starts) != len(self.ends):
+            raise Exception("The number of start and end positions should be equal.")
+
+    # Creates a container from a flat values buffer and per-series offsets, where series i is values[offsets[i]:offsets[i + 1]]
+    #
+    # Parameters
+    # values - flat float64 buffer containing the values of all series
+    # offsets - array of length (number of series + 1) containing the series boundaries
+    # attributes - a dictionary of attribute names and numpy arrays containing one attribute value per series
+    @classmethod
+    def from_offsets(cls, values, offsets, attributes=None):
+        offsets = np.asarray(offsets, dtype=np.int64)
+        return cls(values, offsets[:-1], offsets[1:], attributes)
+
+    # Creates a container from a dataframe returned by loader.convert_tsf_to_dataframe
+    # The series values are copied into one flat buffer and values that are not numeric (e.g. "NaN" strings used for missing values) become NaN
+    # The attribute columns are converted into the numpy types of the dataset cache, so the container can be saved without pickling
+    #
+    # Parameters
+    # df - dataframe containing one series per row
+    # value_column_name - name of the column containing the series values
+    @classmethod
+    def from_dataframe(cls, df, value_column_name="series_value"):
+        all_values = [
+            pd.to_numeric(pd.Series(series), errors="coerce").to_numpy(dtype=np.float64)
+            for series in df[value_column_name]
+        ]
+
+        offsets = np.zeros(len(all_values) + 1, dtype=np.int64)
+        np.cumsum([len(values) for values in all_values], out=offsets[1:])
+
+        values = np.concatenate(all_values) if len(all_values) > 0 else np.empty(0)
+
+        attributes = {
+            col: _to_attribute_array(df[col]) for col in df.columns if col != value_column_name
+        }
+
+        return cls.from_offsets(values, offsets, attributes)
+
+    def __len__(self):
+        return len(self.starts)
+
+    # Returns a view of the values of series i
+    def __getitem__(self, i):
+        return self.values[self.starts[i] : self.ends[i]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def lengths(self):
+        return self.ends - self.starts
+
+    # Returns a container with a subset of series, e.g. take(np.arange(10)) or take(mask). The values buffer is shared
+    #
+    # Parameters
+    # indices - integer indices or a boolean mask of the series to keep
+    def take(self, indices):
+        attributes = {name: values[indices] for name, values in self.attributes.items()}
+        return RaggedSeries(self.values, self.starts[indices], self.ends[indices], attributes)
+
+    # Returns a container with the window [start, stop) of each series, counted from the start of each series as in Python slicing
+    # Negative positions are counted from the end of each series. Positions out of range are clipped to the series boundaries. The values buffer is shared
+    #
+    # Parameters
+    # start - start position of the windows, None for the start of the series
+    # stop - end position (exclusive) of the windows, None for the end of the series
+    def window(self, start=None, stop=None):
+        lengths = self.lengths
+        new_starts = self.starts + _to_position(start, lengths, 0)
+        new_ends = self.starts + _to_position(stop, lengths, lengths)
+        new_ends = np.maximum(new_ends, new_starts)
+        return RaggedSeries(self.values, new_starts, new_ends, self.attributes)
+
+    # Splits each series into a training window and a test window containing its last horizon values
+    # Returns the training and test containers, both sharing the values buffer
+    #
+    # Parameters
+    # horizon - the forecast horizon. It can also be an array with one horizon per series. Horizons should be positive
+    def train_test_split(self, horizon):
+        if np.any(np.asarray(horizon) <= 0):
+            raise Exception("The forecast horizon should be positive.")
+
+        return self.window(None, -horizon), self.window(-horizon, None)
+
+    # Returns the series as a matrix with one row per series, e.g. the test windows created by train_test_split
+    # The values are gathered with one indexing operation, so the matrix is a copy
+    #
+    # Parameters
+    # fill_value - value used to pad the series shorter than the longest series at the end. If None, all series should have the same length
+    def to_matrix(self, fill_value=None):
+        lengths = self.lengths
+        width = int(lengths.max()) if len(lengths) > 0 else 0
+
+        if fill_value is None:
+            if np.any(lengths != width):
+                raise Exception("All series should have the same length to be converted into a matrix.")
+
+            return np.asarray(self.values)[self.starts[:, None] + np.arange(width)]
+
+        positions = self.starts[:, None] + np.arange(width)
+        inside = np.arange(width) < lengths[:, None]
+
+        matrix = np.full(positions.shape, fill_value, dtype=np.float64)
+        matrix[inside] = np.asarray(self.values)[positions[inside]]
+        return matrix
+
+    # Converts the container into a dataframe with the same layout as the dataframe returned by loader.convert_tsf_to_dataframe
+    #
+    # Parameters
+    # replace_missing_vals_with - a term to indicate the missing values in series in the returning dataframe
+    # value_column_name - Any name that is preferred to have as the name of the column containing series values in the returning dataframe
+    def to_dataframe(self, replace_missing_vals_with="NaN", value_column_name="series_value"):
+        all_series = []
+
+        for values in self:
+            missing = np.isnan(values)
+            all_series.append(
+                loader.to_series_array(values, missing, replace_missing_vals_with)
+            )
+
+        all_data = dict(self.attributes)
+        all_data[value_column_name] = all_series
+
+        return pd.DataFrame(all_data)
+
+    # Writes the container into a folder: the values buffer as a raw float64 file that can be memory-mapped, and the boundaries and attributes as .npy files
+    # Only the values inside the series windows are written
+    #
+    # Parameters
+    # folder_path - output folder
+    def save(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+
+        lengths = self.lengths
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        values = np.memmap(
+            os.path.join(folder_path, "values.bin"),
+            dtype=np.float64,
+            mode="w+",
+            shape=(max(int(offsets[-1]), 1),),
+        )
+
+        for i in range(len(self)):
+            values[offsets[i] : offsets[i + 1]] = self[i]
+
+        values.flush()
+        del values
+
+        np.save(os.path.join(folder_path, "offsets.npy"), offsets)
+
+        col_names = list(self.attributes.keys())
+        for i in range(len(col_names)):
+            np.save(
+                os.path.join(folder_path, "attribute_" + str(i) + ".npy"),
+                np.asarray(self.attributes[col_names[i]]),
+                allow_pickle=False,
+            )
+
+        with open(os.path.join(folder_path, "ragged_series.json"), "w") as output:
+            json.dump({"col_names": col_names}, output)
+
+    # Reads a container written by save
+    #
+    # Parameters
+    # folder_path - folder written by save
+    # mmap - whether the values buffer should be memory-mapped instead of being read into memory
+    @classmethod
+    def load(cls, folder_path, mmap=True):
+        with open(os.path.join(folder_path, "ragged_series.json"), "r") as file:
+            col_names = json.load(file)["col_names"]
+
+        offsets = np.load(os.path.join(folder_path, "offsets.npy"))
+
+        values_path = os.path.join(folder_path, "values.bin")
+        if mmap:
+            values = np.memmap(values_path, dtype=np.float64, mode="r")
+        else:
+            values = np.fromfile(values_path, dtype=np.float64)
+
+        attributes = {}
+        for i in range(len(col_names)):
+            attributes[col_names[i]] = np.load(
+                os.path.join(folder_path, "attribute_" + str(i) + ".npy")
+            )
+
+        return cls.from_offsets(values, offsets, attributes)
+
+
+# Loads a .tsf file into a RaggedSeries container and returns it along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+# The dataset is loaded through its binary cache, so the values buffer is memory-mapped
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# cache_dir - cache folder. If not given, a folder named .tsf_cache next to the .tsf file is used
+# max_cache_size - maximum total size of the cache folder in bytes. None disables eviction
+def convert_tsf_to_ragged_series(
+    full_file_path_and_name,
+    cache_dir=None,
+    max_cache_size=tsf_cache.DEFAULT_MAX_CACHE_SIZE,
+):
+    entry_path = tsf_cache.get_tsf_cache_entry(
+        full_file_path_and_name, cache_dir, max_cache_size=max_cache_size
+    )
+    values, offsets, _, attributes, metadata = tsf_cache.read_tsf_cache(entry_path)
+
+    return (
+        RaggedSeries.from_offsets(values, offsets, attributes),
+        metadata["frequency"],
+        metadata["forecast_horizon"],
+        metadata["contain_missing_values"],
+        metadata["contain_equal_length"],
+    )
+
+
+# Converts an attribute column of a dataframe into a numpy array of the types in tsf_cache.ATTRIBUTE_DTYPES
+# Dates become datetime64[ns] and strings or other objects become fixed width strings. Numeric columns keep their types
+def _to_attribute_array(column):
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.to_numpy(dtype=tsf_cache.ATTRIBUTE_DTYPES["date"])
+
+    values = column.to_numpy()
+
+    if values.dtype == object or pd.api.types.is_string_dtype(column):
+        return values.astype(tsf_cache.ATTRIBUTE_DTYPES["string"])
+
+    return values
+
+
+# Converts a slicing position into per-series positions in the range [0, lengths]
+def _to_position(position, lengths, default):
+    if position is None:
+        return np.broadcast_to(default, lengths.shape).astype(np.int64)
+
+    position = np.asarray(position, dtype=np.int64)
+    position = np.where(position < 0, lengths + position, position)
+    return np.clip(position, 0, lengths)
+
+
+# Example of usage
+# series, frequency, forecast_horizon, contain_missing_values, contain_equal_length = convert_tsf_to_ragged_series("TSForecasting/tsf_data/sample.tsf")
+# train, test = series.train_test_split(forecast_horizon)
+
+# print(train[0])
+# print(test.lengths)
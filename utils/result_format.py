@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from utils.atomic_write import open_atomically
+from utils.ragged_series import RaggedSeries
+
+# Functions to write and read results, e.g. forecasts, in a compact binary format
+# A result file contains a matrix with one row per series, where rows shorter than the longest row are padded with NaN
+# Layout (all numbers are little-endian):
+#   8 bytes      - the text "TSFRES01"
+#   int32        - length of the header in bytes
+#   header       - UTF-8 JSON object, e.g. {"dataset": ..., "method": ..., "lag": ..., "horizon": ...}
+#   int32        - size of a value in bytes: 4 (float32) or 8 (float64)
+#   int32, int32 - number of rows and number of columns
+#   int32 x rows - length of each row
+#   values       - the matrix in row-major order
+# utils/result_format.R contains a reader of this format for R
+
+RESULT_FILE_MAGIC = b"TSFRES01"
+
+# The extension of the result files
+RESULT_FILE_EXTENSION = ".bin"
+
+
+# Writes a result file atomically
+#
+# Parameters
+# file_path - path of the result file
+# rows - a matrix, a list of series of different lengths or a RaggedSeries container
+# header - dictionary describing the result, e.g. {"dataset": "nn5_daily", "method": "deepar", "lag": 9, "horizon": 56}
+# dtype - data type of the values, np.float32 or np.float64
+# lengths - length of each row when rows is a matrix whose rows are padded at the end. If None, all rows of a matrix have full length
+def write_result_matrix(file_path, rows, header=None, dtype=np.float32, lengths=None):
+    dtype = np.dtype(dtype)
+
+    if dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise Exception("The values should be float32 or float64.")
+
+    if isinstance(rows, np.ndarray) and rows.ndim == 2:
+        matrix = rows
+        if lengths is None:
+            lengths = np.full(len(rows), rows.shape[1])
+    elif isinstance(rows, RaggedSeries):
+        matrix = rows.to_matrix(np.nan)
+        lengths = rows.lengths
+    else:
+        rows = [np.asarray(row, dtype=np.float64) for row in rows]
+        lengths = np.array([len(row) for row in rows], dtype=np.int64)
+
+        matrix = np.full((len(rows), int(lengths.max()) if len(rows) > 0 else 0), np.nan)
+        matrix[np.arange(matrix.shape[1]) < lengths[:, None]] = np.concatenate(rows) if len(rows) > 0 else []
+
+    header = dict(header if header is not None else {})
+    header["dtype"] = dtype.name
+    header["shape"] = list(matrix.shape)
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    with open_atomically(file_path, "wb") as output:
+        output.write(RESULT_FILE_MAGIC)
+        output.write(np.array([len(header_bytes)], dtype="<i4").tobytes())
+        output.write(header_bytes)
+        output.write(np.array([dtype.itemsize, matrix.shape[0], matrix.shape[1]], dtype="<i4").tobytes())
+        output.write(np.asarray(lengths, dtype="<i4").tobytes())
+        output.write(np.ascontiguousarray(matrix, dtype=dtype.newbyteorder("<")).tobytes())
+
+
+# Reads a result file
+# Returns the matrix of values, the length of each row and the header
+#
+# Parameters
+# file_path - path of the result file
+# mmap - whether the matrix should be memory-mapped instead of being read into memory
+def read_result_matrix(file_path, mmap=False):
+    with open(file_path, "rb") as file:
+        if file.read(len(RESULT_FILE_MAGIC)) != RESULT_FILE_MAGIC:
+            raise Exception("The file is not a result file: " + file_path)
+
+        header_length = int(np.frombuffer(file.read(4), dtype="<i4")[0])
+        header = json.loads(file.read(header_length).decode("utf-8"))
+
+        item_size, num_rows, num_cols = np.frombuffer(file.read(12), dtype="<i4").tolist()
+        lengths = np.frombuffer(file.read(4 * num_rows), dtype="<i4").astype(np.int64)
+        values_offset = file.tell()
+
+        dtype = np.dtype("<f" + str(item_size))
+
+        if mmap:
+            matrix = np.memmap(file_path, dtype=dtype, mode="r", offset=values_offset, shape=(num_rows, num_cols))
+        else:
+            matrix = np.fromfile(file, dtype=dtype, count=num_rows * num_cols).reshape(num_rows, num_cols)
+
+    return matrix, lengths, header
+
+
+# Writes the values of a result file as text with one line per row, in the same format as the text result files
+# If the header contains row_names, each line starts with the name of its row, as in the rolling origin forecast files
+#
+# Parameters
+# file_path - path of the result file
+# text_file_path - path of the text file. If None, the path of the result file with the .txt extension is used
+def export_result_text(file_path, text_file_path=None):
+    if text_file_path is None:
+        text_file_path = os.path.splitext(file_path)[0] + ".txt"
+
+    matrix, lengths, header = read_result_matrix(file_path)
+    texts = matrix.astype(str)
+    row_names = header.get("row_names")
+
+    with open_atomically(text_file_path, "w") as output:
+        writer = csv.writer(output, lineterminator="\n")
+        for i in range(len(texts)):
+            row = texts[i, : lengths[i]].tolist()
+            writer.writerow(row if row_names is None else [row_names[i]] + row)
+
+    return text_file_path
+
+
+# Example of usage
+# write_result_matrix("forecasts.bin", [np.array([1.0, 2.0]), np.array([3.0])], {"dataset": "sample", "method": "deepar", "lag": 10, "horizon": 2})
+# matrix, lengths, header = read_result_matrix("forecasts.bin")
+# export_result_text("forecasts.bin")
@@ -0,0 +1,18 @@
+# Seasonality values corresponding with the frequencies given in .tsf files, shared by the experiments and the feature calculation
+# Same as SEASONALITY_VALS in the R experiments
+
+# Seasonality values corresponding with the frequencies: 4_seconds, minutely, 10_minutes, 15_minutes, half_hourly, hourly, daily, weekly, monthly, quarterly and yearly
+# Consider multiple seasonalities for frequencies less than daily
+SEASONALITY_MAP = {
+    "4_seconds": [21600, 151200, 7889400],
+    "minutely": [1440, 10080, 525960],
+    "10_minutes": [144, 1008, 52596],
+    "15_minutes": [96, 672, 35064],
+    "half_hourly": [48, 336, 17532],
+    "hourly": [24, 168, 8766],
+    "daily": 7,
+    "weekly": 365.25 / 7,
+    "monthly": 12,
+    "quarterly": 4,
+    "yearly": 1
+}
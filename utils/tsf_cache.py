@@ -0,0 +1,360 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import utils.data_loader as loader
+
+# Increase this when the layout of the cache entries changes, so that old entries are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+# Name of the cache folder created next to the .tsf files when a cache folder is not given
+CACHE_DIR_NAME = ".tsf_cache"
+
+# Default upper bound for the total size of a cache folder in bytes
+DEFAULT_MAX_CACHE_SIZE = 10 * 1024 ** 3
+
+METADATA_FILE_NAME = "metadata.json"
+
+# numpy types used to store the attribute columns, so that the cache files can be loaded without pickling
+ATTRIBUTE_DTYPES = {"numeric": np.int64, "string": np.str_, "date": "datetime64[ns]"}
+
+
+# Returns the default cache folder of a .tsf file
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+def get_default_cache_dir(full_file_path_and_name):
+    return os.path.join(
+        os.path.dirname(os.path.abspath(full_file_path_and_name)), CACHE_DIR_NAME
+    )
+
+
+# Returns the name of the cache entry of a .tsf file
+# The name changes when the path, size or modification time of the file changes, or optionally when its content changes
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# use_content_hash - whether the content of the file should also be hashed. This is slower, but detects changes that keep the size and modification time
+def get_cache_key(full_file_path_and_name, use_content_hash=False):
+    source = os.path.abspath(full_file_path_and_name)
+    stat = os.stat(source)
+
+    key = hashlib.sha1(
+        (source + "|" + str(stat.st_size) + "|" + str(stat.st_mtime_ns)).encode("utf-8")
+    )
+
+    if use_content_hash:
+        with open(source, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                key.update(block)
+
+    return os.path.basename(source) + "_" + key.hexdigest()[:16]
+
+
+# Parses a .tsf file and writes its cache entry
+# The series values are stored as one concatenated float64 buffer with per-series offsets, so that they can be memory-mapped when loading
+# The entry is first written to a temporary folder and then renamed, so concurrent readers never see a partially written entry
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# entry_path - folder of the cache entry
+def build_tsf_cache(full_file_path_and_name, entry_path):
+    cache_dir = os.path.dirname(entry_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with loader.open_tsf_file(full_file_path_and_name) as file:
+        (
+            col_names,
+            col_types,
+            frequency,
+            forecast_horizon,
+            contain_missing_values,
+            contain_equal_length,
+            data_line_number,
+        ) = loader.read_tsf_header(file)
+
+        for col_type in col_types:
+            if col_type not in ATTRIBUTE_DTYPES:
+                raise Exception("Invalid attribute type.")
+
+        attributes = [[] for _ in col_names]
+        all_values = []
+        has_missing = []
+
+        for series_attributes, values, missing in loader._iterate_tsf_data(
+            file, col_names, col_types, data_line_number
+        ):
+            all_values.append(values)
+            has_missing.append(missing is not None)
+
+            for i in range(len(col_names)):
+                attributes[i].append(series_attributes[i])
+
+    if len(all_values) == 0:
+        raise Exception("Missing series information under data section.")
+
+    offsets = np.zeros(len(all_values) + 1, dtype=np.int64)
+    np.cumsum([len(values) for values in all_values], out=offsets[1:])
+
+    temp_path = tempfile.mkdtemp(prefix=".tmp_", dir=cache_dir)
+
+    try:
+        np.save(os.path.join(temp_path, "values.npy"), np.concatenate(all_values))
+        np.save(os.path.join(temp_path, "offsets.npy"), offsets)
+        np.save(os.path.join(temp_path, "has_missing.npy"), np.array(has_missing, dtype=bool))
+
+        for i in range(len(col_names)):
+            if col_types[i] == "date":
+                attribute_values = loader.parse_dates(attributes[i])
+            else:
+                attribute_values = np.array(attributes[i], dtype=ATTRIBUTE_DTYPES[col_types[i]])
+
+            np.save(
+                os.path.join(temp_path, "attribute_" + str(i) + ".npy"),
+                attribute_values,
+            )
+
+        with open(os.path.join(temp_path, METADATA_FILE_NAME), "w") as output:
+            json.dump(
+                {
+                    "version": CACHE_FORMAT_VERSION,
+                    "source": os.path.abspath(full_file_path_and_name),
+                    "col_names": col_names,
+                    "col_types": col_types,
+                    "frequency": frequency,
+                    "forecast_horizon": forecast_horizon,
+                    "contain_missing_values": contain_missing_values,
+                    "contain_equal_length": contain_equal_length,
+                },
+                output,
+            )
+
+        os.rename(temp_path, entry_path)
+    except OSError:
+        # Another process has written the same entry in the meantime
+        shutil.rmtree(temp_path, ignore_errors=True)
+        if not os.path.exists(os.path.join(entry_path, METADATA_FILE_NAME)):
+            raise
+    except BaseException:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+
+
+# Reads a cache entry
+# Returns the concatenated series values, the per-series offsets, a mask indicating the series with missing values, a dictionary of attribute columns and the meta-data of the dataset
+#
+# Parameters
+# entry_path - folder of the cache entry
+# mmap - whether the series values should be memory-mapped instead of being read into memory
+def read_tsf_cache(entry_path, mmap=True):
+    metadata_path = os.path.join(entry_path, METADATA_FILE_NAME)
+
+    with open(metadata_path, "r") as file:
+        metadata = json.load(file)
+
+    values = np.load(os.path.join(entry_path, "values.npy"), mmap_mode="r" if mmap else None)
+    offsets = np.load(os.path.join(entry_path, "offsets.npy"))
+    has_missing = np.load(os.path.join(entry_path, "has_missing.npy"))
+
+    attributes = {}
+    for i in range(len(metadata["col_names"])):
+        attributes[metadata["col_names"][i]] = np.load(
+            os.path.join(entry_path, "attribute_" + str(i) + ".npy")
+        )
+
+    # Record the access time used by the eviction policy
+    os.utime(metadata_path)
+
+    return np.asarray(values), offsets, has_missing, attributes, metadata
+
+
+# Returns the cache entry of a .tsf file, building it when it does not exist or is stale
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# cache_dir - cache folder. If not given, a folder named .tsf_cache next to the .tsf file is used
+# use_content_hash - whether the content of the file should be hashed when checking whether the entry is stale
+# max_cache_size - maximum total size of the cache folder in bytes. Least recently used entries are removed when it is exceeded. None disables eviction
+def get_tsf_cache_entry(
+    full_file_path_and_name,
+    cache_dir=None,
+    use_content_hash=False,
+    max_cache_size=DEFAULT_MAX_CACHE_SIZE,
+):
+    if cache_dir is None:
+        cache_dir = get_default_cache_dir(full_file_path_and_name)
+
+    entry_path = os.path.join(
+        cache_dir, get_cache_key(full_file_path_and_name, use_content_hash)
+    )
+
+    if _is_valid_entry(entry_path):
+        return entry_path
+
+    # Entries of older versions of the same file are stale. The entry of the current version is kept, as another process may have built it in the meantime
+    invalidate_tsf_cache(full_file_path_and_name, cache_dir, keep=entry_path)
+
+    if not _is_valid_entry(entry_path):
+        build_tsf_cache(full_file_path_and_name, entry_path)
+
+    if max_cache_size is not None:
+        evict_tsf_cache(cache_dir, max_cache_size, keep=entry_path)
+
+    return entry_path
+
+
+# Same as loader.convert_tsf_to_dataframe, but loads the dataset from its binary cache entry, building the entry in the first call
+# The series values of the returning dataframe are views of the memory-mapped values buffer, except for the series with missing values
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# replace_missing_vals_with - a term to indicate the missing values in series in the returning dataframe
+# value_column_name - Any name that is preferred to have as the name of the column containing series values in the returning dataframe
+# cache_dir - cache folder. If not given, a folder named .tsf_cache next to the .tsf file is used
+# use_content_hash - whether the content of the file should be hashed when checking whether the cache entry is stale
+# max_cache_size - maximum total size of the cache folder in bytes. None disables eviction
+def convert_tsf_to_dataframe_cached(
+    full_file_path_and_name,
+    replace_missing_vals_with="NaN",
+    value_column_name="series_value",
+    cache_dir=None,
+    use_content_hash=False,
+    max_cache_size=DEFAULT_MAX_CACHE_SIZE,
+):
+    entry_path = get_tsf_cache_entry(
+        full_file_path_and_name, cache_dir, use_content_hash, max_cache_size
+    )
+    values, offsets, has_missing, attributes, metadata = read_tsf_cache(entry_path)
+
+    all_series = []
+
+    for i in range(len(offsets) - 1):
+        series_values = values[offsets[i] : offsets[i + 1]]
+        missing = np.isnan(series_values) if has_missing[i] else None
+        all_series.append(
+            loader.to_series_array(series_values, missing, replace_missing_vals_with)
+        )
+
+    all_data = dict(attributes)
+    all_data[value_column_name] = all_series
+    loaded_data = pd.DataFrame(all_data)
+
+    return (
+        loaded_data,
+        metadata["frequency"],
+        metadata["forecast_horizon"],
+        metadata["contain_missing_values"],
+        metadata["contain_equal_length"],
+    )
+
+
+# Removes all cache entries of a .tsf file
+# Folders whose meta-data cannot be read, other than keep, are not removed, as they cannot be identified as entries of the file
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# cache_dir - cache folder. If not given, the default cache folder of the .tsf file is used
+# keep - an entry that is removed only if it is not valid, e.g. the entry of the current version of the file
+def invalidate_tsf_cache(full_file_path_and_name, cache_dir=None, keep=None):
+    if cache_dir is None:
+        cache_dir = get_default_cache_dir(full_file_path_and_name)
+
+    source = os.path.abspath(full_file_path_and_name)
+
+    for entry_path in _list_entries(cache_dir):
+        try:
+            with open(os.path.join(entry_path, METADATA_FILE_NAME), "r") as file:
+                entry_source = json.load(file)["source"]
+        except (OSError, ValueError, KeyError):
+            entry_source = None
+
+        if keep is not None and os.path.abspath(entry_path) == os.path.abspath(keep):
+            # Entries are renamed into place with their meta-data, so an invalid entry of this name is broken or has an older layout
+            if _is_valid_entry(entry_path):
+                continue
+        elif entry_source != source:
+            continue
+
+        shutil.rmtree(entry_path, ignore_errors=True)
+
+
+# Removes all entries in a cache folder
+#
+# Parameters
+# cache_dir - cache folder
+def clear_tsf_cache(cache_dir):
+    for entry_path in _list_entries(cache_dir):
+        shutil.rmtree(entry_path, ignore_errors=True)
+
+
+# Removes the least recently used cache entries until the total size of the cache folder is not more than max_cache_size bytes
+#
+# Parameters
+# cache_dir - cache folder
+# max_cache_size - maximum total size of the cache folder in bytes
+# keep - an entry that should not be removed, e.g. the entry that is currently being used
+def evict_tsf_cache(cache_dir, max_cache_size, keep=None):
+    entries = []
+
+    for entry_path in _list_entries(cache_dir):
+        try:
+            last_access = os.path.getmtime(os.path.join(entry_path, METADATA_FILE_NAME))
+        except OSError:
+            last_access = 0
+
+        entries.append((last_access, _get_folder_size(entry_path), entry_path))
+
+    total_size = sum(size for _, size, _ in entries)
+
+    for _, size, entry_path in sorted(entries):
+        if total_size <= max_cache_size:
+            break
+
+        if keep is not None and os.path.abspath(entry_path) == os.path.abspath(keep):
+            continue
+
+        shutil.rmtree(entry_path, ignore_errors=True)
+        total_size = total_size - size
+
+
+def _is_valid_entry(entry_path):
+    try:
+        with open(os.path.join(entry_path, METADATA_FILE_NAME), "r") as file:
+            return json.load(file).get("version") == CACHE_FORMAT_VERSION
+    except (OSError, ValueError):
+        return False
+
+
+def _list_entries(cache_dir):
+    if not os.path.isdir(cache_dir):
+        return []
+
+    return [
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if not name.startswith(".tmp_") and os.path.isdir(os.path.join(cache_dir, name))
+    ]
+
+
+def _get_folder_size(folder_path):
+    size = 0
+
+    for name in os.listdir(folder_path):
+        try:
+            size = size + os.path.getsize(os.path.join(folder_path, name))
+        except OSError:
+            pass
+
+    return size
+
+
+# Example of usage
+# loaded_data, frequency, forecast_horizon, contain_missing_values, contain_equal_length = convert_tsf_to_dataframe_cached("TSForecasting/tsf_data/sample.tsf")
+
+# Remove the cached copy of a dataset, e.g. after replacing the .tsf file with a file of the same size and modification time
+# invalidate_tsf_cache("TSForecasting/tsf_data/sample.tsf")
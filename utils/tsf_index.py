@@ -0,0 +1,300 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+import utils.data_loader as loader
+from utils.atomic_write import open_atomically
+from utils.ragged_series import RaggedSeries
+
+# Increase this when the layout of the index files changes, so that old index files are rebuilt
+INDEX_FORMAT_VERSION = 1
+
+# Extension added to the .tsf file name to get the name of its index file
+INDEX_FILE_EXTENSION = ".idx.npz"
+
+
+# An index of the series in a .tsf file, so that a few series can be read without parsing the whole file
+# The index records the byte position and size of the line of each series, its number of values and its attributes, and is stored in a sidecar file next to the .tsf file
+class TsfIndex:
+    # Parameters
+    # full_file_path_and_name - complete .tsf file path
+    # line_starts - byte position of the line of each series
+    # line_sizes - size of the line of each series in bytes
+    # lengths - number of values of each series
+    # attributes - a dictionary of attribute names and numpy arrays containing one attribute value per series
+    # metadata - dictionary containing the attribute names and types, frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+    def __init__(self, full_file_path_and_name, line_starts, line_sizes, lengths, attributes, metadata):
+        self.full_file_path_and_name = full_file_path_and_name
+        self.line_starts = line_starts
+        self.line_sizes = line_sizes
+        self.lengths = lengths
+        self.attributes = attributes
+        self.metadata = metadata
+        self._positions = {}
+
+    def __len__(self):
+        return len(self.line_starts)
+
+    # Returns the positions of series in the file given the values of an attribute, e.g. their names
+    #
+    # Parameters
+    # keys - list of attribute values. The values of a date attribute can be given as np.datetime64, datetime or pd.Timestamp values, or ISO 8601 strings
+    # attribute - name of the attribute identifying the series
+    def get_positions(self, keys, attribute="series_name"):
+        if attribute not in self.attributes:
+            raise Exception("Invalid attribute: " + attribute)
+
+        values = self.attributes[attribute]
+
+        # The lookup table of an attribute is created when it is first used. The first series with a value is returned for repeated values
+        if attribute not in self._positions:
+            self._positions[attribute] = {value: position for position, value in reversed(list(enumerate(_get_lookup_keys(values, values.dtype))))}
+
+        positions = self._positions[attribute]
+        lookup_keys = _get_lookup_keys(keys, values.dtype)
+        missing_keys = [key for key, lookup_key in zip(keys, lookup_keys) if lookup_key not in positions]
+
+        if len(missing_keys) > 0:
+            raise Exception("Series not found: " + ", ".join(str(key) for key in missing_keys))
+
+        return np.array([positions[lookup_key] for lookup_key in lookup_keys], dtype=np.int64)
+
+    # Reads and parses the lines of the given series only
+    # Returns a RaggedSeries container with the series in the given order and their attributes
+    #
+    # Parameters
+    # positions - positions of the series in the file, e.g. returned by get_positions
+    def read_series(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        col_names, col_types = self.metadata["col_names"], self.metadata["col_types"]
+
+        if np.any((positions < 0) | (positions >= len(self))):
+            raise Exception("Series positions should be between 0 and " + str(len(self) - 1) + ".")
+
+        offsets = np.concatenate(([0], np.cumsum(self.lengths[positions])))
+        values = np.empty(offsets[-1], dtype=np.float64)
+
+        # The lines are read in file order, so the reads move forward through the file
+        with open(self.full_file_path_and_name, "rb") as file:
+            for i in np.argsort(self.line_starts[positions], kind="stable"):
+                file.seek(self.line_starts[positions[i]])
+                line = file.read(self.line_sizes[positions[i]]).decode("cp1252").strip()
+
+                _, series_values, _ = loader.parse_tsf_data_line(line, col_names, col_types)
+
+                if len(series_values) != offsets[i + 1] - offsets[i]:
+                    raise Exception("The .tsf file has changed since its index was built: " + self.full_file_path_and_name)
+
+                values[offsets[i] : offsets[i + 1]] = series_values
+
+        attributes = {name: column[positions] for name, column in self.attributes.items()}
+
+        return RaggedSeries.from_offsets(values, offsets, attributes)
+
+    # Same as read_series, but returns a dataframe with the same layout as the dataframe returned by loader.convert_tsf_to_dataframe
+    #
+    # Parameters
+    # positions - positions of the series in the file, e.g. returned by get_positions
+    # replace_missing_vals_with - a term to indicate the missing values in series in the returning dataframe
+    # value_column_name - Any name that is preferred to have as the name of the column containing series values in the returning dataframe
+    def read_dataframe(self, positions, replace_missing_vals_with="NaN", value_column_name="series_value"):
+        return self.read_series(positions).to_dataframe(replace_missing_vals_with, value_column_name)
+
+
+# Converts attribute values into the keys of the lookup tables of TsfIndex.get_positions
+# Dates are converted into the datetime64 unit of the attribute and compared as integers, so the same date matches whatever type it is given in
+#
+# Parameters
+# keys - list or array of attribute values
+# dtype - data type of the attribute
+def _get_lookup_keys(keys, dtype):
+    if dtype.kind == "M":
+        return np.array(keys, dtype=dtype).view(np.int64).tolist()
+
+    return list(keys)
+
+
+# Returns the default path of the index file of a .tsf file
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+def get_default_index_path(full_file_path_and_name):
+    return full_file_path_and_name + INDEX_FILE_EXTENSION
+
+
+# Scans a .tsf file and writes its index file
+# Only the attributes of each series are parsed. The values are counted without being parsed
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# index_path - path of the index file. If not given, the .tsf file path with the extension .idx.npz is used
+def build_tsf_index(full_file_path_and_name, index_path=None):
+    if index_path is None:
+        index_path = get_default_index_path(full_file_path_and_name)
+
+    # The series are read by seeking to their lines, which is not possible in a compressed file
+    if loader.get_tsf_compression(full_file_path_and_name) is not None:
+        raise Exception("Compressed .tsf files cannot be indexed. Decompress the file to read single series from it: " + full_file_path_and_name)
+
+    stat = os.stat(full_file_path_and_name)
+
+    with open(full_file_path_and_name, "r", encoding="cp1252") as file:
+        (
+            col_names,
+            col_types,
+            frequency,
+            forecast_horizon,
+            contain_missing_values,
+            contain_equal_length,
+            data_line_number,
+        ) = loader.read_tsf_header(file)
+
+        data_start = file.tell()
+
+    line_starts = []
+    line_sizes = []
+    lengths = []
+    attributes = [[] for _ in col_names]
+
+    with open(full_file_path_and_name, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        start = data_start
+        line_number = data_line_number
+
+        while start < len(content):
+            end = content.find(b"\n", start)
+            if end == -1:
+                end = len(content)
+
+            line_number = line_number + 1
+
+            # The attributes come before the values, separated by colons
+            attribute_end = start
+            for _ in col_names:
+                attribute_end = content.find(b":", attribute_end, end) + 1
+                if attribute_end == 0:
+                    break
+
+            line_head = content[start:start + 1]
+
+            # Comments and empty lines are skipped as in the loader
+            if line_head in (b"#", b"@") or content[start:end].strip() == b"":
+                pass
+            elif attribute_end > 0:
+                series_attributes = content[start:attribute_end - 1].decode("cp1252").strip().split(":")
+
+                for i in range(len(col_names)):
+                    attributes[i].append(series_attributes[i])
+
+                line_starts.append(start)
+                line_sizes.append(end - start)
+                # The values are counted by their separators without parsing them
+                lengths.append(content[attribute_end:end].count(b",") + 1)
+            else:
+                raise Exception(loader._add_line_number("Missing attributes/values in series.", line_number))
+
+            start = end + 1
+
+    if len(line_starts) == 0:
+        raise Exception("Missing series information under data section.")
+
+    arrays = {
+        "line_starts": np.array(line_starts, dtype=np.int64),
+        "line_sizes": np.array(line_sizes, dtype=np.int64),
+        "lengths": np.array(lengths, dtype=np.int64),
+    }
+
+    for i in range(len(col_names)):
+        if col_types[i] == "numeric":
+            arrays["attribute_" + str(i)] = np.array(attributes[i], dtype=np.int64)
+        elif col_types[i] == "string":
+            arrays["attribute_" + str(i)] = np.array(attributes[i], dtype=np.str_)
+        elif col_types[i] == "date":
+            arrays["attribute_" + str(i)] = loader.parse_dates(attributes[i])
+        else:
+            raise Exception("Invalid attribute type.")
+
+    metadata = {
+        "version": INDEX_FORMAT_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "col_names": col_names,
+        "col_types": col_types,
+        "frequency": frequency,
+        "forecast_horizon": forecast_horizon,
+        "contain_missing_values": contain_missing_values,
+        "contain_equal_length": contain_equal_length,
+    }
+    arrays["metadata"] = np.array(json.dumps(metadata))
+
+    with open_atomically(index_path, "wb") as output:
+        np.savez(output, **arrays)
+
+    return index_path
+
+
+# Returns the index of a .tsf file, building the index file when it does not exist or the .tsf file has changed since it was built
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# index_path - path of the index file. If not given, the .tsf file path with the extension .idx.npz is used
+def open_tsf_index(full_file_path_and_name, index_path=None):
+    if index_path is None:
+        index_path = get_default_index_path(full_file_path_and_name)
+
+    index = _read_tsf_index(full_file_path_and_name, index_path)
+
+    if index is None:
+        build_tsf_index(full_file_path_and_name, index_path)
+        index = _read_tsf_index(full_file_path_and_name, index_path)
+
+    return index
+
+
+# Reads an index file. Returns None if it does not exist, has an older layout or does not match the size and modification time of the .tsf file
+def _read_tsf_index(full_file_path_and_name, index_path):
+    if not os.path.exists(index_path):
+        return None
+
+    stat = os.stat(full_file_path_and_name)
+
+    with np.load(index_path) as arrays:
+        metadata = json.loads(str(arrays["metadata"]))
+
+        if metadata["version"] != INDEX_FORMAT_VERSION or metadata["size"] != stat.st_size or metadata["mtime_ns"] != stat.st_mtime_ns:
+            return None
+
+        attributes = {name: arrays["attribute_" + str(i)] for i, name in enumerate(metadata["col_names"])}
+
+        return TsfIndex(full_file_path_and_name, arrays["line_starts"], arrays["line_sizes"], arrays["lengths"], attributes, metadata)
+
+
+# Reads only the given series of a .tsf file using its index
+# Returns a dataframe with the same layout as the dataframe returned by loader.convert_tsf_to_dataframe, along with other meta-data of the dataset: frequency, horizon, whether the dataset contains missing values and whether the series have equal lengths
+#
+# Parameters
+# full_file_path_and_name - complete .tsf file path
+# keys - values of the attribute identifying the series, e.g. their names
+# attribute - name of the attribute identifying the series
+# replace_missing_vals_with - a term to indicate the missing values in series in the returning dataframe
+# value_column_name - Any name that is preferred to have as the name of the column containing series values in the returning dataframe
+def read_tsf_series(full_file_path_and_name, keys, attribute="series_name", replace_missing_vals_with="NaN", value_column_name="series_value"):
+    index = open_tsf_index(full_file_path_and_name)
+    loaded_data = index.read_dataframe(index.get_positions(keys, attribute), replace_missing_vals_with, value_column_name)
+
+    return (
+        loaded_data,
+        index.metadata["frequency"],
+        index.metadata["forecast_horizon"],
+        index.metadata["contain_missing_values"],
+        index.metadata["contain_equal_length"],
+    )
+
+
+# Example of usage
+# loaded_data, frequency, forecast_horizon, contain_missing_values, contain_equal_length = read_tsf_series("TSForecasting/tsf_data/sample.tsf", ["T1", "T42"])
+
+# Example of reading series by their positions in the file
+# index = open_tsf_index("TSForecasting/tsf_data/sample.tsf")
+# series = index.read_series([0, 41])
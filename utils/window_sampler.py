@@ -0,0 +1,86 @@
+import numpy as np
+
+import utils.error_calculator as error_calculator
+from utils.ragged_series import RaggedSeries
+
+
+# Samples random windows of a fixed length from a set of series to train global models in minibatches
+# The windows are views of the series values buffer, which can be memory-mapped, so only the sampled minibatches are held in memory instead of the full embedded matrix
+# A series is chosen with probability proportional to its weight and a window is chosen uniformly within the series. By default, the weight of a series is its number of windows, so all windows are equally likely
+class WindowSampler:
+    # Parameters
+    # series - a list containing the training series or a RaggedSeries container
+    # window_length - the number of values in a window, e.g. lag + 1 for the lags and the target of a pooled regression model
+    # series_weights - array containing a sampling weight per series. If None, the number of windows of each series is used
+    # seed - random seed, so the same minibatches are sampled in every run
+    # allow_short_series - whether series shorter than window_length are sampled as one shorter window containing the full series. If False, they are never sampled
+    def __init__(self, series, window_length, series_weights=None, seed=1, allow_short_series=False):
+        if not isinstance(series, RaggedSeries):
+            series = RaggedSeries.from_offsets(*error_calculator.flatten_series(series))
+
+        self.series = series
+        self.window_length = window_length
+
+        lengths = series.lengths
+        self.num_windows = np.maximum(lengths - window_length + 1, 0)
+        if allow_short_series:
+            self.num_windows[(lengths > 0) & (self.num_windows == 0)] = 1
+
+        if series_weights is None:
+            weights = self.num_windows.astype(np.float64)
+        else:
+            weights = np.where(self.num_windows > 0, np.asarray(series_weights, dtype=np.float64), 0)
+
+        if np.any(weights < 0) or not np.sum(weights) > 0:
+            raise Exception("The sampling weights should be non-negative and at least one series with a window should have a positive weight.")
+
+        self.cumulative_weights = np.cumsum(weights)
+        self.last_sampled_series = np.flatnonzero(weights)[-1]
+        self.rng = np.random.default_rng(seed)
+
+    # Returns a RaggedSeries container of randomly sampled windows, sharing the values buffer of the series
+    # The attributes series_index and position give the series of each window and the position of the window within the series
+    #
+    # Parameters
+    # batch_size - the number of windows
+    def sample_windows(self, batch_size):
+        draws = self.rng.random(batch_size) * self.cumulative_weights[-1]
+        series_indices = np.minimum(np.searchsorted(self.cumulative_weights, draws, side="right"), self.last_sampled_series)
+
+        positions = (self.rng.random(batch_size) * self.num_windows[series_indices]).astype(np.int64)
+
+        starts = self.series.starts[series_indices] + positions
+        ends = np.minimum(starts + self.window_length, self.series.ends[series_indices])
+
+        return RaggedSeries(self.series.values, starts, ends, {"series_index": series_indices, "position": positions})
+
+    # Returns a minibatch of lags and targets, the same as a random sample of the rows of the embedded matrix created by create_input_matrix in utils/global_model_helper.py
+    # The lags are a matrix with the columns Lag1, ..., Lag<window_length - 1> and the targets are the values following them
+    #
+    # Parameters
+    # batch_size - the number of windows
+    # series_means - array containing the mean of each series used to normalise its values. If None, the values are not normalised
+    # dtype - data type of the returned arrays
+    def sample_lags_and_targets(self, batch_size, series_means=None, dtype=np.float32):
+        windows = self.sample_windows(batch_size)
+
+        if np.any(windows.lengths != self.window_length):
+            raise Exception("Lags and targets can only be sampled from windows of full length.")
+
+        matrix = windows.to_matrix()
+        if series_means is not None:
+            matrix = matrix / series_means[windows.attributes["series_index"]][:, None]
+
+        matrix = matrix.astype(dtype, copy=False)
+        return matrix[:, -2::-1], matrix[:, -1]
+
+    # Yields minibatches of windows returned by sample_windows
+    #
+    # Parameters
+    # batch_size - the number of windows in a minibatch
+    # num_batches - the number of minibatches. If None, minibatches are yielded until the caller stops
+    def iterate_batches(self, batch_size, num_batches=None):
+        batch = 0
+        while num_batches is None or batch < num_batches:
+            yield self.sample_windows(batch_size)
+            batch = batch + 1